@@ -0,0 +1,83 @@
+"""
+Worker boot latency: module import plus create_app(), each in a fresh process.
+
+    python benchmarks/bench_boot.py [--runs 10] [--database-url sqlite:///...]
+
+Initialises a throwaway SQLite database once (flask init-db), then boots the
+app in --runs separate interpreters, the way each gunicorn worker does. Prints
+import and create_app() times (median, p95, max), the SQL statements issued
+during create_app(), and whether ReportLab was imported at boot.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+# Runs in each child interpreter; prints one JSON line
+BOOT = r'''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+statements = []
+event.listen(Engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+from src.main import create_app
+imported = time.perf_counter()
+create_app()
+booted = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (booted - imported) * 1000,
+    'statements': len(statements),
+    'reportlab': 'reportlab' in sys.modules
+}))
+'''
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Worker boot latency')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--database-url', help='Boot against this database instead of a fresh SQLite file')
+    args = parser.parse_args()
+
+    env = dict(os.environ, EMAIL_OUTBOX_WORKER='false', DATABASE_AUTO_INIT='false')
+    if args.database_url:
+        env['DATABASE_URL'] = args.database_url
+    else:
+        workdir = tempfile.mkdtemp(prefix='bench-boot-')
+        env['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        subprocess.run(
+            [sys.executable, '-m', 'flask', '--app', 'src.main:create_app', 'init-db'],
+            cwd=BACKEND, env=env, check=True, capture_output=True
+        )
+
+    samples = []
+    for _ in range(args.runs):
+        result = subprocess.run(
+            [sys.executable, '-c', BOOT, BACKEND],
+            cwd=BACKEND, env=env, check=True, capture_output=True, text=True
+        )
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    print(f"{'phase':<12} {'median ms':>10} {'p95 ms':>10} {'max ms':>10}")
+    for phase in ('import_ms', 'create_app_ms'):
+        values = [sample[phase] for sample in samples]
+        print(f"{phase[:-3]:<12} {statistics.median(values):>10.1f} {percentile(values, 0.95):>10.1f} {max(values):>10.1f}")
+    print(f"SQL statements in create_app: {max(sample['statements'] for sample in samples)}")
+    print(f"ReportLab imported at boot: {any(sample['reportlab'] for sample in samples)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,299 @@
+"""
+Latency and query counts of the hot endpoints over a synthetic organisation.
+
+    python benchmarks/bench_endpoints.py [--profile small|medium|large] [--seed 0]
+        [--iterations 30] [--output results.json]
+        [--baseline baseline.json] [--save-baseline baseline.json]
+
+Builds the synthetic dataset for --profile/--seed once (see
+src/utils/synthetic_data.py; cached under benchmarks/data/ and regenerated
+when SCHEMA_VERSION changes, --rebuild to force it) and benchmarks a copy of it, so write endpoints never change the
+cached data. Every endpoint is called in-process through the WSGI test client
+as the role that uses it. p50/p95 latency, SQL statements per request (from
+the Server-Timing header) and status codes are printed and written to
+--output as JSON.
+
+With --baseline, results are compared against an earlier run: an endpoint
+regresses when it runs more queries, starts failing, or its p95 grows by more
+than --tolerance (and --min-delta-ms). Regressions exit with status 1.
+Latency baselines are only comparable on the machine that recorded them;
+query counts are comparable anywhere.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+DATA_DIR = os.path.join(BACKEND, 'benchmarks', 'data')
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def configure_environment(database_path):
+    os.environ.update({
+        'DATABASE_URL': f'sqlite:///{database_path}',
+        'DATABASE_AUTO_INIT': 'false',
+        'EMAIL_OUTBOX_WORKER': 'false',
+        # Every request comes from one address; the login limiter would reject most of them
+        'RATELIMIT_ENABLED': 'false',
+        'SQL_INSTRUMENTATION': 'true',
+        'SQL_SERVER_TIMING': 'true',
+        'SQL_QUERY_BUDGET_RAISE': 'false',
+    })
+    os.environ.pop('DATABASE_REPLICA_URL', None)
+    os.environ.pop('METRICS_DIR', None)
+
+
+def build_dataset(profile, seed, path):
+    """Generate the dataset into path; returns its metadata"""
+    from src.main import create_app
+    from src.models.schema_state import SCHEMA_VERSION
+    from src.utils.bootstrap import init_schema
+    from src.utils.synthetic_data import PROFILES, SyntheticOrganization
+
+    configure_environment(path)
+    app = create_app()
+    with app.app_context():
+        init_schema()
+        started = time.perf_counter()
+        organization = SyntheticOrganization(**PROFILES[profile], seed=seed)
+        written = organization.generate(
+            progress=lambda table, rows: print(f'  {table}: {rows:,}', end='\r', file=sys.stderr)
+        )
+        elapsed = time.perf_counter() - started
+    print(file=sys.stderr)
+    return {
+        'profile': profile,
+        'seed': seed,
+        'schema_version': SCHEMA_VERSION,
+        'as_of': organization.as_of.isoformat(),
+        'first_user_id': organization.first_user_id,
+        'departments': organization.counts['departments'],
+        'rows': written,
+        'generated_seconds': round(elapsed, 1),
+    }
+
+
+def load_dataset(profile, seed, rebuild):
+    """Path and metadata of the cached dataset, regenerated when missing or built for another schema"""
+    from src.models.schema_state import SCHEMA_VERSION
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f'{profile}-{seed}.db')
+    meta_path = f'{path}.json'
+    if not rebuild and os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('schema_version') == SCHEMA_VERSION:
+            return path, meta
+        print(f"Cached {profile} dataset is schema version {meta.get('schema_version', 'unknown')}, "
+              f'models are {SCHEMA_VERSION}', file=sys.stderr)
+
+    for stale in (path, f'{path}-wal', f'{path}-shm', meta_path):
+        if os.path.exists(stale):
+            os.remove(stale)
+    print(f'Generating {profile} dataset (seed {seed})...', file=sys.stderr)
+    meta = build_dataset(profile, seed, path)
+    # Fold the WAL into the file so the copy below is complete
+    import sqlite3
+    with sqlite3.connect(path) as connection:
+        connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    return path, meta
+
+
+def scenarios(meta):
+    """(name, role, method, path, body) for each benchmarked endpoint"""
+    from src.utils.synthetic_data import SYNTHETIC_PASSWORD, synthetic_employee_number
+
+    as_of = date.fromisoformat(meta['as_of'])
+    staff_number = synthetic_employee_number(meta['departments'] + 1)
+    apply_from = as_of + timedelta(days=120)
+    handover_from, handover_to = as_of + timedelta(days=7), as_of + timedelta(days=11)
+    return [
+        ('login', None, 'POST', '/api/auth/login',
+         {'employee_number': staff_number, 'password': SYNTHETIC_PASSWORD}),
+        ('apply', 'staff', 'POST', '/api/leave/apply',
+         {'leave_type_id': 1, 'start_date': apply_from.isoformat(),
+          'end_date': (apply_from + timedelta(days=4)).isoformat(), 'reason': 'Benchmark'}),
+        ('pending', 'hod', 'GET', '/api/leave/pending', None),
+        ('history', 'staff', 'GET', '/api/leave/history', None),
+        ('dashboard_stats', 'staff', 'GET', '/api/dashboard/stats', None),
+        ('team_overview', 'hod', 'GET', '/api/dashboard/team-overview', None),
+        ('calendar', 'hod', 'GET', f'/api/dashboard/calendar?year={as_of.year}&month={as_of.month}&view=team', None),
+        ('available_for_handover', 'staff', 'GET',
+         f'/api/users/available-for-handover?start_date={handover_from}&end_date={handover_to}', None),
+        ('department_stats', 'principal_secretary', 'GET', '/api/department/stats', None),
+    ]
+
+
+def run(database_path, meta, iterations, warmup, max_seconds, only):
+    from src.main import create_app
+    from src.utils.synthetic_data import SYNTHETIC_PASSWORD, synthetic_employee_number
+
+    configure_environment(database_path)
+    app = create_app()
+    # N+1 warnings from query_stats would flood the output; the counts are in the results
+    app.logger.setLevel(logging.ERROR)
+    client = app.test_client()
+
+    accounts = {
+        'principal_secretary': synthetic_employee_number(0),
+        'hod': synthetic_employee_number(1),
+        'staff': synthetic_employee_number(meta['departments'] + 1),
+    }
+    headers = {}
+    for role, employee_number in accounts.items():
+        response = client.post('/api/auth/login', json={'employee_number': employee_number, 'password': SYNTHETIC_PASSWORD})
+        if response.status_code != 200:
+            raise SystemExit(f'Could not log in as {role} ({employee_number}): {response.get_data(as_text=True)}')
+        headers[role] = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+    results = {}
+    for name, role, method, path, body in scenarios(meta):
+        if only and name not in only:
+            continue
+        latencies, queries, statuses = [], [], {}
+        first_error = None
+        deadline = None
+        for i in range(warmup + iterations):
+            if i == warmup:
+                deadline = time.perf_counter() + max_seconds
+            started = time.perf_counter()
+            response = client.open(path, method=method, json=body, headers=headers.get(role, {}))
+            elapsed = (time.perf_counter() - started) * 1000
+            response.get_data()
+            if i < warmup:
+                continue
+            latencies.append(elapsed)
+            match = SERVER_TIMING_QUERIES.search(response.headers.get('Server-Timing', ''))
+            queries.append(int(match.group(1)) if match else 0)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            if response.status_code >= 400 and first_error is None:
+                first_error = response.get_data(as_text=True)[:200]
+            if time.perf_counter() > deadline:
+                break
+        results[name] = {
+            'method': method,
+            'path': path.split('?')[0],
+            'role': role,
+            'samples': len(latencies),
+            'p50_ms': round(statistics.median(latencies), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'max_ms': round(max(latencies), 2),
+            'queries': int(statistics.median(queries)),
+            'queries_max': max(queries),
+            'statuses': statuses,
+            'error_rate': round(sum(n for s, n in statuses.items() if not s.startswith('2')) / len(latencies), 3),
+        }
+        if first_error:
+            results[name]['first_error'] = first_error
+        print(f"  {name}: p50 {results[name]['p50_ms']} ms, {results[name]['queries']} queries", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Regression messages for endpoints present in both runs"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(f"{name}: {current['queries']} queries (baseline {previous['queries']})")
+        if current['error_rate'] > previous['error_rate']:
+            regressions.append(f"{name}: error rate {current['error_rate']:.0%} (baseline {previous['error_rate']:.0%})")
+        grown = current['p95_ms'] - previous['p95_ms']
+        if grown > min_delta_ms and current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']} ms (baseline {previous['p95_ms']} ms)")
+    return regressions
+
+
+def print_table(results, baseline):
+    previous = (baseline or {}).get('endpoints', {})
+    print(f"{'endpoint':<24} {'n':>4} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'status':<12} {'p95 vs base':>12}")
+    for name, r in results.items():
+        statuses = ','.join(f'{s}x{n}' if len(r['statuses']) > 1 else s for s, n in sorted(r['statuses'].items()))
+        delta = ''
+        if name in previous and previous[name]['p95_ms']:
+            delta = f"{(r['p95_ms'] / previous[name]['p95_ms'] - 1) * 100:+.0f}%"
+        print(f"{name:<24} {r['samples']:>4} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['queries']:>8} {statuses:<12} {delta:>12}")
+
+
+def main():
+    from src.utils.synthetic_data import PROFILES
+
+    parser = argparse.ArgumentParser(description='Hot endpoint latency over a synthetic organisation')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--max-seconds', type=float, default=30.0, help='Stop sampling an endpoint after this long')
+    parser.add_argument('--only', help='Comma-separated endpoint names')
+    parser.add_argument('--rebuild', action='store_true', help='Regenerate the cached dataset')
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--baseline', help='Compare against this results JSON')
+    parser.add_argument('--save-baseline', help='Also write the results to this path')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative p95 growth')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help='Ignore p95 growth smaller than this')
+    args = parser.parse_args()
+
+    dataset, meta = load_dataset(args.profile, args.seed, args.rebuild)
+    workdir = tempfile.mkdtemp(prefix='bench-endpoints-')
+    try:
+        copy = os.path.join(workdir, 'bench.db')
+        shutil.copyfile(dataset, copy)
+        only = set(args.only.split(',')) if args.only else None
+        results = run(copy, meta, args.iterations, args.warmup, args.max_seconds, only)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    import sqlalchemy
+    report = {
+        'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'dataset': meta,
+        'environment': {'python': platform.python_version(), 'sqlalchemy': sqlalchemy.__version__,
+                        'platform': platform.platform(), 'machine': platform.node()},
+        'settings': {'iterations': args.iterations, 'warmup': args.warmup},
+        'endpoints': results,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline['dataset']['profile'], baseline['dataset']['seed']) != (args.profile, args.seed):
+            raise SystemExit('Baseline was recorded on a different dataset')
+
+    print_table(results, baseline)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        for message in regressions:
+            print(f'REGRESSION {message}')
+        if regressions:
+            sys.exit(1)
+        print('No regressions against baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Round trips for notification fan-out and inbox clearing, per-row vs set-based.
+
+    python benchmarks/bench_notifications.py [--sizes 10,100,1000]
+
+Runs against a throwaway SQLite database and prints the statements executed
+and wall time for each size. The set-based paths should stay constant.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def count_statements(engine):
+    from sqlalchemy import event
+
+    counter = {'n': 0}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter['n'] += 1
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    return counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Notification fan-out / mark-read round trips')
+    parser.add_argument('--sizes', default='10,100,1000')
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(',')]
+
+    workdir = tempfile.mkdtemp(prefix='bench-notifications-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from sqlalchemy import insert
+    from src.main import create_app
+    from src.extensions import db
+    from src.models.user import User
+    from src.models.notification import Notification
+    from src.utils.bootstrap import init_schema
+
+    app = create_app()
+    with app.app_context():
+        init_schema()
+        counter = count_statements(db.engine)
+
+        def measure(size, label, fn):
+            counter['n'] = 0
+            started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - started
+            print(f"{size:>8} {label:<24} {counter['n']:>10} {elapsed:>9.3f}")
+
+        print(f"{'size':>8} {'path':<24} {'statements':>10} {'seconds':>9}")
+        for batch, size in enumerate(sizes):
+            role = f'bench{batch}'
+            db.session.execute(insert(User), [{
+                'employee_number': f'B{batch}{i:04d}',
+                'email': f'{role}-{i}@example.com',
+                'phone_number': '0700000000',
+                'password_hash': 'x',
+                'first_name': 'Bench',
+                'last_name': str(i),
+                'role': role
+            } for i in range(size)])
+            db.session.commit()
+            user_ids = [user_id for (user_id,) in db.session.query(User.id).filter_by(role=role)]
+            inbox_owner = user_ids[0]
+
+            def per_row_fan_out():
+                for user_id in user_ids:
+                    db.session.add(Notification(user_id=user_id, title='Policy', message='m',
+                                                notification_type='system'))
+                db.session.commit()
+
+            def bulk_fan_out():
+                Notification.fan_out('Policy', 'm', 'system', role=role)
+                db.session.commit()
+
+            def fill_inbox():
+                db.session.execute(insert(Notification), [
+                    {'user_id': inbox_owner, 'title': 'Policy', 'message': 'm', 'notification_type': 'system'}
+                    for _ in range(size)
+                ])
+                db.session.commit()
+
+            def per_row_mark_read():
+                for notification in Notification.query.filter_by(user_id=inbox_owner, is_read=False).all():
+                    notification.mark_as_read()
+
+            def bulk_mark_read():
+                Notification.mark_read(inbox_owner)
+                db.session.commit()
+
+            measure(size, 'per-row fan-out', per_row_fan_out)
+            measure(size, 'INSERT ... SELECT fan-out', bulk_fan_out)
+            fill_inbox()
+            measure(size, 'per-row mark-read', per_row_mark_read)
+            fill_inbox()
+            measure(size, 'set-based mark-read', bulk_mark_read)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,445 @@
+"""
+Load test of scripted user journeys over the synthetic organisation.
+
+    python benchmarks/load_test.py [--profile small|medium|large] [--seed 0]
+        [--users 20] [--duration 60] [--ramp-up 5] [--think-ms 500]
+        [--mix staff=70,hod=20,principal_secretary=10]
+        [--target wsgi|serve] [--url http://127.0.0.1:8000] [--output results.json]
+
+Virtual users (threads) repeatedly pick a journey by --mix weight and walk
+it as a random synthetic account of that role:
+
+    staff                log in, dashboard stats, notifications, leave history,
+                         leave types, apply for leave
+    hod                  log in, pending queue, open up to two application forms
+    principal_secretary  log in, team overview, pending queue
+
+The API has no approve/reject endpoint yet, so reviewers stop at opening the
+forms of pending applications.
+
+Targets:
+  wsgi   (default) the app in-process through the WSGI test client
+  serve  the app behind a threaded werkzeug server on a free local port, over HTTP
+  --url  an already running server; start it on a copy of the dataset, e.g.
+         DATABASE_URL=sqlite:///$(pwd)/copy.db RATELIMIT_ENABLED=false gunicorn wsgi:app
+         (the login limiter would otherwise reject most journeys, which all
+         come from one address)
+
+wsgi and serve run on a temporary copy of the cached dataset (see
+bench_endpoints.py, --rebuild to regenerate), so applications filed during
+the run never reach the cache. Everything is local; nothing leaves the host.
+The load generator shares the interpreter with the app for wsgi and serve,
+so size worker counts from --url runs against the real server setup.
+
+Reports throughput, latency percentiles, SQL statements per request (from
+Server-Timing, where enabled) and error rates per endpoint and per journey.
+Any response >= 400 or transport error counts as an error. With
+--max-error-rate the run exits with status 1 when the overall error rate is
+higher.
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+from bench_endpoints import SERVER_TIMING_QUERIES, configure_environment, load_dataset, percentile
+
+JOURNEYS = ('staff', 'hod', 'principal_secretary')
+DEFAULT_MIX = 'staff=70,hod=20,principal_secretary=10'
+PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class JourneyAborted(Exception):
+    """A step the rest of the journey depends on failed"""
+
+
+class WsgiTransport:
+    """Requests through the app's test client, one client per thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body, headers):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_data(), response.headers.get('Server-Timing', '')
+
+    def close(self):
+        pass
+
+
+class HttpTransport:
+    """Requests over HTTP keep-alive connections, one connection per thread"""
+
+    def __init__(self, base_url, timeout=60):
+        url = urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = url.netloc
+        self.prefix = url.path.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def request(self, method, path, body, headers):
+        headers = dict(headers)
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        # A server may close an idle keep-alive connection; retry once on a fresh one
+        for attempt in (1, 2):
+            connection = getattr(self._local, 'connection', None)
+            if connection is None:
+                connection = self._local.connection = self.connection_class(self.netloc, timeout=self.timeout)
+            try:
+                connection.request(method, self.prefix + path, body=data, headers=headers)
+                response = connection.getresponse()
+                return response.status, response.read(), response.getheader('Server-Timing', '')
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                self._local.connection = None
+                if attempt == 2:
+                    raise
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+
+
+class Recorder:
+    """Per-thread sample lists, merged once the run is over"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def _samples(self):
+        samples = getattr(self._local, 'samples', None)
+        if samples is None:
+            samples = self._local.samples = {'requests': [], 'journeys': []}
+            with self._lock:
+                self._all.append(samples)
+        return samples
+
+    def request(self, endpoint, status, elapsed_ms, queries, error):
+        self._samples()['requests'].append((endpoint, status, elapsed_ms, queries, error))
+
+    def journey(self, name, elapsed_ms, ok):
+        self._samples()['journeys'].append((name, elapsed_ms, ok))
+
+    def merged(self, kind):
+        with self._lock:
+            return [sample for samples in self._all for sample in samples[kind]]
+
+
+class VirtualUser:
+    """One simulated person per journey, sharing a transport and a recorder"""
+
+    def __init__(self, transport, recorder, accounts, meta, rng):
+        self.transport = transport
+        self.recorder = recorder
+        self.accounts = accounts
+        self.rng = rng
+        self.as_of = date.fromisoformat(meta['as_of'])
+
+    def call(self, endpoint, method, path, body=None, token=None, expect=(200,)):
+        """One recorded request; returns the decoded JSON body (or None)"""
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        started = time.perf_counter()
+        try:
+            status, data, server_timing = self.transport.request(method, path, body, headers)
+        except Exception as e:
+            self.recorder.request(endpoint, 'error', (time.perf_counter() - started) * 1000, None,
+                                  f'{type(e).__name__}: {e}')
+            raise JourneyAborted(endpoint)
+        elapsed = (time.perf_counter() - started) * 1000
+        match = SERVER_TIMING_QUERIES.search(server_timing or '')
+        error = None if status < 400 else data[:200].decode('utf-8', 'replace')
+        self.recorder.request(endpoint, status, elapsed, int(match.group(1)) if match else None, error)
+        if status not in expect:
+            return None
+        try:
+            return json.loads(data) if data[:1] in (b'{', b'[') else None
+        except ValueError:
+            return None
+
+    def login(self, role):
+        from src.utils.synthetic_data import SYNTHETIC_PASSWORD
+
+        employee_number = self.rng.choice(self.accounts[role])
+        body = self.call('POST /api/auth/login', 'POST', '/api/auth/login',
+                         {'employee_number': employee_number, 'password': SYNTHETIC_PASSWORD})
+        if not body or 'access_token' not in body:
+            raise JourneyAborted('login')
+        return body['access_token']
+
+    def staff(self):
+        token = self.login('staff')
+        self.call('GET /api/dashboard/stats', 'GET', '/api/dashboard/stats', token=token)
+        self.call('GET /api/notifications', 'GET', '/api/notifications', token=token)
+        self.call('GET /api/leave/history', 'GET', '/api/leave/history', token=token)
+        types = self.call('GET /api/leave/types', 'GET', '/api/leave/types', token=token)
+        type_ids = [t['id'] for t in (types or {}).get('leave_types', []) if 'id' in t] or [1]
+        start = self.as_of + timedelta(days=self.rng.randint(14, 120))
+        self.call('POST /api/leave/apply', 'POST', '/api/leave/apply', {
+            'leave_type_id': self.rng.choice(type_ids),
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=self.rng.randint(0, 6))).isoformat(),
+            'reason': 'Load test',
+        }, token=token, expect=(201,))
+
+    def hod(self):
+        token = self.login('hod')
+        pending = self.call('GET /api/leave/pending', 'GET', '/api/leave/pending', token=token)
+        applications = (pending or {}).get('applications', [])
+        for application in self.rng.sample(applications, min(2, len(applications))):
+            self.call('GET /api/leave/applications/<id>/pdf', 'GET',
+                      f"/api/leave/applications/{application['id']}/pdf", token=token)
+
+    def principal_secretary(self):
+        token = self.login('principal_secretary')
+        self.call('GET /api/dashboard/team-overview', 'GET', '/api/dashboard/team-overview', token=token)
+        self.call('GET /api/leave/pending', 'GET', '/api/leave/pending', token=token)
+
+
+def parse_mix(value):
+    """'staff=70,hod=20' -> {journey: weight}"""
+    mix = {}
+    for item in value.split(','):
+        name, sep, weight = item.partition('=')
+        if not sep or name.strip() not in JOURNEYS:
+            raise SystemExit(f"--mix entries are journey=weight with journeys {', '.join(JOURNEYS)}")
+        mix[name.strip()] = float(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def synthetic_accounts(meta):
+    from src.utils.synthetic_data import synthetic_employee_number
+
+    users, departments = meta['rows']['users'], meta['departments']
+    return {
+        'principal_secretary': [synthetic_employee_number(0)],
+        'hod': [synthetic_employee_number(i) for i in range(1, departments + 1)],
+        'staff': [synthetic_employee_number(i) for i in range(departments + 1, users)],
+    }
+
+
+def run(transport, meta, users, duration, ramp_up, think_ms, mix, seed, max_journeys):
+    recorder = Recorder()
+    accounts = synthetic_accounts(meta)
+    names, weights = list(mix), list(mix.values())
+    stop = threading.Event()
+    remaining = [max_journeys]
+    remaining_lock = threading.Lock()
+
+    def worker(index):
+        rng = random.Random(seed * 100_003 + index)
+        user = VirtualUser(transport, recorder, accounts, meta, rng)
+        # Spread the start of the virtual users over the ramp-up
+        if stop.wait(ramp_up * index / users):
+            return
+        try:
+            while not stop.is_set():
+                if max_journeys:
+                    with remaining_lock:
+                        if remaining[0] <= 0:
+                            return
+                        remaining[0] -= 1
+                name = rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                try:
+                    getattr(user, name)()
+                    ok = True
+                except JourneyAborted:
+                    ok = False
+                recorder.journey(name, (time.perf_counter() - started) * 1000, ok)
+                if think_ms:
+                    stop.wait(rng.uniform(0, think_ms) / 1000)
+        finally:
+            transport.close()
+
+    threads = [threading.Thread(target=worker, args=(i,), name=f'vu-{i}', daemon=True) for i in range(users)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    try:
+        deadline = started + duration
+        while any(thread.is_alive() for thread in threads) and time.perf_counter() < deadline:
+            time.sleep(min(1.0, max(deadline - time.perf_counter(), 0)))
+            done = len(recorder.merged('journeys'))
+            print(f'\r  {time.perf_counter() - started:5.0f}s  {done:,} journeys\033[K', end='', file=sys.stderr)
+    except KeyboardInterrupt:
+        print('\n  interrupted; finishing journeys in flight', file=sys.stderr)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    print(file=sys.stderr)
+    return summarize(recorder, elapsed)
+
+
+def _latency(values):
+    summary = {f'p{int(fraction * 100)}_ms': round(percentile(values, fraction), 1) for fraction in PERCENTILES}
+    summary['max_ms'] = round(max(values), 1)
+    return summary
+
+
+def summarize(recorder, elapsed):
+    by_endpoint = {}
+    for endpoint, status, elapsed_ms, queries, error in recorder.merged('requests'):
+        by_endpoint.setdefault(endpoint, []).append((status, elapsed_ms, queries, error))
+    endpoints = {}
+    failed = 0
+    for endpoint, samples in sorted(by_endpoint.items()):
+        statuses = {}
+        for status, *_ in samples:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        errors = [error for _, _, _, error in samples if error is not None]
+        queries = [q for _, _, q, _ in samples if q is not None]
+        failed += len(errors)
+        endpoints[endpoint] = {
+            'requests': len(samples),
+            'throughput_rps': round(len(samples) / elapsed, 2),
+            **_latency([elapsed_ms for _, elapsed_ms, _, _ in samples]),
+            'queries': int(statistics.median(queries)) if queries else None,
+            'statuses': statuses,
+            'error_rate': round(len(errors) / len(samples), 4),
+        }
+        if errors:
+            endpoints[endpoint]['first_error'] = errors[0]
+
+    by_journey = {}
+    for name, elapsed_ms, ok in recorder.merged('journeys'):
+        by_journey.setdefault(name, []).append((elapsed_ms, ok))
+    journeys = {
+        name: {
+            'completed': len(samples),
+            'throughput_per_minute': round(len(samples) / elapsed * 60, 1),
+            **_latency([elapsed_ms for elapsed_ms, _ in samples]),
+            'aborted_rate': round(sum(not ok for _, ok in samples) / len(samples), 4),
+        }
+        for name, samples in sorted(by_journey.items())
+    }
+
+    total = sum(e['requests'] for e in endpoints.values())
+    return {
+        'elapsed_seconds': round(elapsed, 1),
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 2) if elapsed else 0,
+        'error_rate': round(failed / total, 4) if total else 0,
+        'endpoints': endpoints,
+        'journeys': journeys,
+    }
+
+
+def print_report(results):
+    print(f"{'endpoint':<40} {'reqs':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'queries':>7} {'errors':>7}  status")
+    for name, r in results['endpoints'].items():
+        statuses = ','.join(f'{s}x{n}' for s, n in sorted(r['statuses'].items()))
+        queries = '' if r['queries'] is None else r['queries']
+        print(f"{name:<40} {r['requests']:>6} {r['throughput_rps']:>7.2f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {queries:>7} {r['error_rate']:>7.1%}  {statuses}")
+    print()
+    print(f"{'journey':<40} {'done':>6} {'per min':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'aborted':>7}")
+    for name, r in results['journeys'].items():
+        print(f"{name:<40} {r['completed']:>6} {r['throughput_per_minute']:>7.1f} {r['p50_ms']:>8.1f} "
+              f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['aborted_rate']:>7.1%}")
+    print()
+    print(f"{results['requests']:,} requests in {results['elapsed_seconds']}s: "
+          f"{results['throughput_rps']} req/s, {results['error_rate']:.1%} errors")
+
+
+def main():
+    from src.utils.synthetic_data import PROFILES
+
+    parser = argparse.ArgumentParser(description='Scripted user journeys against a synthetic organisation')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='small')
+    parser.add_argument('--seed', type=int, default=0, help='Dataset seed, also seeds the journeys')
+    parser.add_argument('--rebuild', action='store_true', help='Regenerate the cached dataset')
+    parser.add_argument('--users', type=int, default=20, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60.0, help='Seconds to run')
+    parser.add_argument('--ramp-up', type=float, default=5.0, help='Seconds over which virtual users start')
+    parser.add_argument('--think-ms', type=float, default=500.0, help='Maximum pause between journeys')
+    parser.add_argument('--journeys', type=int, default=0, help='Stop after this many journeys (0: no limit)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Journey weights')
+    parser.add_argument('--target', choices=['wsgi', 'serve'], default='wsgi')
+    parser.add_argument('--url', help='Load an already running server instead')
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--max-error-rate', type=float, help='Exit with status 1 above this overall error rate')
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    dataset, meta = load_dataset(args.profile, args.seed, args.rebuild)
+    workdir = tempfile.mkdtemp(prefix='load-test-')
+    server = None
+    try:
+        if args.url:
+            transport = HttpTransport(args.url)
+            target = args.url
+        else:
+            from src.main import create_app
+
+            copy = os.path.join(workdir, 'load.db')
+            shutil.copyfile(dataset, copy)
+            configure_environment(copy)
+            app = create_app()
+            # Per-request SQL log lines would flood the output; the counts are in the results
+            app.logger.setLevel(logging.ERROR)
+            if args.target == 'serve':
+                from werkzeug.serving import make_server
+
+                logging.getLogger('werkzeug').setLevel(logging.ERROR)
+                server = make_server('127.0.0.1', 0, app, threaded=True)
+                threading.Thread(target=server.serve_forever, name='load-test-server', daemon=True).start()
+                target = f'http://127.0.0.1:{server.server_port}'
+                transport = HttpTransport(target)
+            else:
+                target = 'wsgi'
+                transport = WsgiTransport(app)
+
+        print(f'{args.users} virtual users for {args.duration:.0f}s against {target} '
+              f'({args.profile} dataset, mix {args.mix})', file=sys.stderr)
+        results = run(transport, meta, args.users, args.duration, args.ramp_up, args.think_ms, mix,
+                      args.seed, args.journeys)
+    finally:
+        if server is not None:
+            server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(results)
+    if args.output:
+        report = {
+            'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'dataset': meta,
+            'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                            'machine': platform.node(), 'target': 'url' if args.url else args.target},
+            'settings': {'users': args.users, 'duration': args.duration, 'ramp_up': args.ramp_up,
+                         'think_ms': args.think_ms, 'journeys': args.journeys, 'mix': mix},
+            **results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.max_error_rate is not None and results['error_rate'] > args.max_error_rate:
+        print(f"Error rate {results['error_rate']:.1%} is above {args.max_error_rate:.1%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Minimal SMTP sink for exercising the email outbox locally.
+
+    python benchmarks/smtp_stub.py [--port 8025] [--delay 0.5]
+
+Then run the app with MAIL_SERVER=localhost MAIL_PORT=8025 MAIL_USE_TLS=false.
+Accepts every message, prints one line per connection and message, and can
+add a fixed delay to the greeting to imitate a slow handshake or refuse
+given recipients with a 550. Importable as
+SMTPStub for scripts that need to count connections and messages.
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+
+class SMTPStub:
+    def __init__(self, host='127.0.0.1', port=0, handshake_delay=0.0, verbose=False, reject=()):
+        stub = self
+        self.handshake_delay = handshake_delay
+        self.reject = set(reject)
+        self.verbose = verbose
+        self.connections = 0
+        self.messages = []
+        self._lock = threading.Lock()
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(line.encode('ascii') + b'\r\n')
+
+            def handle(self):
+                with stub._lock:
+                    stub.connections += 1
+                if stub.verbose:
+                    print(f'connection from {self.client_address[0]}')
+                time.sleep(stub.handshake_delay)
+                self.reply('220 smtp-stub ready')
+                recipients = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode('utf-8', 'replace').strip()
+                    verb = command.split(' ', 1)[0].upper()
+                    if verb == 'EHLO':
+                        self.reply('250-smtp-stub')
+                        self.reply('250 8BITMIME')
+                    elif verb == 'RCPT':
+                        recipient = command.split(':', 1)[1].strip(' <>')
+                        if recipient in stub.reject:
+                            self.reply('550 No such user')
+                            continue
+                        recipients.append(recipient)
+                        self.reply('250 OK')
+                    elif verb == 'DATA':
+                        self.reply('354 End data with <CR><LF>.<CR><LF>')
+                        data = []
+                        while True:
+                            chunk = self.rfile.readline()
+                            if chunk in (b'.\r\n', b'.\n', b''):
+                                break
+                            data.append(chunk)
+                        with stub._lock:
+                            stub.messages.append((recipients, b''.join(data)))
+                        if stub.verbose:
+                            print(f'message to {", ".join(recipients)} ({sum(map(len, data))} bytes)')
+                        recipients = []
+                        self.reply('250 OK queued')
+                    elif verb == 'QUIT':
+                        self.reply('221 Bye')
+                        return
+                    else:
+                        # HELO, MAIL, RSET, NOOP
+                        self.reply('250 OK')
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self.server = Server((host, port), Handler)
+        self.port = self.server.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SMTP sink for local email testing')
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to wait before the greeting')
+    parser.add_argument('--reject', action='append', default=[], help='Refuse this recipient (repeatable)')
+    args = parser.parse_args()
+    stub = SMTPStub(port=args.port, handshake_delay=args.delay, verbose=True, reject=args.reject)
+    print(f'SMTP stub listening on 127.0.0.1:{stub.port}')
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == '__main__':
+    main()
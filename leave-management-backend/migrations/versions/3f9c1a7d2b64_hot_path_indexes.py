@@ -0,0 +1,40 @@
+"""Hot path indexes
+
+Revision ID: 3f9c1a7d2b64
+Revises: e87d0ba6ae6d
+Create Date: 2026-10-19 09:12:41.508133
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c1a7d2b64'
+down_revision = 'e87d0ba6ae6d'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns); kept in step with the models' index declarations.
+# flask check-query-plans verifies the queries that rely on them.
+INDEXES = [
+    ('ix_leave_applications_user_status_start', 'leave_applications', ['user_id', 'status', 'start_date']),
+    ('ix_leave_applications_status_start', 'leave_applications', ['status', 'start_date']),
+    ('ix_notifications_user_read_created', 'notifications', ['user_id', 'is_read', 'created_at']),
+    ('ix_leave_balances_user_year', 'leave_balances', ['user_id', 'year']),
+    ('ix_users_role', 'users', ['role']),
+    ('ix_users_department_id', 'users', ['department_id']),
+    ('ix_users_phone_number', 'users', ['phone_number']),
+    ('ix_password_reset_tokens_user_id', 'password_reset_tokens', ['user_id']),
+]
+
+
+def upgrade():
+    # if_not_exists: databases built with db.create_all() already have them
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
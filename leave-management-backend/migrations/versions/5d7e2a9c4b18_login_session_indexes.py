@@ -0,0 +1,35 @@
+"""Login session indexes
+
+Revision ID: 5d7e2a9c4b18
+Revises: 8b2e4d6f1a93
+Create Date: 2026-10-19 14:21:09.613842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d7e2a9c4b18'
+down_revision = '8b2e4d6f1a93'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns); kept in step with LoginSession's index declarations
+INDEXES = [
+    # Active sessions of one user
+    ('ix_login_sessions_user_active', 'login_sessions', ['user_id', 'is_active']),
+    # Purge of expired sessions
+    ('ix_login_sessions_expires_at', 'login_sessions', ['expires_at']),
+]
+
+
+def upgrade():
+    # if_not_exists: databases built with db.create_all() already have them
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,38 @@
+"""Schema state row
+
+Revision ID: 8b2e4d6f1a93
+Revises: 3f9c1a7d2b64
+Create Date: 2026-10-19 11:03:27.215904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d6f1a93'
+down_revision = '3f9c1a7d2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'schema_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('schema_version', sa.Integer(), nullable=False),
+        sa.Column('seed_version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    # Both versions stay 0 until `flask init-db` has checked the tables against
+    # the models and `flask seed-data` has run against this database
+    op.execute(
+        "INSERT INTO schema_state (id, schema_version, seed_version) "
+        "SELECT 1, 0, 0 WHERE NOT EXISTS (SELECT 1 FROM schema_state WHERE id = 1)"
+    )
+
+
+def downgrade():
+    op.drop_table('schema_state')
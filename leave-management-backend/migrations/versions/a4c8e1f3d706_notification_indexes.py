@@ -0,0 +1,35 @@
+"""Notification inbox and retention indexes
+
+Revision ID: a4c8e1f3d706
+Revises: 5d7e2a9c4b18
+Create Date: 2026-10-19 14:48:52.270315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c8e1f3d706'
+down_revision = '5d7e2a9c4b18'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns); kept in step with Notification's index declarations
+INDEXES = [
+    # Keyset-paginated inbox
+    ('ix_notifications_user_created_id', 'notifications', ['user_id', 'created_at', 'id']),
+    # Archival of read notifications
+    ('ix_notifications_read_created', 'notifications', ['is_read', 'created_at']),
+]
+
+
+def upgrade():
+    # if_not_exists: databases built with db.create_all() already have them
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
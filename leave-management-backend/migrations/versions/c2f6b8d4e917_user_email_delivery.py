@@ -0,0 +1,29 @@
+"""User email delivery preference
+
+Revision ID: c2f6b8d4e917
+Revises: a4c8e1f3d706
+Create Date: 2026-10-19 15:06:14.482097
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f6b8d4e917'
+down_revision = 'a4c8e1f3d706'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # server_default fills existing rows, so the column can be NOT NULL straight away
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column('email_delivery', sa.String(length=10), nullable=False, server_default='immediate')
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('email_delivery')
@@ -0,0 +1,26 @@
+"""User unlock time
+
+Revision ID: e5a9d3c7f214
+Revises: c2f6b8d4e917
+Create Date: 2026-10-19 17:42:08.316524
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a9d3c7f214'
+down_revision = 'c2f6b8d4e917'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unlocked_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('unlocked_at')
@@ -0,0 +1,33 @@
+"""Leave application submission date index
+
+Revision ID: f1b7c5a2d948
+Revises: e5a9d3c7f214
+Create Date: 2026-10-19 18:20:37.904166
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b7c5a2d948'
+down_revision = 'e5a9d3c7f214'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns); kept in step with LeaveApplication's index declarations
+INDEXES = [
+    # Applications submitted this month on the principal secretary dashboard
+    ('ix_leave_applications_created_at', 'leave_applications', ['created_at']),
+]
+
+
+def upgrade():
+    # if_not_exists: databases built with db.create_all() already have them
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -2,10 +2,31 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_mail import Mail
+from src.utils.rate_limiter import RateLimiter
+from src.utils.token_blocklist import TokenRevocationStore
+from src.utils.session_tracker import SessionActivityTracker
+from src.utils.employee_numbers import EmployeeNumberAllocator
+from src.utils.event_stream import EventBroker
+from src.utils.email_outbox import EmailOutboxWorker
+from src.utils.pdf_cache import PdfCache
+from src.utils.document_jobs import DocumentJobManager
+from src.utils.read_replica import RoutingSession
+from src.utils.query_stats import QueryInstrumentation
+from src.utils.metrics import Metrics
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 mail = Mail()
+limiter = RateLimiter()
+token_blocklist = TokenRevocationStore()
+session_tracker = SessionActivityTracker()
+employee_numbers = EmployeeNumberAllocator()
+event_broker = EventBroker()
+email_outbox = EmailOutboxWorker()
+pdf_cache = PdfCache()
+document_jobs = DocumentJobManager()
+query_stats = QueryInstrumentation()
+metrics = Metrics()
 
-__all__ = ['db', 'migrate', 'jwt', 'mail']
\ No newline at end of file
+__all__ = ['db', 'migrate', 'jwt', 'mail', 'limiter', 'token_blocklist', 'session_tracker', 'employee_numbers', 'event_broker', 'email_outbox', 'pdf_cache', 'document_jobs', 'query_stats', 'metrics']
\ No newline at end of file
@@ -4,9 +4,8 @@ from flask import Flask, send_from_directory
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
-from flask_mail import Mail
 from dotenv import load_dotenv
-from src.extensions import db, jwt, migrate
+from src.extensions import db, jwt, migrate, limiter, token_blocklist, session_tracker, employee_numbers, event_broker, mail, email_outbox, pdf_cache, document_jobs, query_stats, metrics
 from src.routes.auth import auth_bp
 from src.routes.leave import leave_bp
 from src.routes.user import user_bp
@@ -14,6 +13,12 @@ from src.routes.dashboard import dashboard_bp
 from src.routes.routes import notifications_bp, main_bp
 from src.routes.leave_balance import leave_balance_bp
 from src.routes.department import department_bp
+from src.routes.session import session_bp
+from src.routes.document import document_bp
+from src.routes.notification import notification_bp
+from src.utils.database import init_database
+from src.utils.bootstrap import check_schema, init_db_command, seed_data_command
+from src.utils.query_stats import parse_budgets
 
 load_dotenv()
 
@@ -23,9 +28,78 @@ def create_app():
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-string')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
+    app.config['TOKEN_BLOCKLIST_REFRESH_SECONDS'] = int(os.getenv('TOKEN_BLOCKLIST_REFRESH_SECONDS', 5))
+    app.config['TOKEN_BLOCKLIST_PRUNE_SECONDS'] = int(os.getenv('TOKEN_BLOCKLIST_PRUNE_SECONDS', 3600))
+    app.config['SESSION_ACTIVITY_FLUSH_SECONDS'] = int(os.getenv('SESSION_ACTIVITY_FLUSH_SECONDS', 30))
+    app.config['SESSION_PURGE_SECONDS'] = int(os.getenv('SESSION_PURGE_SECONDS', 3600))
+    app.config['PROVISIONING_CHUNK_SIZE'] = int(os.getenv('PROVISIONING_CHUNK_SIZE', 500))
+    app.config['PROVISIONING_HASH_WORKERS'] = int(os.getenv('PROVISIONING_HASH_WORKERS', os.cpu_count() or 1))
+    # Seconds to cache serialized profiles per worker; 0 disables the cache
+    app.config['USER_PROFILE_CACHE_TTL'] = int(os.getenv('USER_PROFILE_CACHE_TTL', 0))
+    
+    # Notification retention (flask archive-notifications)
+    app.config['NOTIFICATION_RETENTION_DAYS'] = int(os.getenv('NOTIFICATION_RETENTION_DAYS', 90))
+    app.config['NOTIFICATION_ARCHIVE_BATCH_SIZE'] = int(os.getenv('NOTIFICATION_ARCHIVE_BATCH_SIZE', 1000))
+    
+    # Rendered PDF cache; PDF_CACHE_DIR adds a shared on-disk tier
+    app.config['PDF_CACHE_MAX_BYTES'] = int(os.getenv('PDF_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    app.config['PDF_CACHE_DIR'] = os.getenv('PDF_CACHE_DIR')
+    app.config['PDF_CACHE_DISK_MAX_BYTES'] = int(os.getenv('PDF_CACHE_DISK_MAX_BYTES', 512 * 1024 * 1024))
+    
+    # Background document rendering (/api/documents/jobs)
+    app.config['DOCUMENT_JOB_WORKERS'] = int(os.getenv('DOCUMENT_JOB_WORKERS', 2))
+    app.config['DOCUMENT_JOB_MAX_PENDING'] = int(os.getenv('DOCUMENT_JOB_MAX_PENDING', 32))
+    app.config['DOCUMENT_JOB_TIMEOUT_SECONDS'] = int(os.getenv('DOCUMENT_JOB_TIMEOUT_SECONDS', 300))
+    app.config['DOCUMENT_JOB_RESULT_TTL_SECONDS'] = int(os.getenv('DOCUMENT_JOB_RESULT_TTL_SECONDS', 900))
+    app.config['DOCUMENT_JOB_EXPORT_THREADS'] = int(os.getenv('DOCUMENT_JOB_EXPORT_THREADS', 1))
+    
+    # Server-Sent Events; use a redis:// URL when running more than one worker
+    app.config['EVENT_STREAM_URL'] = os.getenv('EVENT_STREAM_URL', 'memory://')
+    app.config['EVENT_STREAM_HEARTBEAT_SECONDS'] = int(os.getenv('EVENT_STREAM_HEARTBEAT_SECONDS', 15))
+    app.config['EVENT_STREAM_BUFFER_SIZE'] = int(os.getenv('EVENT_STREAM_BUFFER_SIZE', 100))
+    # Users whose recent events each worker keeps for Last-Event-ID replay
+    app.config['EVENT_STREAM_BUFFER_USERS'] = int(os.getenv('EVENT_STREAM_BUFFER_USERS', 10000))
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///app.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Optional read replica for @read_replica endpoints, e.g. postgresql://...@replica/leave
+    # or, locally, a read-only view of the same file: sqlite:///file:/path/app.db?mode=ro&uri=true
+    if os.getenv('DATABASE_REPLICA_URL'):
+        app.config['SQLALCHEMY_BINDS'] = {'replica': os.getenv('DATABASE_REPLICA_URL')}
+    
+    # Connection pool (server databases; SQLite files use the size settings only)
+    app.config['DATABASE_POOL_SIZE'] = int(os.getenv('DATABASE_POOL_SIZE', 10))
+    app.config['DATABASE_MAX_OVERFLOW'] = int(os.getenv('DATABASE_MAX_OVERFLOW', 20))
+    app.config['DATABASE_POOL_TIMEOUT'] = int(os.getenv('DATABASE_POOL_TIMEOUT', 30))
+    app.config['DATABASE_POOL_PRE_PING'] = os.getenv('DATABASE_POOL_PRE_PING', 'true').lower() in ['true', 'on', '1']
+    app.config['DATABASE_POOL_RECYCLE'] = int(os.getenv('DATABASE_POOL_RECYCLE', 1800))
+    # SQLite PRAGMAs applied to every connection
+    app.config['SQLITE_JOURNAL_MODE'] = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    # Negative values are KiB: -65536 is a 64 MiB page cache per connection
+    app.config['SQLITE_CACHE_SIZE'] = int(os.getenv('SQLITE_CACHE_SIZE', -65536))
     app.config['DEVELOPMENT'] = os.environ.get('FLASK_ENV') == 'development'
+    # Create/seed an out-of-date database at boot instead of requiring `flask init-db`; development only
+    app.config['DATABASE_AUTO_INIT'] = os.getenv('DATABASE_AUTO_INIT', str(app.config['DEVELOPMENT'])).lower() in ['true', 'on', '1']
+    
+    # Per-request SQL statistics: Server-Timing header, JSON log line, N+1 warnings
+    app.config['SQL_INSTRUMENTATION'] = os.getenv('SQL_INSTRUMENTATION', 'true').lower() in ['true', 'on', '1']
+    app.config['SQL_SERVER_TIMING'] = os.getenv('SQL_SERVER_TIMING', 'true').lower() in ['true', 'on', '1']
+    app.config['SQL_NPLUSONE_THRESHOLD'] = int(os.getenv('SQL_NPLUSONE_THRESHOLD', 5))
+    # Queries per request before a warning (0 = no budget); SQL_QUERY_BUDGETS overrides per
+    # endpoint, e.g. "department.get_department_stats=5,dashboard.get_calendar_data=10"
+    app.config['SQL_QUERY_BUDGET'] = int(os.getenv('SQL_QUERY_BUDGET', 0))
+    app.config['SQL_QUERY_BUDGETS'] = parse_budgets(os.getenv('SQL_QUERY_BUDGETS'))
+    # Fail the request instead of warning when over budget; development only
+    app.config['SQL_QUERY_BUDGET_RAISE'] = os.getenv('SQL_QUERY_BUDGET_RAISE', str(app.config['DEVELOPMENT'])).lower() in ['true', 'on', '1']
+    
+    # Prometheus metrics at /metrics; with several workers, METRICS_DIR must be a directory they share
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'true').lower() in ['true', 'on', '1']
+    app.config['METRICS_DIR'] = os.getenv('METRICS_DIR')
+    app.config['METRICS_FLUSH_SECONDS'] = int(os.getenv('METRICS_FLUSH_SECONDS', 10))
+    # Bearer token required to scrape /metrics; unset leaves it open (restrict it at the proxy)
+    app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
 
     # Email configuration
     app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
@@ -34,14 +108,41 @@ def create_app():
     app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
     app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
     app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER')
+    
+    # Email outbox worker (flask outbox drain|stats|retry-dead)
+    app.config['EMAIL_OUTBOX_WORKER'] = os.getenv('EMAIL_OUTBOX_WORKER', 'true').lower() in ['true', 'on', '1']
+    app.config['EMAIL_OUTBOX_BATCH_SIZE'] = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50))
+    app.config['EMAIL_OUTBOX_POLL_SECONDS'] = int(os.getenv('EMAIL_OUTBOX_POLL_SECONDS', 30))
+    app.config['EMAIL_OUTBOX_MAX_ATTEMPTS'] = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 6))
+    app.config['EMAIL_OUTBOX_BACKOFF_SECONDS'] = int(os.getenv('EMAIL_OUTBOX_BACKOFF_SECONDS', 30))
+    # Hour (UTC) at which daily digests go out; 05:00 UTC is 08:00 EAT
+    app.config['EMAIL_DIGEST_DAILY_HOUR'] = int(os.getenv('EMAIL_DIGEST_DAILY_HOUR', 5))
+
+    # Rate limiting: (max hits, window seconds); set RATELIMIT_STORAGE_URL=redis://... to share across workers
+    app.config['RATELIMIT_ENABLED'] = os.getenv('RATELIMIT_ENABLED', 'true').lower() in ['true', 'on', '1']
+    app.config['RATELIMIT_STORAGE_URL'] = os.getenv('RATELIMIT_STORAGE_URL', 'memory://')
+    app.config['RATELIMIT_LOGIN_PER_IP'] = (int(os.getenv('RATELIMIT_LOGIN_PER_IP', 20)), 60)
+    app.config['RATELIMIT_FORGOT_PASSWORD'] = (int(os.getenv('RATELIMIT_FORGOT_PASSWORD', 5)), 900)
+    app.config['MAX_FAILED_LOGIN_ATTEMPTS'] = 3
+    app.config['FAILED_LOGIN_WINDOW'] = int(os.getenv('FAILED_LOGIN_WINDOW', 900))
 
     CORS(app, origins=["http://localhost:3000"], supports_credentials=True)
 
     # Initialize extensions
-    db.init_app(app)
+    init_database(app)
     migrate.init_app(app, db)
-    JWTManager(app)
-    mail = Mail(app)
+    limiter.init_app(app)
+    jwt.init_app(app)
+    token_blocklist.init_app(app)
+    session_tracker.init_app(app)
+    employee_numbers.init_app(app)
+    event_broker.init_app(app)
+    mail.init_app(app)
+    email_outbox.init_app(app)
+    pdf_cache.init_app(app)
+    document_jobs.init_app(app)
+    query_stats.init_app(app)
+    metrics.init_app(app)
 
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
@@ -50,8 +151,28 @@ def create_app():
     app.register_blueprint(dashboard_bp, url_prefix="/api/dashboard")
     app.register_blueprint(department_bp, url_prefix='/api/department')
     app.register_blueprint(notifications_bp, url_prefix="/api/notifications")
+    app.register_blueprint(notification_bp, url_prefix="/api/notifications")
     app.register_blueprint(main_bp)
     app.register_blueprint(leave_balance_bp, url_prefix="/api/leave_balances")
+    app.register_blueprint(session_bp, url_prefix="/api/sessions")
+    app.register_blueprint(document_bp, url_prefix="/api/documents")
+    
+    # CLI commands
+    from src.utils.provisioning import provision_users_command
+    from src.utils.notification_maintenance import (
+        reconcile_notification_counters_command, archive_notifications_command
+    )
+    app.cli.add_command(provision_users_command)
+    app.cli.add_command(reconcile_notification_counters_command)
+    app.cli.add_command(archive_notifications_command)
+    from src.utils.email_outbox import outbox_cli
+    app.cli.add_command(outbox_cli)
+    from src.utils.query_plans import check_query_plans_command
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(seed_data_command)
+    from src.utils.synthetic_data import seed_synthetic_command
+    app.cli.add_command(seed_synthetic_command)
     
     # Error handlers
     @app.errorhandler(404)
@@ -74,90 +195,32 @@ def create_app():
     def missing_token_callback(error):
         return {'error': 'Authentication required'}, 401
     
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return token_blocklist.is_revoked(jwt_payload['jti'])
+    
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return {'error': 'Token has been revoked'}, 401
+    
+    @jwt.token_verification_loader
+    def track_session_activity(jwt_header, jwt_payload):
+        session_tracker.touch(jwt_payload['jti'])
+        return True
+    
     # Health check endpoint
     @app.route('/api/health')
     def health_check():
         return {'status': 'healthy', 'message': 'Leave Management System is running'}, 200
     
-    # Initialize database and seed data
-    with app.app_context():
-        # Import models here to avoid circular imports
-        from src.models import User, Department, LeaveType
-        
-        # Configure mappers first
-        db.configure_mappers()
-        
-        # Create tables
-        db.create_all()
-        
-        # Seed initial data
-        seed_initial_data()
+    # Schema and seed data are created by `flask init-db` / `flask seed-data`;
+    # booting a worker only reads the one-row schema_state record
+    check_schema(app)
     
     return app
 
-def seed_initial_data():
-    """Seed initial data for the application"""
-    try:
-        # Import models here to avoid circular imports
-        from src.models.leave_type import LeaveType
-        from src.models.user import User
-        
-        # Seed leave types
-        leave_types_data = [
-            {'name': 'Annual Leave', 'description': 'Annual vacation leave', 'max_days': 30, 'exclude_weekends': True},
-            {'name': 'Maternity Leave', 'description': 'Leave for childbirth', 'max_days': 90, 'exclude_weekends': True},
-            {'name': 'Paternity Leave', 'description': 'Leave for new fathers', 'max_days': 14, 'exclude_weekends': True},
-            {'name': 'Sick Leave', 'description': 'Leave for medical reasons', 'max_days': 14, 'exclude_weekends': True},
-            {'name': 'Bereavement Leave', 'description': 'Leave for bereavement', 'max_days': 4, 'exclude_weekends': True},
-            {'name': 'Study Leave (Short Term)', 'description': 'Short-term study leave', 'max_days': 10, 'exclude_weekends': True},
-            {'name': 'Study Leave (Long Term)', 'description': 'Long-term study leave', 'max_days': 502, 'exclude_weekends': True},
-        ]
-        
-        for leave_type_data in leave_types_data:
-            existing = LeaveType.query.filter_by(name=leave_type_data['name']).first()
-            if not existing:
-                leave_type = LeaveType(**leave_type_data)
-                db.session.add(leave_type)
-        
-        # Create superuser if doesn't exist
-        existing_admin = User.query.filter_by(email='admin@ict.go.ke').first()
-        superuser_created = False
-        
-        if not existing_admin:
-            superuser = User(
-                employee_number='000001',
-                email='admin@ict.go.ke',
-                phone_number='+254706356836',
-                first_name='System',
-                last_name='Administrator',
-                role='principal_secretary', # Super Admin role number
-                is_active=True
-            )
-            superuser.set_password('admin123')  # Change this in production
-            db.session.add(superuser)
-            superuser_created = True
-        
-        # Commit all changes
-        db.session.commit()
-        
-        # Initialize leave balances for superuser if created
-        if superuser_created:
-            superuser.init_leave_balances()
-            db.session.commit()
-            print("Superuser created successfully")
-            print("Email: admin@ict.go.ke")
-            print("Employee Number: 000001")
-            print("Password: admin123")
-            print("Please change the password after first login!")
-        
-        print("Initial data seeded successfully")
-        
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error seeding initial data: {e}")
-        import traceback
-        traceback.print_exc()
-
 if __name__ == '__main__':
+    # Local development server: create and seed the database on first run
+    os.environ.setdefault('DATABASE_AUTO_INIT', 'true')
     app = create_app()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -8,7 +8,14 @@ from .leave_balance import LeaveBalance
 from .leave_application import LeaveApplication
 from .login_session import LoginSession
 from .password_reset_token import PasswordResetToken
+from .notification_counter import NotificationCounter
 from .notification import Notification
+from .notification_archive import NotificationArchive
+from .token_blocklist import TokenBlocklist
+from .employee_number_sequence import EmployeeNumberSequence
+from .email_outbox import EmailOutbox
+from .email_digest_item import EmailDigestItem
+from .schema_state import SchemaState
 
 __all__ = [
     'User',
@@ -18,7 +25,14 @@ __all__ = [
     'LeaveApplication',
     'LoginSession',
     'PasswordResetToken',
-    'Notification'
+    'Notification',
+    'NotificationCounter',
+    'NotificationArchive',
+    'TokenBlocklist',
+    'EmployeeNumberSequence',
+    'EmailOutbox',
+    'EmailDigestItem',
+    'SchemaState'
 ]
 
 db = SQLAlchemy()
@@ -0,0 +1,18 @@
+from datetime import datetime, timezone
+from src.extensions import db
+
+class EmailDigestItem(db.Model):
+    """An email held back for a user who receives hourly or daily digests"""
+    __tablename__ = 'email_digest_items'
+    __table_args__ = (
+        db.Index('ix_email_digest_items_user_created', 'user_id', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+    def __repr__(self):
+        return f'<EmailDigestItem {self.id} - User {self.user_id}>'
@@ -0,0 +1,59 @@
+import json
+from datetime import datetime, timezone
+from src.extensions import db
+
+class EmailOutbox(db.Model):
+    """Outgoing email written with the business change and sent by the outbox worker"""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        # The worker's poll: WHERE status = 'pending' AND next_attempt_at <= now
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_DEAD = 'dead'
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipients = db.Column(db.Text, nullable=False)  # JSON list of addresses
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    html = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    claim_token = db.Column(db.String(32), nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    next_attempt_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    @classmethod
+    def enqueue(cls, subject, recipients, body, html=None):
+        """Add a message to the current transaction; it is sent after the caller commits"""
+        entry = cls(
+            subject=subject,
+            recipients=json.dumps(list(recipients)),
+            body=body,
+            html=html
+        )
+        db.session.add(entry)
+        db.session.info['email_outbox_pending'] = True
+        return entry
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'recipients': json.loads(self.recipients),
+            'subject': self.subject,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} - {self.status}>'
@@ -0,0 +1,19 @@
+from datetime import datetime, timezone
+from src.extensions import db
+
+class EmployeeNumberSequence(db.Model):
+    __tablename__ = 'employee_number_sequences'
+
+    role = db.Column(db.String(20), primary_key=True)
+    next_value = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    def to_dict(self):
+        return {
+            'role': self.role,
+            'next_value': self.next_value,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<EmployeeNumberSequence {self.role} - {self.next_value}>'
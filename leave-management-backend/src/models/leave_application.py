@@ -1,9 +1,19 @@
 # src/models/leave_application.py
 from datetime import datetime, timezone
-from src.extensions import db
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+from src.extensions import db, event_broker
 
 class LeaveApplication(db.Model):
     __tablename__ = 'leave_applications'
+    __table_args__ = (
+        # A user's applications by status and date (my applications, current/upcoming leave)
+        db.Index('ix_leave_applications_user_status_start', 'user_id', 'status', 'start_date'),
+        # Approval queues, reports and who-is-on-leave, by status and date
+        db.Index('ix_leave_applications_status_start', 'status', 'start_date'),
+        # Applications submitted this month (principal secretary dashboard)
+        db.Index('ix_leave_applications_created_at', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -12,7 +22,8 @@ class LeaveApplication(db.Model):
     end_date = db.Column(db.Date, nullable=False)
     days_requested = db.Column(db.Float, nullable=False)
     reason = db.Column(db.Text, nullable=False)
-    status = db.Column(db.String(20), default='pending', nullable=False)
+    # active_history keeps the prior status for the leave_status event
+    status = db.column_property(db.Column(db.String(20), default='pending', nullable=False), active_history=True)
     comments = db.Column(db.Text, nullable=True)
     approved_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     approved_at = db.Column(db.DateTime, nullable=True)
@@ -60,4 +71,24 @@ class LeaveApplication(db.Model):
         }
     
     def __repr__(self):
-        return f'<LeaveApplication {self.id}: {self.user_id} - {self.status}>'
\ No newline at end of file
+        return f'<LeaveApplication {self.id}: {self.user_id} - {self.status}>'
+
+
+# Push status changes to the applicant once the session commits
+def _queue_status_event(target, previous_status):
+    event_broker.queue(object_session(target), 'leave_status', [(target.user_id, {
+        'application_id': target.id,
+        'status': target.status,
+        'previous_status': previous_status,
+        'comments': target.comments
+    })])
+
+@event.listens_for(LeaveApplication, 'after_insert')
+def _leave_application_created(mapper, connection, target):
+    _queue_status_event(target, None)
+
+@event.listens_for(LeaveApplication, 'after_update')
+def _leave_status_changed(mapper, connection, target):
+    history = inspect(target).attrs.status.history
+    if history.has_changes():
+        _queue_status_event(target, history.deleted[0] if history.deleted else None)
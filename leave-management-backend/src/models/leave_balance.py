@@ -23,8 +23,15 @@ class LeaveBalance(db.Model):
     # Unique constraint
     __table_args__ = (
         db.UniqueConstraint('user_id', 'leave_type_id', 'year', name='_user_leave_type_year_uc'),
+        # A user's balances for one year, across leave types
+        db.Index('ix_leave_balances_user_year', 'user_id', 'year'),
     )
     
+    @classmethod
+    def get_user_all_balances(cls, user_id, year):
+        """A user's balances for one year, with their leave types loaded"""
+        return cls.query.options(db.joinedload(cls.leave_type)).filter_by(user_id=user_id, year=year).all()
+
     @property
     def available(self):
         """Calculate available leave balance"""
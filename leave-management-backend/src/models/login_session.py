@@ -3,7 +3,10 @@ from src.extensions import db
 
 class LoginSession(db.Model):
     __tablename__ = 'login_sessions'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_login_sessions_user_active', 'user_id', 'is_active'),
+        {'extend_existing': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -12,7 +15,7 @@ class LoginSession(db.Model):
     user_agent = db.Column(db.Text, nullable=True)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
-    expires_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
     last_activity = db.Column(db.DateTime, default=datetime.now(timezone.utc))
 
     # Relationships
@@ -1,17 +1,29 @@
 # src/models/notification.py
 from datetime import datetime, timezone
-from src.extensions import db
+from sqlalchemy import and_, event, insert, inspect, literal, or_, select, update
+from sqlalchemy.orm import object_session
+from src.extensions import db, event_broker
+from src.models.notification_counter import NotificationCounter
 
 class Notification(db.Model):
     __tablename__ = 'notifications'
+    __table_args__ = (
+        # Keyset-paginated inbox: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+        db.Index('ix_notifications_user_created_id', 'user_id', 'created_at', 'id'),
+        # Retention scan: WHERE is_read AND created_at < cutoff
+        db.Index('ix_notifications_read_created', 'is_read', 'created_at'),
+        # Mark-read and unread scans: WHERE user_id = ? AND NOT is_read [AND created_at <= ?]
+        db.Index('ix_notifications_user_read_created', 'user_id', 'is_read', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     message = db.Column(db.Text, nullable=False)
     notification_type = db.Column(db.String(50), nullable=False)
-    is_read = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+    # active_history loads the prior value on assignment so the counter sees real transitions
+    is_read = db.column_property(db.Column(db.Boolean, default=False), active_history=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     
     leave_application_id = db.Column(db.Integer, db.ForeignKey('leave_applications.id'), nullable=True)
     
@@ -93,16 +105,121 @@ class Notification(db.Model):
         return notification
     
     @classmethod
-    def get_user_notifications(cls, user_id, limit=50):
-        """Get notifications for a user"""
-        return cls.query.filter_by(user_id=user_id).order_by(
-            cls.created_at.desc()
-        ).limit(limit).all()
+    def fan_out(cls, title, message, notification_type, user_ids=None, department_id=None, role=None,
+                leave_application_id=None):
+        """Create one notification per selected user with a single INSERT ... SELECT; returns rows inserted"""
+        from src.models.user import User
+        
+        recipient_ids = select(User.id)
+        if user_ids is not None:
+            recipient_ids = recipient_ids.where(User.id.in_(user_ids))
+        if department_id is not None:
+            recipient_ids = recipient_ids.where(User.department_id == department_id)
+        if role is not None:
+            recipient_ids = recipient_ids.where(User.role == role)
+        
+        created_at = datetime.now(timezone.utc)
+        recipients = recipient_ids.add_columns(
+            literal(title),
+            literal(message),
+            literal(notification_type),
+            literal(False),
+            literal(created_at),
+            literal(leave_application_id, db.Integer)
+        )
+        created = db.session.execute(
+            insert(cls).from_select(
+                ['user_id', 'title', 'message', 'notification_type', 'is_read', 'created_at', 'leave_application_id'],
+                recipients
+            ).returning(cls.id, cls.user_id)
+        ).all()
+        if created:
+            NotificationCounter.adjust(db.session.connection(), recipient_ids, 1)
+            event_broker.queue(db.session, 'notification', [
+                (user_id, {
+                    'id': notification_id,
+                    'user_id': user_id,
+                    'title': title,
+                    'message': message,
+                    'notification_type': notification_type,
+                    'is_read': False,
+                    'created_at': created_at.isoformat(),
+                    'leave_application_id': leave_application_id
+                })
+                for notification_id, user_id in created
+            ])
+            event_broker.queue(db.session, 'unread_count', [(user_id, {'delta': 1}) for _, user_id in created])
+        return len(created)
+    
+    @classmethod
+    def mark_read(cls, user_id, ids=None, before=None):
+        """Mark a user's unread notifications read in one UPDATE, by id list and/or created_at cutoff"""
+        stmt = update(cls).where(cls.user_id == user_id, cls.is_read.is_(False))
+        if ids is not None:
+            stmt = stmt.where(cls.id.in_(ids))
+        if before is not None:
+            stmt = stmt.where(cls.created_at <= before)
+        result = db.session.execute(
+            stmt.values(is_read=True).execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            NotificationCounter.adjust(db.session.connection(), [user_id], -result.rowcount)
+            event_broker.queue(db.session, 'unread_count', [(user_id, {'delta': -result.rowcount})])
+        return result.rowcount
+    
+    @classmethod
+    def get_user_notifications(cls, user_id, limit=50, after=None):
+        """
+        Get a page of a user's notifications, newest first.
+
+        after is the (created_at, id) of the last row of the previous page; the
+        page is read from ix_notifications_user_created_id without an OFFSET scan.
+        """
+        query = cls.query.filter_by(user_id=user_id)
+        if after is not None:
+            created_at, notification_id = after
+            query = query.filter(or_(
+                cls.created_at < created_at,
+                and_(cls.created_at == created_at, cls.id < notification_id)
+            ))
+        return query.order_by(cls.created_at.desc(), cls.id.desc()).limit(limit).all()
     
     @classmethod
     def get_unread_count(cls, user_id):
-        """Get count of unread notifications for a user"""
-        return cls.query.filter_by(user_id=user_id, is_read=False).count()
+        """Get count of unread notifications for a user from the denormalized counter"""
+        return NotificationCounter.get_unread_count(user_id)
     
     def __repr__(self):
-        return f'<Notification {self.id} - {self.title} - {"Read" if self.is_read else "Unread"}>'
\ No newline at end of file
+        return f'<Notification {self.id} - {self.title} - {"Read" if self.is_read else "Unread"}>'
+
+
+# Keep notification_counters in step with notifications written through the ORM
+# and push the change to subscribed clients once the session commits.
+# Set-based writes (fan_out, mark_read) do both themselves; anything else that
+# bypasses the ORM is corrected by `flask reconcile-notification-counters`.
+def _queue_unread_delta(target, delta):
+    event_broker.queue(object_session(target), 'unread_count', [(target.user_id, {'delta': delta})])
+
+@event.listens_for(Notification, 'after_insert')
+def _count_inserted(mapper, connection, target):
+    event_broker.queue(object_session(target), 'notification', [(target.user_id, target.to_dict())])
+    if not target.is_read:
+        NotificationCounter.adjust(connection, [target.user_id], 1)
+        _queue_unread_delta(target, 1)
+
+@event.listens_for(Notification, 'after_update')
+def _count_read_state_change(mapper, connection, target):
+    history = inspect(target).attrs.is_read.history
+    if not history.has_changes():
+        return
+    was_read = bool(history.deleted[0]) if history.deleted else False
+    if was_read != bool(target.is_read):
+        delta = -1 if target.is_read else 1
+        NotificationCounter.adjust(connection, [target.user_id], delta)
+        _queue_unread_delta(target, delta)
+
+@event.listens_for(Notification, 'after_delete')
+def _count_deleted(mapper, connection, target):
+    if not target.is_read:
+        NotificationCounter.adjust(connection, [target.user_id], -1)
+        _queue_unread_delta(target, -1)
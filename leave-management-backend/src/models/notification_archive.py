@@ -0,0 +1,39 @@
+import json
+import zlib
+from datetime import datetime, timezone
+from src.extensions import db
+
+class NotificationArchive(db.Model):
+    """Read notifications moved out of the hot table by the retention job"""
+    __tablename__ = 'notification_archive'
+    __table_args__ = (
+        db.Index('ix_notification_archive_user_created', 'user_id', 'created_at'),
+    )
+
+    # Keeps the id the notification had in the notifications table
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    # zlib-compressed JSON of the remaining notification columns
+    payload = db.Column(db.LargeBinary, nullable=False)
+
+    PAYLOAD_FIELDS = ('title', 'message', 'notification_type', 'is_read', 'leave_application_id')
+
+    @classmethod
+    def pack(cls, row):
+        """Compress the payload columns of a notification row mapping"""
+        return zlib.compress(json.dumps({field: row[field] for field in cls.PAYLOAD_FIELDS}).encode('utf-8'))
+
+    def to_dict(self):
+        data = json.loads(zlib.decompress(self.payload))
+        data.update({
+            'id': self.id,
+            'user_id': self.user_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        })
+        return data
+
+    def __repr__(self):
+        return f'<NotificationArchive {self.id} - User {self.user_id}>'
@@ -0,0 +1,122 @@
+from datetime import datetime, timezone
+from sqlalchemy import func, insert, literal, select, true, update
+from src.extensions import db
+
+class NotificationCounter(db.Model):
+    """Denormalized unread-notification count per user, kept in step with notifications"""
+    __tablename__ = 'notification_counters'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    @staticmethod
+    def _dialect_insert(dialect_name):
+        """INSERT construct with ON CONFLICT support, where the dialect has one"""
+        if dialect_name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect_name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            return None
+        return dialect_insert
+
+    @classmethod
+    def adjust(cls, connection, user_ids, delta):
+        """
+        Add delta to the counters of user_ids (a list, or a SELECT of user ids).
+
+        Runs on the caller's connection so the counter commits or rolls back
+        together with the notification change it accounts for. Counters are
+        created on first increment.
+        """
+        table = cls.__table__
+        now = datetime.now(timezone.utc)
+        if isinstance(user_ids, (list, tuple, set)):
+            user_ids = list(user_ids)
+            if not user_ids:
+                return
+            source = None
+        else:
+            source = user_ids.subquery()
+            user_ids = select(source.c[0])
+
+        if delta < 0:
+            connection.execute(
+                update(table)
+                .where(table.c.user_id.in_(user_ids))
+                .values(unread_count=table.c.unread_count + delta, updated_at=now)
+            )
+            return
+
+        if source is None:
+            rows = [{'user_id': user_id, 'unread_count': delta, 'updated_at': now} for user_id in user_ids]
+        else:
+            # SQLite needs a WHERE on INSERT ... SELECT ... ON CONFLICT to parse it
+            rows = select(source.c[0], literal(delta), literal(now)).where(true())
+
+        dialect_insert = cls._dialect_insert(connection.dialect.name)
+        if dialect_insert is not None:
+            stmt = dialect_insert(table)
+            stmt = stmt.values(rows) if source is None else stmt.from_select(['user_id', 'unread_count', 'updated_at'], rows)
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.user_id],
+                set_={'unread_count': table.c.unread_count + delta, 'updated_at': now}
+            ))
+            return
+
+        # Fallback: bump existing counters, then create the missing ones
+        connection.execute(
+            update(table)
+            .where(table.c.user_id.in_(user_ids))
+            .values(unread_count=table.c.unread_count + delta, updated_at=now)
+        )
+        existing = select(table.c.user_id)
+        if source is None:
+            known = set(connection.execute(existing.where(table.c.user_id.in_(user_ids))).scalars())
+            missing = [row for row in rows if row['user_id'] not in known]
+            if missing:
+                connection.execute(insert(table), missing)
+        else:
+            connection.execute(insert(table).from_select(
+                ['user_id', 'unread_count', 'updated_at'],
+                rows.where(source.c[0].not_in(existing))
+            ))
+
+    @classmethod
+    def get_unread_count(cls, user_id):
+        """Primary-key read of a user's unread count"""
+        return db.session.execute(
+            select(cls.unread_count).where(cls.user_id == user_id)
+        ).scalar() or 0
+
+    @classmethod
+    def reconcile(cls):
+        """Recompute counters from the notifications table; returns the number corrected"""
+        from src.models.notification import Notification
+
+        actual = dict(db.session.execute(
+            select(Notification.user_id, func.count())
+            .where(Notification.is_read.is_(False))
+            .group_by(Notification.user_id)
+        ).all())
+        stored = dict(db.session.execute(select(cls.user_id, cls.unread_count)).all())
+
+        now = datetime.now(timezone.utc)
+        updates = [
+            {'user_id': user_id, 'unread_count': actual.get(user_id, 0), 'updated_at': now}
+            for user_id, count in stored.items() if actual.get(user_id, 0) != count
+        ]
+        inserts = [
+            {'user_id': user_id, 'unread_count': count, 'updated_at': now}
+            for user_id, count in actual.items() if user_id not in stored
+        ]
+        if updates:
+            db.session.execute(update(cls), updates)
+        if inserts:
+            db.session.execute(insert(cls), inserts)
+        db.session.commit()
+        return len(updates) + len(inserts)
+
+    def __repr__(self):
+        return f'<NotificationCounter User {self.user_id} - {self.unread_count}>'
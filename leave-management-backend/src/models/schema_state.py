@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+from src.extensions import db
+
+# Bump SCHEMA_VERSION with every model change (and add a migration for it);
+# `flask init-db` records it only once the database matches the models.
+# Bump SEED_VERSION whenever seed_initial_data() gains new rows.
+SCHEMA_VERSION = 4
+SEED_VERSION = 1
+
+class SchemaState(db.Model):
+    """The one row recording which schema and seed versions this database has"""
+    __tablename__ = 'schema_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    schema_version = db.Column(db.Integer, nullable=False, default=0)
+    seed_version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    ROW_ID = 1
+
+    def to_dict(self):
+        return {
+            'schema_version': self.schema_version,
+            'seed_version': self.seed_version,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<SchemaState schema {self.schema_version} seed {self.seed_version}>'
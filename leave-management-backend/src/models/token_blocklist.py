@@ -0,0 +1,25 @@
+from datetime import datetime, timezone
+from src.extensions import db
+
+class TokenBlocklist(db.Model):
+    __tablename__ = 'token_blocklist'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    token_type = db.Column(db.String(10), nullable=False, default='access')
+    revoked_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'jti': self.jti,
+            'user_id': self.user_id,
+            'token_type': self.token_type,
+            'revoked_at': self.revoked_at.isoformat() if self.revoked_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
+
+    def __repr__(self):
+        return f'<TokenBlocklist {self.jti} - User {self.user_id}>'
@@ -3,6 +3,21 @@ import bcrypt
 from itsdangerous import URLSafeTimedSerializer
 from flask import current_app
 from src.extensions import db
+from src.utils.metrics import track_bcrypt
+
+# Default leave allocations (days per year) for new users
+DEFAULT_LEAVE_ALLOCATIONS = {
+    'Annual Leave': 30,
+    'Sick Leave': 14,
+    'Maternity Leave': 90,
+    'Paternity Leave': 14,
+    'Bereavement Leave': 4,
+    'Study Leave (Short Term)': 10,
+    'Study Leave (Long Term)': 502
+}
+
+# How a user receives notification emails: as they happen, or batched into a digest
+EMAIL_DELIVERY_MODES = ['immediate', 'hourly', 'daily']
 
 class User(db.Model):
        __tablename__ = 'users'
@@ -10,18 +25,22 @@ class User(db.Model):
        id = db.Column(db.Integer, primary_key=True)
        employee_number = db.Column(db.String(6), unique=True, nullable=False)
        email = db.Column(db.String(255), unique=True, nullable=False)
-       phone_number = db.Column(db.String(20), nullable=False)
+       phone_number = db.Column(db.String(20), nullable=False, index=True)
        password_hash = db.Column(db.String(255), nullable=False)
        first_name = db.Column(db.String(100), nullable=False)
        last_name = db.Column(db.String(100), nullable=False)
-       role = db.Column(db.String(20), nullable=False)
+       role = db.Column(db.String(20), nullable=False, index=True)
        failed_login_attempts = db.Column(db.Integer, default=0)
        is_locked = db.Column(db.Boolean, default=False)
+       # Last time an admin or password reset cleared is_locked
+       unlocked_at = db.Column(db.DateTime, nullable=True)
        created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
        updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
        is_active = db.Column(db.Boolean, default=False)
        email_verification_token = db.Column(db.String(100), nullable=True)
-       department_id = db.Column(db.Integer, db.ForeignKey('departments.id'), nullable=True)
+       department_id = db.Column(db.Integer, db.ForeignKey('departments.id'), nullable=True, index=True)
+       # One of EMAIL_DELIVERY_MODES
+       email_delivery = db.Column(db.String(10), nullable=False, default='immediate', server_default='immediate')
 
        # Department relationship
        # Relationships with explicit foreign_keys
@@ -40,10 +59,12 @@ class User(db.Model):
        
        def set_password(self, password):
            """Hash and set password"""
-           self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+           with track_bcrypt('hash'):
+               self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
        def check_password(self, password):
-           return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+           with track_bcrypt('check'):
+               return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
 
        def get_role_from_employee_number(self):
            if len(self.employee_number) == 4:
@@ -75,6 +96,7 @@ class User(db.Model):
                'is_locked': self.is_locked,
                'department_id': self.department_id,
                'department_name': self.department.name if self.department else None,
+               'email_delivery': self.email_delivery,
                'created_at': self.created_at.isoformat() if self.created_at else None,
                'updated_at': self.updated_at.isoformat() if self.updated_at else None,
                'failed_login_attempts': self.failed_login_attempts,
@@ -107,18 +129,7 @@ class User(db.Model):
         
         current_year = datetime.now().year
         
-        # Define default leave allocations based on requirements
-        leave_allocations = {
-            'Annual Leave': 30,
-            'Sick Leave': 14,
-            'Maternity Leave': 90,
-            'Paternity Leave': 14,
-            'Bereavement Leave': 4,
-            'Study Leave (Short Term)': 10,
-            'Study Leave (Long Term)': 502
-        }
-        
-        for leave_type_name, days in leave_allocations.items():
+        for leave_type_name, days in DEFAULT_LEAVE_ALLOCATIONS.items():
             leave_type = LeaveType.query.filter_by(name=leave_type_name).first()
             if leave_type:
                 # Check if balance already exists
@@ -132,7 +143,6 @@ class User(db.Model):
                     balance = LeaveBalance(
                         user_id=self.id,
                         leave_type_id=leave_type.id,
-                        total_days=days,
                         used_days=0,
                         balance=days,
                         year=current_year
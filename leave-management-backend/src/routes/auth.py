@@ -1,12 +1,17 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt, get_jti
 from flask_mail import Mail, Message
 from datetime import datetime, timedelta, timezone
+from sqlalchemy import select
 import secrets
 import re
-from src.extensions import db
+from src.extensions import db, limiter, token_blocklist, session_tracker, employee_numbers
+from src.utils.rate_limiter import client_ip, too_many_requests
+from src.utils.principal import current_user, current_user_profile, invalidate_user_profile
+from src.utils.validators import validate_employee_number, validate_email, validate_phone
 from src.models.user import User
 from src.models.password_reset_token import PasswordResetToken
+from src.models.login_session import LoginSession
 from src.models.leave_type import LeaveType
 from src.models.leave_balance import LeaveBalance
 import random
@@ -14,62 +19,13 @@ import string
 
 auth_bp = Blueprint('auth', __name__)
 
-def validate_employee_number(employee_number):
-    """Validate employee number format and determine role"""
-    if not employee_number or not employee_number.isdigit():
-        return False, None
-    
-    length = len(employee_number)
-    employee_num = int(employee_number)
-
-    if length == 4 and 0 <= int(employee_number) <= 9999:
-        return True, 'staff'
-    elif length == 5 and 0 <= int(employee_number) <= 99999:
-        return True, 'hod'
-    elif length == 6 and 0 <= int(employee_number) <= 999999:
-        return True, 'principal_secretary'
-    
-    return False, None
-
-def validate_email(email):
-    """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
-
-def validate_phone(phone):
-    """Validate phone number format"""
-    # Accept Kenyan phone numbers
-    pattern = r'^(\+254|254|0)[17]\d{8}$'
-    return re.match(pattern, phone) is not None
-
-def generate_employee_number(role):
-    """Generate unique employee number based on role"""
-    if role == 'staff':
-        length = 4
-        min_val, max_val = 0, 9999
-    elif role == 'hod':
-        length = 5
-        min_val, max_val = 0, 99999
-    elif role == 'principal_secretary':
-        length = 6
-        min_val, max_val = 0, 999999
-    else:
-        return None
-    
-    max_attempts = 100
-    for _ in range(max_attempts):
-        employee_number = str(random.randint(min_val, max_val)).zfill(length)
-        if not User.query.filter_by(employee_number=employee_number).first():
-            return employee_number
-    return None
-
 
 @auth_bp.route('/signup', methods=['POST'])
 def signup():
     try:
         data = request.get_json()
         # Validate required fields
-        required_fields = ['employee_number', 'email', 'phone_number', 'password', 'first_name', 'last_name']
+        required_fields = ['email', 'phone_number', 'password', 'first_name', 'last_name', 'role']
         for field in required_fields:
             if not data.get(field):
                 return jsonify({'error': f'{field} is required'}), 400
@@ -87,22 +43,13 @@ def signup():
             return jsonify({'error': 'Invalid phone number format. Use (+254XXXXXXXXX)'}), 400
         
         #Check if user already exists
-        if User.query.filter_by(employee_number=data['employee_number']).first():
-            return jsonify({'error': 'Employee number already registered'}), 400
-        
         if User.query.filter_by(email=data['email']).first():
             return jsonify({'error': 'Email already registered'}), 400
         
         if User.query.filter_by(phone_number=data['phone_number']).first():
             return jsonify({'error': 'Phone number already registered'}), 400
         
-        #Generate employee number
-        employee_number = generate_employee_number(data['role'])
-        if not employee_number:
-            return jsonify({'error': 'Failed to generate employee number. Try again.'}), 500
-        
         user = User(
-            employee_number=data['employee_number'],
             email=data['email'],
             phone_number=data['phone_number'],
             first_name=data['first_name'],
@@ -111,8 +58,16 @@ def signup():
             is_active=False
         )
         user.set_password(data['password'])
-        
-        db.session.add(user)
+
+        def add_user(employee_number):
+            user.employee_number = employee_number
+            db.session.add(user)
+            db.session.flush()
+
+        # Number allocation and the user insert commit together
+        employee_number = employee_numbers.assign(data['role'], add_user)
+        if not employee_number:
+            return jsonify({'error': 'Failed to generate employee number. Try again.'}), 500
         db.session.commit()
 
          # Initialize leave balances
@@ -178,6 +133,7 @@ def signup_with_employee_number():
         
         db.session.add(user)
         db.session.commit()
+        employee_numbers.mark_used(user.employee_number)
         
         # Initialize leave balances
         user.init_leave_balances()
@@ -192,6 +148,26 @@ def signup_with_employee_number():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def failed_login_key(employee_number):
+    return f"login:failed:{employee_number}"
+
+def unlocked_since(employee_number, since):
+    """
+    Whether the account is unlocked in the database and was unlocked after
+    `since` (a time.time() value). The database lock is the authority: with
+    the per-worker memory limiter, an unlock only resets the worker that
+    handled it, and other workers' failure counts are stale after it.
+    """
+    row = db.session.execute(
+        select(User.is_locked, User.unlocked_at).where(User.employee_number == employee_number)
+    ).first()
+    if row is None or row.is_locked or row.unlocked_at is None or since is None:
+        return False
+    unlocked_at = row.unlocked_at
+    if unlocked_at.tzinfo is None:
+        unlocked_at = unlocked_at.replace(tzinfo=timezone.utc)
+    return unlocked_at.timestamp() >= since
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     """Login user with employee number and password"""
@@ -201,9 +177,26 @@ def login():
         if not data.get('employee_number') or not data.get('password'):
             return jsonify({'error': 'Employee number and password are required'}), 400
         
+        # Throttle per client address before touching the database
+        limit, window = current_app.config['RATELIMIT_LOGIN_PER_IP']
+        allowed, retry_after = limiter.hit(f"login:ip:{client_ip()}", limit, window)
+        if not allowed:
+            return too_many_requests(retry_after)
+        
+        # Failed attempts are counted in the limiter; only the lock itself is persisted
+        max_attempts = current_app.config['MAX_FAILED_LOGIN_ATTEMPTS']
+        failure_window = current_app.config['FAILED_LOGIN_WINDOW']
+        failed_key = failed_login_key(data['employee_number'])
+        if limiter.count(failed_key, failure_window) >= max_attempts:
+            if not unlocked_since(data['employee_number'], limiter.oldest(failed_key)):
+                return jsonify({'error': 'Failed, kindly contact admin.'}), 423
+            # Unlocked in the database after these failures (possibly by another worker)
+            limiter.reset(failed_key)
+        
         user = User.query.filter_by(employee_number=data['employee_number']).first()
         
         if not user:
+            limiter.record(failed_key, failure_window)
             return jsonify({'error': 'Invalid credentials'}), 401
         
         # Check if account is locked
@@ -212,32 +205,46 @@ def login():
         
         # Check password
         if not user.check_password(data['password']):
-            # Increment failed attempts
-            user.failed_login_attempts += 1
-            if user.failed_login_attempts >= 3:
+            failed_attempts = max(limiter.record(failed_key, failure_window), user.failed_login_attempts or 0)
+            if failed_attempts >= max_attempts:
+                user.failed_login_attempts = failed_attempts
                 user.is_locked = True
                 db.session.commit()
                 return jsonify({'error': 'Failed, kindly contact admin.'}), 423
             
-            db.session.commit()
-            attempts_left = 3 - user.failed_login_attempts
+            attempts_left = max_attempts - failed_attempts
             return jsonify({
                 'error': f'Invalid credentials. {attempts_left} attempts remaining.'
             }), 401
         
         # Reset failed attempts on successful login
-        user.failed_login_attempts = 0
-        db.session.commit()
+        limiter.reset(failed_key)
+        if user.failed_login_attempts:
+            user.failed_login_attempts = 0
         
         # Create access token
         access_token = create_access_token(
-            identity=user.id,
+            identity=str(user.id),
             additional_claims={
                 'role': user.role,
                 'employee_number': user.employee_number
             }
         )
         
+        # Track the session under the token's jti
+        now = datetime.now(timezone.utc)
+        db.session.add(LoginSession(
+            user_id=user.id,
+            session_token=get_jti(access_token),
+            ip_address=client_ip(),
+            user_agent=request.user_agent.string,
+            is_active=True,
+            created_at=now,
+            last_activity=now,
+            expires_at=now + current_app.config['JWT_ACCESS_TOKEN_EXPIRES']
+        ))
+        db.session.commit()
+        
         return jsonify({
             'access_token': access_token,
             'user': user.to_dict(),
@@ -258,6 +265,13 @@ def forgot_password():
         if not identifier:
             return jsonify({'error': 'Email, phone number, or employee number is required'}), 400
         
+        # Throttle per client address and per account before touching the database
+        limit, window = current_app.config['RATELIMIT_FORGOT_PASSWORD']
+        for key in (f"forgot:ip:{client_ip()}", f"forgot:id:{identifier.lower()}"):
+            allowed, retry_after = limiter.hit(key, limit, window)
+            if not allowed:
+                return too_many_requests(retry_after)
+        
         # Find user by email, phone, or employee number
         user = None
         if '@' in identifier:
@@ -388,12 +402,16 @@ def reset_password():
         # Update password
         user.set_password(data['new_password'])
         user.failed_login_attempts = 0
-        user.is_locked = False
+        if user.is_locked:
+            user.is_locked = False
+            user.unlocked_at = datetime.now(timezone.utc)
+        limiter.reset(failed_login_key(user.employee_number))
         
         # Mark token as used
         reset_token.used = True
         
         db.session.commit()
+        invalidate_user_profile(user.id)
         
         return jsonify({'message': 'Password reset successfully'}), 200
         
@@ -405,13 +423,12 @@ def reset_password():
 @jwt_required()
 def get_profile():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        profile = current_user_profile()
         
-        if not user:
+        if not profile:
             return jsonify({'error': 'User not found'}), 404
         
-        return jsonify({'user': user.to_dict()}), 200
+        return jsonify({'user': profile}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -421,8 +438,7 @@ def get_profile():
 def change_password():
     """Change user password"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -456,12 +472,26 @@ def change_password():
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    """Logout user"""
-    # In this case, we don't need to do anything specific for logout
-    # since JWT tokens are stateless and do not require server-side session management.
-    # JWT tokens are stateless, so we just return success
-    # In a production app, you might want to blacklist the token
-    return jsonify({'message': 'Logged out successfully'}), 200
+    """Logout user by revoking the presented token"""
+    try:
+        claims = get_jwt()
+        token_blocklist.revoke(
+            jti=claims['jti'],
+            expires_at=datetime.fromtimestamp(claims['exp'], timezone.utc),
+            user_id=int(get_jwt_identity()),
+            token_type=claims.get('type', 'access')
+        )
+        LoginSession.query.filter_by(session_token=claims['jti']).update(
+            {'is_active': False}, synchronize_session=False
+        )
+        session_tracker.discard(claims['jti'])
+        db.session.commit()
+        
+        return jsonify({'message': 'Logged out successfully'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/unlock-account', methods=['POST'])
 def unlock_account():
@@ -483,8 +513,11 @@ def unlock_account():
         # For now, allow unlocking with just employee number
         # In production, you might want admin authentication or reset code
         user.is_locked = False
+        user.unlocked_at = datetime.now(timezone.utc)
         user.failed_login_attempts = 0
         db.session.commit()
+        limiter.reset(failed_login_key(user.employee_number))
+        invalidate_user_profile(user.id)
         
         return jsonify({'message': 'Account unlocked successfully'}), 200
         
@@ -9,9 +9,13 @@ from src.models.leave_balance import LeaveBalance
 from src.models.leave_application import LeaveApplication
 from src.models.notification import Notification
 from src.extensions import db
+from src.utils.principal import current_principal, current_user, role_required
+from src.utils.read_replica import use_read_replica
 import calendar
 
 dashboard_bp = Blueprint('dashboard', __name__)
+# Every dashboard endpoint is a read; the few that initialise data stick to the primary after writing
+dashboard_bp.before_request(use_read_replica)
 
 @dashboard_bp.route('/types', methods=['GET'])
 @jwt_required()
@@ -32,14 +36,11 @@ def get_leave_types():
 def get_dashboard_stats():
     """Get comprehensive dashboard statistics for the user"""
     try:
-        current_user_id = get_jwt_identity()
-        if not current_user_id:
-            return jsonify({'error': 'User not authenticated'}), 401
-        
-        user = User.query.get(current_user_id)
+        user = current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
+        current_user_id = user.id
         
         current_year = datetime.now().year
         today = date.today()
@@ -62,9 +63,9 @@ def get_dashboard_stats():
         stats['leave_balances'] = [balance.to_dict() for balance in balances]
         
         # Total leave balance summary
-        total_allocated = sum(b.total_days for b in balances)
+        total_allocated = sum(b.balance for b in balances)
         total_used = sum(b.used_days for b in balances)
-        total_remaining = sum(b.remaining_days() for b in balances)
+        total_remaining = sum(b.available for b in balances)
         
         stats['leave_summary'] = {
             'total_allocated': total_allocated,
@@ -75,7 +76,7 @@ def get_dashboard_stats():
         # User's applications this year
         user_applications = LeaveApplication.query.filter(
             and_(
-                LeaveApplication.applicant_id == current_user_id,
+                LeaveApplication.user_id == current_user_id,
                 extract('year', LeaveApplication.start_date) == current_year
             )
         ).all()
@@ -91,7 +92,7 @@ def get_dashboard_stats():
         # Current leave status
         current_leave = LeaveApplication.query.filter(
             and_(
-                LeaveApplication.applicant_id == current_user_id,
+                LeaveApplication.user_id == current_user_id,
                 LeaveApplication.status == 'approved',
                 LeaveApplication.start_date <= today,
                 LeaveApplication.end_date >= today
@@ -111,7 +112,7 @@ def get_dashboard_stats():
         # Upcoming approved leaves
         upcoming_leaves = LeaveApplication.query.filter(
             and_(
-                LeaveApplication.applicant_id == current_user_id,
+                LeaveApplication.user_id == current_user_id,
                 LeaveApplication.status == 'approved',
                 LeaveApplication.start_date > today
             )
@@ -137,42 +138,23 @@ def get_dashboard_stats():
         # Role-specific stats
         if user.role in ['hod', 'principal_secretary']:
             # Pending applications to review
-            pending_query = LeaveApplication.query.join(User, LeaveApplication.applicant_id == User.id)
+            pending_query = LeaveApplication.query.filter(LeaveApplication.status == 'pending')
             
             if user.role == 'hod':
-                pending_to_review = pending_query.filter(
-                    and_(
-                        LeaveApplication.status == 'pending_hod_approval',
-                        User.role == 'staff'
-                    )
-                ).count()
-            else:  # principal_secretary
-                pending_to_review = pending_query.filter(
-                    LeaveApplication.status == 'pending_principal_secretary_approval'
-                ).count()
-            
-            stats['pending_to_review'] = pending_to_review
+                # HODs review staff applications
+                pending_query = pending_query.join(User, LeaveApplication.user_id == User.id).filter(User.role == 'staff')
             
-            # Applications reviewed this month
-            start_of_month = today.replace(day=1)
-            reviewed_query = LeaveApplication.query.filter(
-                LeaveApplication.status.in_(['approved', 'rejected'])
-            )
+            stats['pending_to_review'] = pending_query.count()
             
-            if user.role == 'hod':
-                reviewed_this_month = reviewed_query.filter(
-                    and_(
-                        LeaveApplication.hod_approval_date >= start_of_month,
-                        LeaveApplication.hod_approval_date <= today
-                    )
-                ).count()
-            else:
-                reviewed_this_month = reviewed_query.filter(
-                    and_(
-                        LeaveApplication.principal_secretary_approval_date >= start_of_month,
-                        LeaveApplication.principal_secretary_approval_date <= today
-                    )
-                ).count()
+            # Applications this reviewer decided this month
+            start_of_month = datetime.combine(today.replace(day=1), datetime.min.time())
+            reviewed_this_month = LeaveApplication.query.filter(
+                and_(
+                    LeaveApplication.status.in_(['approved', 'rejected']),
+                    LeaveApplication.approved_by == user.id,
+                    LeaveApplication.approved_at >= start_of_month
+                )
+            ).count()
             
             stats['reviewed_this_month'] = reviewed_this_month
         
@@ -188,7 +170,7 @@ def get_dashboard_stats():
             }
             
             # Staff currently on leave
-            staff_on_leave = LeaveApplication.query.join(User).filter(
+            staff_on_leave = LeaveApplication.query.join(User, LeaveApplication.user_id == User.id).filter(
                 and_(
                     User.role.in_(['staff', 'hod']),
                     LeaveApplication.status == 'approved',
@@ -200,9 +182,9 @@ def get_dashboard_stats():
             stats['staff_currently_on_leave'] = staff_on_leave
             
             # Leave applications this month
+            # A range rather than extract() so ix_leave_applications_created_at applies
             applications_this_month = LeaveApplication.query.filter(
-                extract('year', LeaveApplication.created_at) == today.year,
-                extract('month', LeaveApplication.created_at) == today.month
+                LeaveApplication.created_at >= datetime.combine(today.replace(day=1), datetime.min.time())
             ).count()
             
             stats['applications_this_month'] = applications_this_month
@@ -217,11 +199,8 @@ def get_dashboard_stats():
 def get_calendar_data():
     """Get calendar data showing leave periods"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        user = current_principal()
+        user_id = user.id
         
         # Get query parameters
         year = request.args.get('year', default=datetime.now().year, type=int)
@@ -256,16 +235,16 @@ def get_calendar_data():
         
         # Filter based on view type and user role
         if view == 'personal':
-            leaves_query = leaves_query.filter(LeaveApplication.applicant_id == user_id)
+            leaves_query = leaves_query.filter(LeaveApplication.user_id == user_id)
         elif view == 'team' and user.role in ['hod', 'principal_secretary']:
             # HODs see their staff, PS sees everyone
             if user.role == 'hod':
                 # For now, show all staff - in a real system you'd filter by department
-                leaves_query = leaves_query.join(User).filter(User.role == 'staff')
+                leaves_query = leaves_query.join(User, LeaveApplication.user_id == User.id).filter(User.role == 'staff')
             # PS sees all by default (no additional filter needed)
         else:
             # Regular staff can only see personal view
-            leaves_query = leaves_query.filter(LeaveApplication.applicant_id == user_id)
+            leaves_query = leaves_query.filter(LeaveApplication.user_id == user_id)
         
         leaves = leaves_query.all()
         
@@ -278,8 +257,8 @@ def get_calendar_data():
             
             event_data = {
                 'id': leave.id,
-                'title': f"{leave.applicant.first_name} - {leave.leave_type.name}",
-                'applicant_name': leave.applicant.full_name,
+                'title': f"{leave.user.first_name} - {leave.leave_type.name}",
+                'applicant_name': leave.user.full_name,
                 'leave_type': leave.leave_type.name,
                 'start_date': event_start.isoformat(),
                 'end_date': event_end.isoformat(),
@@ -287,7 +266,7 @@ def get_calendar_data():
                 'full_end_date': leave.end_date.isoformat(),
                 'days_requested': leave.days_requested,
                 'status': leave.status,
-                'is_current_user': leave.applicant_id == user_id
+                'is_current_user': leave.user_id == user_id
             }
             
             # Add different colors based on leave type
@@ -335,7 +314,7 @@ def get_leave_countdown():
         # Check if user is currently on leave
         current_leave = LeaveApplication.query.filter(
             and_(
-                LeaveApplication.applicant_id == user_id,
+                LeaveApplication.user_id == user_id,
                 LeaveApplication.status == 'approved',
                 LeaveApplication.start_date <= today,
                 LeaveApplication.end_date >= today
@@ -369,7 +348,7 @@ def get_leave_countdown():
         # Find next upcoming approved leave
         next_leave = LeaveApplication.query.filter(
             and_(
-                LeaveApplication.applicant_id == user_id,
+                LeaveApplication.user_id == user_id,
                 LeaveApplication.status == 'approved',
                 LeaveApplication.start_date > today
             )
@@ -416,8 +395,8 @@ def get_balance_status():
         balance_status = []
         
         for balance in balances:
-            remaining = balance.remaining_days()
-            percentage_used = (balance.used_days / balance.total_days) * 100 if balance.total_days > 0 else 0
+            remaining = balance.available
+            percentage_used = (balance.used_days / balance.balance) * 100 if balance.balance > 0 else 0
             
             # Determine status
             if remaining <= 0:
@@ -453,11 +432,8 @@ def get_balance_status():
 def get_recent_activity():
     """Get recent leave-related activity"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        user = current_principal()
+        user_id = user.id
         
         limit = request.args.get('limit', default=10, type=int)
         
@@ -465,7 +441,7 @@ def get_recent_activity():
         
         # User's recent applications
         recent_applications = LeaveApplication.query.filter_by(
-            applicant_id=user_id
+            user_id=user_id
         ).order_by(LeaveApplication.created_at.desc()).limit(5).all()
         
         for app in recent_applications:
@@ -480,18 +456,18 @@ def get_recent_activity():
         
         # If user is HOD or PS, show recent approvals
         if user.role in ['hod', 'principal_secretary']:
-            approval_field = 'hod_approval_date' if user.role == 'hod' else 'principal_secretary_approval_date'
-            
             recent_approvals = LeaveApplication.query.filter(
-                getattr(LeaveApplication, approval_field).isnot(None)
-            ).order_by(getattr(LeaveApplication, approval_field).desc()).limit(5).all()
+                LeaveApplication.status.in_(['approved', 'rejected']),
+                LeaveApplication.approved_by == user_id,
+                LeaveApplication.approved_at.isnot(None)
+            ).order_by(LeaveApplication.approved_at.desc()).limit(5).all()
             
             for app in recent_approvals:
-                approval_date = getattr(app, approval_field)
+                approval_date = app.approved_at
                 activities.append({
                     'type': 'approval',
                     'action': 'approved' if app.status == 'approved' else 'processed',
-                    'description': f'Processed {app.applicant.full_name}\'s {app.leave_type.name} application',
+                    'description': f'Processed {app.user.full_name}\'s {app.leave_type.name} application',
                     'date': approval_date.isoformat(),
                     'status': app.status,
                     'application_id': app.id
@@ -507,14 +483,11 @@ def get_recent_activity():
 
 @dashboard_bp.route('/team-overview', methods=['GET'])
 @jwt_required()
+@role_required('hod', 'principal_secretary', message='Unauthorized')
 def get_team_overview():
     """Get team leave overview (for HODs and PS only)"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user or user.role not in ['hod', 'principal_secretary']:
-            return jsonify({'error': 'Unauthorized'}), 403
+        user = current_principal()
         
         today = date.today()
         
@@ -531,7 +504,7 @@ def get_team_overview():
             # Check if member is currently on leave
             current_leave = LeaveApplication.query.filter(
                 and_(
-                    LeaveApplication.applicant_id == member.id,
+                    LeaveApplication.user_id == member.id,
                     LeaveApplication.status == 'approved',
                     LeaveApplication.start_date <= today,
                     LeaveApplication.end_date >= today
@@ -541,7 +514,7 @@ def get_team_overview():
             # Get upcoming leave
             upcoming_leave = LeaveApplication.query.filter(
                 and_(
-                    LeaveApplication.applicant_id == member.id,
+                    LeaveApplication.user_id == member.id,
                     LeaveApplication.status == 'approved',
                     LeaveApplication.start_date > today
                 )
@@ -550,7 +523,7 @@ def get_team_overview():
             # Get leave balance summary
             current_year = datetime.now().year
             balances = LeaveBalance.get_user_all_balances(member.id, current_year)
-            total_remaining = sum(b.remaining_days() for b in balances)
+            total_remaining = sum(b.available for b in balances)
             
             member_data = {
                 'user': member.to_dict(),
@@ -3,11 +3,14 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.extensions import db
 from src.models.department import Department
 from src.models.user import User
+from src.utils.principal import current_principal, current_user, role_required
+from src.utils.read_replica import read_replica
 
 department_bp = Blueprint('department', __name__)
 
 @department_bp.route('/', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_departments():
     """Get all departments"""
     try:
@@ -20,6 +23,7 @@ def get_departments():
 
 @department_bp.route('/<int:department_id>', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_department(department_id):
     """Get a specific department"""
     try:
@@ -30,16 +34,10 @@ def get_department(department_id):
 
 @department_bp.route('/', methods=['POST'])
 @jwt_required()
+@role_required('admin', 'principal_secretary')
 def create_department():
     """Create a new department"""
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
-        # Check if user has permission (only admin or principal_secretary)
-        if current_user.role not in ['admin', 'principal_secretary']:
-            return jsonify({'error': 'Insufficient permissions'}), 403
-            
         data = request.get_json()
         
         # Validate required fields
@@ -72,16 +70,10 @@ def create_department():
 
 @department_bp.route('/<int:department_id>', methods=['PUT'])
 @jwt_required()
+@role_required('admin', 'principal_secretary')
 def update_department(department_id):
     """Update a department"""
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
-        # Check permissions
-        if current_user.role not in ['admin', 'principal_secretary']:
-            return jsonify({'error': 'Insufficient permissions'}), 403
-            
         department = Department.query.get_or_404(department_id)
         data = request.get_json()
         
@@ -122,16 +114,10 @@ def update_department(department_id):
 
 @department_bp.route('/<int:department_id>', methods=['DELETE'])
 @jwt_required()
+@role_required('admin', 'principal_secretary')
 def delete_department(department_id):
     """Delete a department"""
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
-        # Check permissions
-        if current_user.role not in ['admin', 'principal_secretary']:
-            return jsonify({'error': 'Insufficient permissions'}), 403
-            
         department = Department.query.get_or_404(department_id)
         
         # Check if department has users
@@ -152,6 +138,7 @@ def delete_department(department_id):
 
 @department_bp.route('/<int:department_id>/users', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_department_users(department_id):
     """Get all users in a department"""
     try:
@@ -171,11 +158,8 @@ def get_department_users(department_id):
 def assign_user_to_department(department_id):
     """Assign a user to a department"""
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
         # Check permissions
-        if current_user.role not in ['admin', 'principal_secretary', 'hod']:
+        if not current_principal().has_role('admin', 'principal_secretary', 'hod'):
             return jsonify({'error': 'Insufficient permissions'}), 403
             
         department = Department.query.get_or_404(department_id)
@@ -187,8 +171,12 @@ def assign_user_to_department(department_id):
         user = User.query.get_or_404(data['user_id'])
         
         # If current user is HOD, they can only assign users to their own department
-        if current_user.role == 'hod' and current_user.managed_department.id != department_id:
-            return jsonify({'error': 'HOD can only assign users to their own department'}), 403
+        if current_principal().role == 'hod':
+            manager = current_user()
+            if not manager:
+                return jsonify({'error': 'Account not found or inactive'}), 401
+            if department_id not in [headed.id for headed in manager.headed_department]:
+                return jsonify({'error': 'HOD can only assign users to their own department'}), 403
         
         user.department_id = department_id
         db.session.commit()
@@ -207,18 +195,19 @@ def assign_user_to_department(department_id):
 def remove_user_from_department(user_id):
     """Remove a user from their department"""
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
         # Check permissions
-        if current_user.role not in ['admin', 'principal_secretary', 'hod']:
+        if not current_principal().has_role('admin', 'principal_secretary', 'hod'):
             return jsonify({'error': 'Insufficient permissions'}), 403
             
         user = User.query.get_or_404(user_id)
         
         # If current user is HOD, they can only remove users from their own department
-        if current_user.role == 'hod' and user.department_id != current_user.managed_department.id:
-            return jsonify({'error': 'HOD can only remove users from their own department'}), 403
+        if current_principal().role == 'hod':
+            manager = current_user()
+            if not manager:
+                return jsonify({'error': 'Account not found or inactive'}), 401
+            if user.department_id not in [headed.id for headed in manager.headed_department]:
+                return jsonify({'error': 'HOD can only remove users from their own department'}), 403
         
         user.department_id = None
         db.session.commit()
@@ -234,6 +223,7 @@ def remove_user_from_department(user_id):
 
 @department_bp.route('/stats', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_department_stats():
     """Get department statistics"""
     try:
@@ -249,7 +239,7 @@ def get_department_stats():
                 'department_name': dept.name,
                 'total_users': user_count,
                 'active_users': active_users,
-                'hod_name': f"{dept.hod.first_name} {dept.hod.last_name}" if dept.hod else None
+                'hod_name': f"{dept.head.first_name} {dept.head.last_name}" if dept.head else None
             })
         
         return jsonify({'department_stats': stats}), 200
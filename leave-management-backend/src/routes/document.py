@@ -0,0 +1,212 @@
+from flask import Blueprint, Response, request, jsonify, url_for, stream_with_context
+from flask_jwt_extended import jwt_required
+from datetime import datetime
+from sqlalchemy import extract
+from sqlalchemy.orm import joinedload
+from src.extensions import db, document_jobs, pdf_cache
+from src.models.leave_application import LeaveApplication
+from src.models.user import User
+from src.utils.document_jobs import JobQueueFull
+from src.utils.form_export import export_leave_forms, stream_zip
+from src.utils.reports import report_filters, render_summary_report_job
+from src.utils.principal import current_principal, role_required
+from src.utils.read_replica import read_replica
+
+document_bp = Blueprint('document', __name__)
+
+# Roles that may render documents about other users' applications
+REPORT_ROLES = ['admin', 'hod', 'principal_secretary']
+
+# Applications loaded per query while streaming a bulk export
+EXPORT_LOAD_CHUNK = 200
+
+def _application_options():
+    return (
+        joinedload(LeaveApplication.user),
+        joinedload(LeaveApplication.leave_type),
+        joinedload(LeaveApplication.approver),
+        joinedload(LeaveApplication.person_handling)
+    )
+
+def _filter_applications(query, filters):
+    if 'status' in filters:
+        query = query.filter(LeaveApplication.status == filters['status'])
+    if 'department_id' in filters:
+        query = query.join(User, User.id == LeaveApplication.user_id).filter(User.department_id == filters['department_id'])
+    if 'year' in filters:
+        query = query.filter(extract('year', LeaveApplication.start_date) == filters['year'])
+    if 'start_date' in filters:
+        query = query.filter(LeaveApplication.start_date >= datetime.strptime(filters['start_date'], '%Y-%m-%d').date())
+    if 'end_date' in filters:
+        query = query.filter(LeaveApplication.start_date <= datetime.strptime(filters['end_date'], '%Y-%m-%d').date())
+    return query
+
+def _export_sources(application_ids):
+    """(filename, cache_key, fields) per application, loaded a chunk at a time"""
+    from src.utils.pdf_generator import leave_form_fields, leave_form_cache_key
+
+    for i in range(0, len(application_ids), EXPORT_LOAD_CHUNK):
+        applications = LeaveApplication.query.options(*_application_options()).filter(
+            LeaveApplication.id.in_(application_ids[i:i + EXPORT_LOAD_CHUNK])
+        ).all()
+        sources = []
+        for application in applications:
+            fields = leave_form_fields(application)
+            sources.append((f'leave_application_{application.id}.pdf', leave_form_cache_key(fields), fields))
+        # Drop the loaded objects and end the read transaction between chunks
+        db.session.expunge_all()
+        db.session.rollback()
+        yield from sources
+
+def _submit_leave_form(principal, data):
+    # ReportLab is imported on first use rather than at worker boot
+    from src.utils.pdf_generator import leave_form_fields, leave_form_cache_key, render_leave_form
+
+    application = db.session.get(LeaveApplication, data.get('application_id'))
+    if not application:
+        return None, (jsonify({'error': 'Leave application not found'}), 404)
+    if application.user_id != principal.id and not principal.has_role(*REPORT_ROLES):
+        return None, (jsonify({'error': 'Insufficient permissions'}), 403)
+
+    fields = leave_form_fields(application)
+    key = leave_form_cache_key(fields)
+    filename = f'leave_application_{application.id}.pdf'
+    cached = pdf_cache.get(key)
+    if cached is not None:
+        return document_jobs.completed(principal.id, 'leave_form', filename, cached), None
+    return document_jobs.submit(principal.id, 'leave_form', filename, render_leave_form, fields, cache_key=key), None
+
+def _submit_summary_report(principal, data):
+    if not principal.has_role(*REPORT_ROLES):
+        return None, (jsonify({'error': 'Insufficient permissions'}), 403)
+    title = data.get('title') or 'Leave Applications Report'
+    # The worker streams rows from the default bind itself rather than receiving them
+    return document_jobs.submit(
+        principal.id, 'summary_report', 'leave_summary.pdf', render_summary_report_job,
+        None, report_filters(data), title
+    ), None
+
+def _matching_application_ids(filters):
+    query = _filter_applications(db.session.query(LeaveApplication.id), filters)
+    return [application_id for application_id, in query.order_by(LeaveApplication.id)]
+
+def build_forms_zip(application_ids):
+    """Bulk job entry point: the same chunked, cache-aware path as /leave-forms/export, collected"""
+    return b''.join(stream_zip(export_leave_forms(_export_sources(application_ids))))
+
+def _submit_bulk_forms(principal, data):
+    if not principal.has_role(*REPORT_ROLES):
+        return None, (jsonify({'error': 'Insufficient permissions'}), 403)
+    application_ids = _matching_application_ids(report_filters(data))
+    if not application_ids:
+        return None, (jsonify({'error': 'No leave applications match the filters'}), 404)
+    # Only the IDs travel with the job; it loads forms a chunk at a time and reuses the PDF cache
+    return document_jobs.submit(
+        principal.id, 'bulk_forms', 'leave_forms.zip', build_forms_zip, application_ids,
+        mimetype='application/zip', local=True
+    ), None
+
+JOB_TYPES = {
+    'leave_form': _submit_leave_form,
+    'summary_report': _submit_summary_report,
+    'bulk_forms': _submit_bulk_forms
+}
+
+def _job_response(job, status_code=200):
+    body = job.to_dict()
+    body['status_url'] = url_for('document.get_job', job_id=job.id)
+    if job.status == 'done':
+        body['download_url'] = url_for('document.download_job', job_id=job.id)
+    return jsonify(body), status_code
+
+def _owned_job(job_id):
+    job = document_jobs.get(job_id)
+    if job is None or job.owner_id != current_principal().id:
+        return None
+    return job
+
+@document_bp.route('/jobs', methods=['POST'])
+@jwt_required()
+def create_job():
+    """Queue a document render: leave_form, summary_report or bulk_forms"""
+    try:
+        data = request.get_json() or {}
+        handler = JOB_TYPES.get(data.get('type'))
+        if handler is None:
+            return jsonify({'error': f"type must be one of {', '.join(JOB_TYPES)}"}), 400
+
+        try:
+            job, error = handler(current_principal(), data)
+        except ValueError:
+            return jsonify({'error': 'Invalid filter value. Use YYYY-MM-DD dates and a numeric year'}), 400
+        except JobQueueFull:
+            return jsonify({'error': 'Too many documents are being rendered. Try again shortly'}), 503, {'Retry-After': '10'}
+        if error:
+            return error
+
+        return _job_response(job, 202)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@document_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """Job status"""
+    job = _owned_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return _job_response(job)
+
+@document_bp.route('/jobs/<job_id>/download', methods=['GET'])
+@jwt_required()
+def download_job(job_id):
+    """Rendered document, once the job is done"""
+    job = _owned_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    if job.status == 'failed':
+        return jsonify({'error': job.error}), 500
+    if job.status != 'done':
+        return jsonify({'error': 'Job not finished', 'status': job.status}), 409
+
+    return Response(job.result, mimetype=job.mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{job.filename}"',
+        'Cache-Control': 'private, no-store'
+    })
+
+@document_bp.route('/leave-forms/export', methods=['GET'])
+@jwt_required()
+@role_required(*REPORT_ROLES)
+@read_replica
+def export_leave_forms_zip():
+    """
+    Every leave form matching the filters as one ZIP, streamed as forms are
+    rendered. Takes the report filters as query parameters; status defaults
+    to approved.
+    """
+    try:
+        data = request.args.to_dict()
+        data.setdefault('status', 'approved')
+        try:
+            filters = report_filters(data)
+        except ValueError:
+            return jsonify({'error': 'Invalid filter value. Use YYYY-MM-DD dates and a numeric year'}), 400
+
+        application_ids = _matching_application_ids(filters)
+        if not application_ids:
+            return jsonify({'error': 'No leave applications match the filters'}), 404
+
+        filename = 'leave_forms.zip'
+        if 'year' in filters:
+            filename = f"leave_forms_{filters['year']}.zip"
+        archive = stream_zip(export_leave_forms(_export_sources(application_ids)))
+        return Response(stream_with_context(archive), mimetype='application/zip', headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'private, no-store',
+            'X-Form-Count': str(len(application_ids)),
+            'X-Accel-Buffering': 'no'
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
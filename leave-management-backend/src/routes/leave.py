@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, date, timedelta, timezone
 from sqlalchemy import and_, or_
@@ -9,9 +9,10 @@ from src.models.leave_application import LeaveApplication
 from src.utils.email_utils import send_leave_notification, send_leave_status_update
 from src.holidays import get_kenyan_public_holidays
 from src.models.notification import Notification
-from src.utils.pdf_generator import generate_leave_application_pdf
 import os
 from src.extensions import db
+from src.utils.principal import current_principal, role_required
+from src.utils.read_replica import read_replica
 
 leave_bp = Blueprint("leave", __name__)
 
@@ -51,6 +52,7 @@ def calculate_working_days(start_date, end_date, exclude_weekends=True):
 
 @leave_bp.route("/types", methods=['GET'])
 @jwt_required()
+@read_replica
 def get_leave_types():
     """Get all active leave types"""
     try:
@@ -64,6 +66,7 @@ def get_leave_types():
 
 @leave_bp.route('/history', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_leave_history():
     """Get user's leave history"""
     try:
@@ -85,6 +88,7 @@ def get_leave_history():
     
 @leave_bp.route('/balances', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_leave_balances():
     """Get user's leave balances"""
     try:
@@ -104,6 +108,7 @@ def get_leave_balances():
     
 @leave_bp.route('/balance/<int:leave_type_id>', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_leave_balance_by_type(leave_type_id):
     """Get user's balance for specific leave type"""
     try:
@@ -122,16 +127,12 @@ def get_leave_balance_by_type(leave_type_id):
 
 @leave_bp.route('/pending', methods=['GET'])
 @jwt_required()
+@role_required('hod', 'principal_secretary')
+@read_replica
 def get_pending_applications():
     """Get pending leave applications for approval"""
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
         # Only HOD and Principal Secretary can see pending applications
-        if current_user.role not in ['hod', 'principal_secretary']:
-            return jsonify({'error': 'Insufficient permissions'}), 403
-            
         applications = LeaveApplication.query.filter_by(status='pending').all()
         
         return jsonify({
@@ -180,4 +181,45 @@ def apply_for_leave():
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+# Roles that may download any application's form
+FORM_VIEWER_ROLES = ['admin', 'hod', 'principal_secretary']
+
+@leave_bp.route('/applications/<int:application_id>/pdf', methods=['GET'])
+@jwt_required()
+@read_replica
+def download_application_pdf(application_id):
+    """Leave application form as PDF; supports If-None-Match and Range"""
+    # ReportLab is imported on first use rather than at worker boot
+    from src.utils.pdf_generator import cached_leave_form, leave_form_cache_key, leave_form_fields
+
+    try:
+        application = db.session.get(LeaveApplication, application_id)
+        if not application:
+            return jsonify({'error': 'Leave application not found'}), 404
+        
+        principal = current_principal()
+        if application.user_id != principal.id and not principal.has_role(*FORM_VIEWER_ROLES):
+            return jsonify({'error': 'Insufficient permissions'}), 403
+        
+        # The key is a content hash, so a revalidation is answered before anything is rendered
+        fields = leave_form_fields(application)
+        key = leave_form_cache_key(fields)
+        if request.if_none_match.contains(key):
+            response = Response(status=304, headers={'Cache-Control': 'private, no-cache'})
+            response.set_etag(key)
+            return response
+        
+        data = cached_leave_form(fields, key)
+        response = Response(data, mimetype='application/pdf', headers={
+            'Content-Disposition': f'inline; filename="leave_application_{application.id}.pdf"',
+            'Cache-Control': 'private, no-cache',
+            'Accept-Ranges': 'bytes'
+        })
+        response.set_etag(key)
+        return response.make_conditional(request, accept_ranges=True, complete_length=len(data))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
@@ -2,12 +2,14 @@ from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.extensions import db
 from src.models.leave_balance import LeaveBalance
+from src.utils.read_replica import read_replica
 from datetime import datetime, timezone
 
 leave_balance_bp = Blueprint('leave_balance', __name__)
 
 @leave_balance_bp.route('/leave_balances', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_leave_balances():
     try:
         user_id = get_jwt_identity()
@@ -27,6 +29,7 @@ def get_leave_balances():
 
 @leave_balance_bp.route('/<int:user_id>', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_user_leave_balance(user_id):
     lb = LeaveBalance.query.filter_by(user_id=user_id).first()
     if not lb:
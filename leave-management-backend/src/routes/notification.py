@@ -1,14 +1,141 @@
-from flask import Blueprint, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import base64
+import binascii
+from flask import Blueprint, Response, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt
+from datetime import datetime
+from src.extensions import db, event_broker
 from src.models.notification import Notification
+from src.utils.principal import current_principal, role_required
 
 notification_bp = Blueprint('notification', __name__)
 
-@notification_bp.route('/notifications', methods=['GET'])
+INBOX_PAGE_SIZE = 20
+INBOX_MAX_PAGE_SIZE = 100
+
+def encode_cursor(notification):
+    raw = f'{notification.created_at.isoformat()}|{notification.id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Return (created_at, id) from an inbox cursor; raises ValueError if malformed"""
+    try:
+        created_at, notification_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(created_at), int(notification_id)
+    except (UnicodeError, binascii.Error) as e:
+        raise ValueError('Invalid cursor') from e
+
+@notification_bp.route('', methods=['GET'])
 @jwt_required()
 def get_notifications():
-    user_id = get_jwt_identity()
-    notifications = Notification.query.filter_by(user_id=user_id).order_by(Notification.created_at.desc()).all()
-    return jsonify({
-        'notifications': [n.to_dict() for n in notifications]
-    }), 200
+    """A page of the inbox, newest first; pass next_cursor back as ?cursor= for the next page"""
+    try:
+        limit = min(max(request.args.get('limit', INBOX_PAGE_SIZE, type=int), 1), INBOX_MAX_PAGE_SIZE)
+        cursor = request.args.get('cursor')
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
+        user_id = current_principal().id
+        # Fetch one extra row to learn whether another page exists
+        notifications = Notification.get_user_notifications(user_id, limit=limit + 1, after=after)
+        has_more = len(notifications) > limit
+        notifications = notifications[:limit]
+        
+        return jsonify({
+            'notifications': [n.to_dict() for n in notifications],
+            'next_cursor': encode_cursor(notifications[-1]) if has_more else None,
+            'unread_count': Notification.get_unread_count(user_id)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@notification_bp.route('/<int:notification_id>/read', methods=['PATCH'])
+@jwt_required()
+def mark_notification_read(notification_id):
+    """Mark a single notification as read"""
+    try:
+        updated = Notification.mark_read(current_principal().id, ids=[notification_id])
+        db.session.commit()
+        
+        return jsonify({'message': 'Notification marked as read', 'updated': updated}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@notification_bp.route('/mark-read', methods=['POST'])
+@jwt_required()
+def mark_notifications_read():
+    """Mark notifications read by id list, by created_at cutoff, or all of them"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        ids = data.get('ids')
+        if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)):
+            return jsonify({'error': 'ids must be a list of integers'}), 400
+        
+        before = None
+        if data.get('before'):
+            try:
+                before = datetime.fromisoformat(data['before'])
+            except ValueError:
+                return jsonify({'error': 'Invalid before timestamp. Use ISO 8601'}), 400
+        
+        updated = Notification.mark_read(current_principal().id, ids=ids, before=before)
+        db.session.commit()
+        
+        return jsonify({'message': 'Notifications marked as read', 'updated': updated}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@notification_bp.route('/broadcast', methods=['POST'])
+@jwt_required()
+@role_required('admin', 'principal_secretary')
+def broadcast_notification():
+    """Send a notification to a set of users, a department, a role, or everyone"""
+    try:
+        data = request.get_json() or {}
+        
+        if not data.get('title') or not data.get('message'):
+            return jsonify({'error': 'title and message are required'}), 400
+        
+        user_ids = data.get('user_ids')
+        if user_ids is not None and (not isinstance(user_ids, list) or not all(isinstance(i, int) for i in user_ids)):
+            return jsonify({'error': 'user_ids must be a list of integers'}), 400
+        
+        created = Notification.fan_out(
+            title=data['title'],
+            message=data['message'],
+            notification_type=data.get('notification_type', 'system'),
+            user_ids=user_ids,
+            department_id=data.get('department_id'),
+            role=data.get('role')
+        )
+        db.session.commit()
+        
+        return jsonify({'message': 'Notification sent', 'recipients': created}), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@notification_bp.route('/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_events():
+    """
+    Server-Sent Events: notification, unread_count, leave_status and resync.
+
+    EventSource cannot set headers, so the token may also be passed as ?jwt=.
+    The stream ends when the token expires; the browser reconnects with
+    Last-Event-ID and missed events are replayed.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    stream = event_broker.stream(current_principal().id, last_event_id, expires_at=get_jwt().get('exp'))
+    return Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
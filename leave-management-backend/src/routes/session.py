@@ -0,0 +1,103 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from datetime import datetime, timezone
+from src.extensions import db, token_blocklist, session_tracker
+from src.models.login_session import LoginSession
+from src.models.user import User
+from src.utils.principal import current_principal
+
+session_bp = Blueprint('session', __name__)
+
+ADMIN_ROLES = ['admin', 'principal_secretary']
+
+def can_manage_sessions(user_id):
+    """Admins manage everyone's sessions; other users only their own"""
+    principal = current_principal()
+    return principal.has_role(*ADMIN_ROLES) or principal.id == user_id
+
+def revoke_sessions(sessions):
+    """Deactivate sessions and blocklist their tokens; the caller commits"""
+    for login_session in sessions:
+        login_session.is_active = False
+        token_blocklist.revoke(
+            jti=login_session.session_token,
+            expires_at=login_session.expires_at,
+            user_id=login_session.user_id
+        )
+        session_tracker.discard(login_session.session_token)
+
+@session_bp.route('/user/<int:user_id>', methods=['GET'])
+@jwt_required()
+def get_user_sessions(user_id):
+    """List a user's login sessions"""
+    try:
+        if not can_manage_sessions(user_id):
+            return jsonify({'error': 'Insufficient permissions'}), 403
+
+        # Make buffered activity visible before reporting it
+        session_tracker.flush()
+
+        query = LoginSession.query.filter_by(user_id=user_id)
+        if request.args.get('include_inactive', 'false').lower() not in ['true', '1']:
+            query = query.filter(
+                LoginSession.is_active.is_(True),
+                LoginSession.expires_at > datetime.now(timezone.utc)
+            )
+        sessions = query.order_by(LoginSession.created_at.desc()).all()
+
+        return jsonify({
+            'sessions': [login_session.to_dict() for login_session in sessions]
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@session_bp.route('/<int:session_id>', methods=['DELETE'])
+@jwt_required()
+def revoke_session(session_id):
+    """Force logout of a single session"""
+    try:
+        login_session = LoginSession.query.get_or_404(session_id)
+
+        if not can_manage_sessions(login_session.user_id):
+            return jsonify({'error': 'Insufficient permissions'}), 403
+
+        if not login_session.is_active:
+            return jsonify({'message': 'Session already revoked'}), 200
+
+        revoke_sessions([login_session])
+        db.session.commit()
+
+        return jsonify({'message': 'Session revoked successfully'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@session_bp.route('/user/<int:user_id>/revoke', methods=['POST'])
+@jwt_required()
+def revoke_user_sessions(user_id):
+    """Force logout of every active session of a user"""
+    try:
+        if not current_principal().has_role(*ADMIN_ROLES):
+            return jsonify({'error': 'Insufficient permissions'}), 403
+
+        if not db.session.get(User, user_id):
+            return jsonify({'error': 'User not found'}), 404
+
+        sessions = LoginSession.query.filter(
+            LoginSession.user_id == user_id,
+            LoginSession.is_active.is_(True),
+            LoginSession.expires_at > datetime.now(timezone.utc)
+        ).all()
+        revoke_sessions(sessions)
+        db.session.commit()
+
+        return jsonify({
+            'message': 'Sessions revoked successfully',
+            'revoked': len(sessions)
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -1,6 +1,9 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from src.models.user import User, db
+from src.models.user import User, EMAIL_DELIVERY_MODES, db
+from src.utils.provisioning import parse_roster, provision_users, summarize
+from src.utils.principal import current_principal, current_user, current_user_profile, invalidate_user_profile, role_required
+from src.utils.read_replica import read_replica
 
 user_bp = Blueprint('user', __name__)
 
@@ -8,13 +11,12 @@ user_bp = Blueprint('user', __name__)
 @jwt_required()
 def get_profile():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        profile = current_user_profile()
         
-        if not user:
+        if not profile:
             return jsonify({'error': 'User not found'}), 404
         
-        return jsonify({'user': user.to_dict()}), 200
+        return jsonify({'user': profile}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -23,8 +25,7 @@ def get_profile():
 @jwt_required()
 def update_profile():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -42,13 +43,18 @@ def update_profile():
             # Check if email is already taken by another user
             existing_user = User.query.filter(
                 User.email == data['email'],
-                User.id != user_id
+                User.id != user.id
             ).first()
             if existing_user:
                 return jsonify({'error': 'Email already taken'}), 400
             user.email = data['email']
+        if 'email_delivery' in data:
+            if data['email_delivery'] not in EMAIL_DELIVERY_MODES:
+                return jsonify({'error': f"email_delivery must be one of {', '.join(EMAIL_DELIVERY_MODES)}"}), 400
+            user.email_delivery = data['email_delivery']
         
         db.session.commit()
+        invalidate_user_profile(user.id)
         
         return jsonify({
             'message': 'Profile updated successfully',
@@ -61,9 +67,10 @@ def update_profile():
 
 @user_bp.route('/available-for-handover', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_available_for_handover():
     try:
-        user_id = get_jwt_identity()
+        user_id = current_principal().id
         
         # Get query parameters for date range
         start_date_str = request.args.get('start_date')
@@ -83,7 +90,7 @@ def get_available_for_handover():
         all_users = User.query.filter(User.id != user_id).all()
         
         # Find users who are on approved leave during the specified period
-        from src.models.leave import LeaveApplication
+        from src.models.leave_application import LeaveApplication
         from sqlalchemy import and_, or_
         
         unavailable_user_ids = db.session.query(LeaveApplication.user_id).filter(
@@ -116,18 +123,11 @@ def get_available_for_handover():
 
 @user_bp.route('/all', methods=['GET'])
 @jwt_required()
+@role_required('hod', 'principal_secretary', message='Unauthorized')
+@read_replica
 def get_all_users():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
         # Only HODs and Principal Secretary can view all users
-        if user.role not in ['hod', 'principal_secretary']:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         users = User.query.all()
         return jsonify({
             'users': [user.to_dict() for user in users]
@@ -136,3 +136,31 @@ def get_all_users():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+
+
+@user_bp.route('/batch', methods=['POST'])
+@jwt_required()
+@role_required('admin', 'principal_secretary')
+def batch_provision_users():
+    """Create many users from an uploaded roster (CSV/JSON file or JSON body)"""
+    try:
+        roster = request.files.get('roster')
+        if roster:
+            rows = parse_roster(roster.stream, roster.filename or '')
+        else:
+            data = request.get_json(silent=True) or {}
+            rows = data.get('users')
+        
+        if not rows or not isinstance(rows, list):
+            return jsonify({'error': 'A roster file or a users list is required'}), 400
+        
+        results = provision_users(rows)
+        
+        return jsonify({
+            'summary': summarize(results),
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
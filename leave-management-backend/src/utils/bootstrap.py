@@ -0,0 +1,214 @@
+import json
+from datetime import datetime, timezone
+
+import click
+from sqlalchemy import inspect, select
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from src.extensions import db
+
+LEAVE_TYPES = [
+    {'name': 'Annual Leave', 'description': 'Annual vacation leave', 'max_days': 30, 'exclude_weekends': True},
+    {'name': 'Maternity Leave', 'description': 'Leave for childbirth', 'max_days': 90, 'exclude_weekends': True},
+    {'name': 'Paternity Leave', 'description': 'Leave for new fathers', 'max_days': 14, 'exclude_weekends': True},
+    {'name': 'Sick Leave', 'description': 'Leave for medical reasons', 'max_days': 14, 'exclude_weekends': True},
+    {'name': 'Bereavement Leave', 'description': 'Leave for bereavement', 'max_days': 4, 'exclude_weekends': True},
+    {'name': 'Study Leave (Short Term)', 'description': 'Short-term study leave', 'max_days': 10, 'exclude_weekends': True},
+    {'name': 'Study Leave (Long Term)', 'description': 'Long-term study leave', 'max_days': 502, 'exclude_weekends': True},
+]
+
+ADMIN_EMAIL = 'admin@ict.go.ke'
+
+
+class SchemaOutOfDate(RuntimeError):
+    """Raised when the database lacks tables, columns or indexes the models define"""
+
+
+def read_schema_state():
+    """(schema_version, seed_version) of this database; (0, 0) before `flask init-db`"""
+    from src.models.schema_state import SchemaState
+
+    try:
+        row = db.session.execute(
+            select(SchemaState.schema_version, SchemaState.seed_version).where(SchemaState.id == SchemaState.ROW_ID)
+        ).first()
+    except (OperationalError, ProgrammingError):
+        # No schema_state table yet
+        db.session.rollback()
+        return 0, 0
+    db.session.rollback()
+    return (row.schema_version, row.seed_version) if row else (0, 0)
+
+
+def _stamp(**versions):
+    from src.models.schema_state import SchemaState
+
+    state = db.session.get(SchemaState, SchemaState.ROW_ID)
+    if state is None:
+        state = SchemaState(id=SchemaState.ROW_ID, schema_version=0, seed_version=0)
+        db.session.add(state)
+    for key, value in versions.items():
+        setattr(state, key, value)
+    state.updated_at = datetime.now(timezone.utc)
+    db.session.commit()
+
+
+def schema_drift():
+    """
+    What the models define but the database lacks.
+
+    Returns {'tables': [...], 'columns': [...], 'indexes': [...]}, with
+    columns and indexes as 'table.name'; every list is empty when the
+    database matches the models.
+    """
+    import src.models  # register every model's table
+
+    inspector = inspect(db.engine)
+    existing = set(inspector.get_table_names())
+    drift = {'tables': [], 'columns': [], 'indexes': []}
+    for table in db.metadata.tables.values():
+        if table.name not in existing:
+            drift['tables'].append(table.name)
+            continue
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        drift['columns'].extend(f'{table.name}.{column.name}' for column in table.columns if column.name not in columns)
+        indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        drift['indexes'].extend(f'{table.name}.{index.name}' for index in table.indexes if index.name not in indexes)
+    return drift
+
+
+def _describe_drift(drift):
+    return '; '.join(f"missing {kind}: {', '.join(names)}" for kind, names in drift.items() if names)
+
+
+def init_schema():
+    """
+    Create any missing tables and indexes and record SCHEMA_VERSION.
+
+    create_all() never alters existing tables; changes to those ship as
+    migrations (`flask db upgrade`). The version is only recorded once the
+    database has every table, column and index the models define, so a
+    database that still needs migrations raises SchemaOutOfDate instead.
+    """
+    import src.models  # register every model's table
+    from src.models.schema_state import SCHEMA_VERSION
+
+    db.configure_mappers()
+    db.create_all()
+    drift = schema_drift()
+    if any(drift.values()):
+        raise SchemaOutOfDate(f"Database does not match the models ({_describe_drift(drift)}); run `flask db upgrade`")
+    _stamp(schema_version=SCHEMA_VERSION)
+    return SCHEMA_VERSION
+
+
+def seed_initial_data():
+    """
+    Insert the standard leave types and the initial administrator if missing.
+
+    Idempotent: existing rows are left alone. Records SEED_VERSION and
+    returns {'leave_types': created, 'admin_created': bool}.
+    """
+    from src.models.leave_type import LeaveType
+    from src.models.schema_state import SEED_VERSION
+    from src.models.user import User
+
+    try:
+        existing = set(db.session.execute(select(LeaveType.name)).scalars())
+        created_types = [LeaveType(**data) for data in LEAVE_TYPES if data['name'] not in existing]
+        db.session.add_all(created_types)
+
+        superuser = None
+        if db.session.execute(select(User.id).where(User.email == ADMIN_EMAIL)).first() is None:
+            superuser = User(
+                employee_number='000001',
+                email=ADMIN_EMAIL,
+                phone_number='+254706356836',
+                first_name='System',
+                last_name='Administrator',
+                role='principal_secretary', # Super Admin role number
+                is_active=True
+            )
+            superuser.set_password('admin123')  # Change this in production
+            db.session.add(superuser)
+        db.session.commit()
+
+        if superuser is not None:
+            superuser.init_leave_balances()
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    _stamp(seed_version=SEED_VERSION)
+    return {'leave_types': len(created_types), 'admin_created': superuser is not None}
+
+
+def check_schema(app):
+    """
+    Boot-time check: one read of the schema_state row.
+
+    An out-of-date database is logged, or brought up to date when
+    DATABASE_AUTO_INIT is set (development only: several workers booting
+    at once would race each other). If the recorded version is behind and
+    existing tables lack model columns, which only migrations can add,
+    SchemaOutOfDate is raised and the app refuses to serve; CLI commands
+    other than `flask run` only log it.
+    """
+    from src.models.schema_state import SCHEMA_VERSION, SEED_VERSION
+
+    with app.app_context():
+        schema_version, seed_version = read_schema_state()
+        if schema_version < SCHEMA_VERSION:
+            missing = schema_drift()['columns']
+            if missing:
+                message = f"Database is missing columns {', '.join(missing)}; run `flask db upgrade` and `flask init-db`"
+                command = click.get_current_context(silent=True)
+                if command is None or command.info_name == 'run':
+                    raise SchemaOutOfDate(message)
+                # Other CLI commands (db upgrade, init-db) still load the app so the database can be fixed
+                app.logger.error(message)
+        if schema_version < SCHEMA_VERSION or seed_version < SEED_VERSION:
+            if app.config.get('DATABASE_AUTO_INIT'):
+                if schema_version < SCHEMA_VERSION:
+                    schema_version = init_schema()
+                seed_initial_data()
+                schema_version, seed_version = read_schema_state()
+            else:
+                app.logger.error(
+                    f"Database schema is at version {schema_version} (seed {seed_version}), "
+                    f"expected {SCHEMA_VERSION} (seed {SEED_VERSION}); run `flask init-db` and `flask seed-data`"
+                )
+        app.extensions['schema_state'] = {
+            'schema_version': schema_version,
+            'seed_version': seed_version,
+            'current': schema_version >= SCHEMA_VERSION and seed_version >= SEED_VERSION
+        }
+
+
+def _echo_seed_result(result):
+    if result['admin_created']:
+        click.echo(f"Created administrator {ADMIN_EMAIL} (employee number 000001, password admin123); "
+                   "change the password after first login.", err=True)
+
+
+@click.command('init-db')
+@click.option('--seed/--no-seed', default=True, help='Also insert the initial data (default: yes).')
+def init_db_command(seed):
+    """Create missing tables and record the schema version."""
+    try:
+        result = {'schema_version': init_schema()}
+    except SchemaOutOfDate as e:
+        raise click.ClickException(str(e))
+    if seed:
+        result.update(seed_initial_data())
+        _echo_seed_result(result)
+    click.echo(json.dumps(result))
+
+
+@click.command('seed-data')
+def seed_data_command():
+    """Insert the standard leave types and the initial administrator if missing."""
+    result = seed_initial_data()
+    _echo_seed_result(result)
+    click.echo(json.dumps(result))
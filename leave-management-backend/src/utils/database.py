@@ -0,0 +1,111 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from src.extensions import db
+from src.utils.read_replica import REPLICA_BIND
+
+# PRAGMAs applied to every new SQLite connection: (config key, pragma)
+SQLITE_PRAGMAS = [
+    ('SQLITE_JOURNAL_MODE', 'journal_mode'),
+    ('SQLITE_SYNCHRONOUS', 'synchronous'),
+    ('SQLITE_BUSY_TIMEOUT_MS', 'busy_timeout'),
+    ('SQLITE_MMAP_SIZE', 'mmap_size'),
+    ('SQLITE_CACHE_SIZE', 'cache_size'),
+]
+
+
+def _is_memory(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(config):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the configured database.
+
+    Server databases get a sized, pre-pinged, recycled connection pool.
+    File-backed SQLite gets the same pool size so request threads do not
+    queue for a connection; in-memory SQLite keeps Flask-SQLAlchemy's
+    single static connection.
+    """
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if _is_memory(url):
+        return options
+
+    options.setdefault('pool_size', config.get('DATABASE_POOL_SIZE', 10))
+    options.setdefault('max_overflow', config.get('DATABASE_MAX_OVERFLOW', 20))
+    options.setdefault('pool_timeout', config.get('DATABASE_POOL_TIMEOUT', 30))
+    if url.get_backend_name() != 'sqlite':
+        options.setdefault('pool_pre_ping', config.get('DATABASE_POOL_PRE_PING', True))
+        options.setdefault('pool_recycle', config.get('DATABASE_POOL_RECYCLE', 1800))
+    return options
+
+
+def _pragma_listener(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in pragmas:
+                cursor.execute(f'PRAGMA {pragma} = {value}')
+        finally:
+            cursor.close()
+    return set_pragmas
+
+
+def init_database(app):
+    """
+    Initialise Flask-SQLAlchemy with tuned engine settings.
+
+    For SQLite, WAL lets readers proceed while a writer commits, and
+    busy_timeout makes a blocked writer wait for the lock instead of
+    failing with "database is locked". synchronous=NORMAL is durable
+    across application crashes in WAL mode and skips an fsync per commit.
+    Logs the settings each engine actually ended up with.
+    """
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    db.init_app(app)
+
+    pragmas = [
+        (pragma, app.config[key]) for key, pragma in SQLITE_PRAGMAS
+        if app.config.get(key) not in (None, '')
+    ]
+    with app.app_context():
+        for bind, engine in db.engines.items():
+            if engine.dialect.name != 'sqlite' or not pragmas:
+                continue
+            skip = ()
+            if _is_memory(engine.url):
+                # WAL and mmap do not apply to in-memory databases
+                skip = ('journal_mode', 'mmap_size')
+            elif bind == REPLICA_BIND:
+                # The replica is read-only; its journal mode belongs to whoever writes it
+                skip = ('journal_mode',)
+            event.listen(engine, 'connect', _pragma_listener([(p, v) for p, v in pragmas if p not in skip]))
+        app.extensions['database_settings'] = check_database_settings(app)
+
+
+def check_database_settings(app):
+    """Read back the effective settings of every engine and log them"""
+    settings = {}
+    for bind, engine in db.engines.items():
+        effective = {'dialect': engine.dialect.name, 'pool': type(engine.pool).__name__}
+        for option in ('pool_size', 'max_overflow', 'pool_timeout', 'pool_pre_ping', 'pool_recycle'):
+            if option in app.config['SQLALCHEMY_ENGINE_OPTIONS']:
+                effective[option] = app.config['SQLALCHEMY_ENGINE_OPTIONS'][option]
+        try:
+            if engine.dialect.name == 'sqlite':
+                with engine.connect() as connection:
+                    for _, pragma in SQLITE_PRAGMAS:
+                        effective[pragma] = connection.exec_driver_sql(f'PRAGMA {pragma}').scalar()
+        except Exception as e:
+            app.logger.warning(f"Database self-check failed for {bind or 'default'} bind: {str(e)}")
+            continue
+
+        wanted = str(app.config.get('SQLITE_JOURNAL_MODE') or '').lower()
+        if engine.dialect.name == 'sqlite' and wanted and not _is_memory(engine.url) and bind != REPLICA_BIND \
+                and str(effective['journal_mode']).lower() != wanted:
+            # e.g. the file is on a network share, which cannot use WAL
+            app.logger.warning(f"SQLite journal_mode is {effective['journal_mode']}, not {wanted}")
+        app.logger.info(f"Database ({bind or 'default'}): " + ', '.join(f'{k}={v}' for k, v in effective.items()))
+        settings[bind or 'default'] = effective
+    return settings
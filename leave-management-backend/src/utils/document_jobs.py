@@ -0,0 +1,242 @@
+import multiprocessing
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Database URLs by bind key, set in each worker process by the pool initializer
+_worker_database_urls = {}
+
+
+def _init_worker(database_urls):
+    _worker_database_urls.update(database_urls)
+
+
+def worker_database_url(bind=None):
+    """URL of the app database for bind, for jobs that query it from a worker process"""
+    return _worker_database_urls[bind]
+
+
+class JobQueueFull(Exception):
+    """Raised when DOCUMENT_JOB_MAX_PENDING jobs are already queued or running"""
+
+
+class DocumentJob:
+    __slots__ = ('id', 'owner_id', 'kind', 'filename', 'mimetype', 'func', 'args', 'status', 'error',
+                 'result', 'cache_key', 'local', 'created_at', 'started_at', 'finished_at', 'future')
+
+    def __init__(self, owner_id, kind, filename, mimetype, func, args, cache_key=None, local=False):
+        self.id = secrets.token_urlsafe(12)
+        self.owner_id = owner_id
+        self.kind = kind
+        self.filename = filename
+        self.mimetype = mimetype
+        self.func = func
+        self.args = args
+        self.cache_key = cache_key
+        self.local = local
+        self.status = 'queued'
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'error': self.error,
+            'filename': self.filename,
+            'size': len(self.result) if self.result is not None else None,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+
+
+class DocumentJobManager:
+    """
+    Renders documents off the request thread in a bounded process pool.
+
+    ReportLab rendering is CPU-bound, so it runs in DOCUMENT_JOB_WORKERS
+    processes instead of web threads. Job payloads are plain data extracted
+    in the request; jobs that read the database name a bind rather than
+    carrying a URL, and workers receive the URLs once at startup, so
+    credentials never appear in job arguments. Submissions beyond
+    DOCUMENT_JOB_MAX_PENDING are refused. A job running past
+    DOCUMENT_JOB_TIMEOUT_SECONDS is failed; its worker cannot be interrupted,
+    so the pool is replaced and any other running jobs are resubmitted.
+    Finished results are kept for DOCUMENT_JOB_RESULT_TTL_SECONDS.
+
+    Local jobs (bulk exports) run on DOCUMENT_JOB_EXPORT_THREADS threads in
+    this process with an app context, so they can read the database and the
+    PDF cache; they hand each render to the pool through run(), whose
+    renders are timed out one by one.
+
+    Job state lives in this process; with several web workers, route job
+    polling to the worker that accepted the job (or run one worker).
+    """
+
+    def __init__(self, app=None):
+        self.workers = 2
+        self.max_pending = 32
+        self.timeout = 300
+        self.result_ttl = 900
+        self.export_threads = 1
+        self.app = None
+        self._jobs = {}
+        self._pool = None
+        self._threads = None
+        self._database_urls = {}
+        self._lock = threading.RLock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from src.extensions import db
+
+        self.app = app
+        self.workers = app.config.get('DOCUMENT_JOB_WORKERS', self.workers)
+        self.max_pending = app.config.get('DOCUMENT_JOB_MAX_PENDING', self.max_pending)
+        self.timeout = app.config.get('DOCUMENT_JOB_TIMEOUT_SECONDS', self.timeout)
+        self.result_ttl = app.config.get('DOCUMENT_JOB_RESULT_TTL_SECONDS', self.result_ttl)
+        self.export_threads = app.config.get('DOCUMENT_JOB_EXPORT_THREADS', self.export_threads)
+        with app.app_context():
+            self._database_urls = {
+                key: engine.url.render_as_string(hide_password=False) for key, engine in db.engines.items()
+            }
+        app.extensions['document_jobs'] = self
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn: never fork a process holding DB connections and web threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self._database_urls,)
+            )
+        return self._pool
+
+    def _pool_submit(self, func, *args):
+        try:
+            return self._get_pool().submit(func, *args)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool rather than failing every later render
+            pool, self._pool = self._pool, None
+            pool.shutdown(wait=False, cancel_futures=True)
+            return self._get_pool().submit(func, *args)
+
+    def _run_local(self, func, args):
+        with self.app.app_context():
+            return func(*args)
+
+    def _start(self, job):
+        job.status = 'queued'
+        job.started_at = time.time()
+        try:
+            if job.local:
+                if self._threads is None:
+                    self._threads = ThreadPoolExecutor(max_workers=self.export_threads, thread_name_prefix='document-export')
+                job.future = self._threads.submit(self._run_local, job.func, job.args)
+            else:
+                job.future = self._pool_submit(job.func, *job.args)
+        except Exception as e:
+            job.status, job.error, job.finished_at = 'failed', f'Could not start: {str(e) or type(e).__name__}', time.time()
+            job.args, job.future = None, None
+            return
+        job.future.add_done_callback(lambda future, job=job: self._finish(job, future))
+
+    def _finish(self, job, future):
+        from src.extensions import pdf_cache
+
+        with self._lock:
+            if job.future is not future or job.status not in ('queued', 'running'):
+                # Superseded by a resubmission or already timed out
+                return
+            job.finished_at = time.time()
+            if future.cancelled():
+                job.status, job.error = 'failed', 'Cancelled'
+            elif future.exception() is not None:
+                job.status, job.error = 'failed', str(future.exception()) or type(future.exception()).__name__
+            else:
+                job.status, job.result = 'done', future.result()
+            job.args = None
+        if job.status == 'done' and job.cache_key:
+            pdf_cache.put(job.cache_key, job.result)
+
+    def submit(self, owner_id, kind, filename, func, *args, mimetype='application/pdf', cache_key=None, local=False):
+        """
+        Queue func(*args) and return the job; raises JobQueueFull when at
+        capacity. local=True runs func on an export thread instead of the pool.
+        """
+        with self._lock:
+            self._reap()
+            active = sum(1 for job in self._jobs.values() if job.status in ('queued', 'running'))
+            if active >= self.max_pending:
+                raise JobQueueFull(f'{active} document jobs already pending')
+            job = DocumentJob(owner_id, kind, filename, mimetype, func, args, cache_key, local)
+            self._jobs[job.id] = job
+            self._start(job)
+            return job
+
+    def run(self, func, *args):
+        """
+        Submit func(*args) to the render pool without job tracking and return
+        the future. For callers that consume results themselves (bulk export).
+        """
+        with self._lock:
+            return self._pool_submit(func, *args)
+
+    def completed(self, owner_id, kind, filename, result, mimetype='application/pdf'):
+        """Record a job whose result was already available (e.g. from the PDF cache)"""
+        job = DocumentJob(owner_id, kind, filename, mimetype, None, None)
+        job.status, job.result = 'done', result
+        job.started_at = job.finished_at = job.created_at
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._reap()
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == 'queued' and job.future is not None and job.future.running():
+                job.status = 'running'
+            return job
+
+    def _reap(self):
+        """Expire old results and fail jobs that ran past the timeout"""
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.result_ttl:
+                del self._jobs[job_id]
+
+        timed_out = [
+            job for job in self._jobs.values()
+            if job.status in ('queued', 'running') and job.future is not None and not job.local
+            and job.future.running() and now - job.started_at > self.timeout
+        ]
+        if not timed_out:
+            return
+        for job in timed_out:
+            job.status, job.error, job.finished_at, job.args = 'failed', 'Timed out', now, None
+
+        # Stuck workers cannot be stopped individually; replace the pool
+        pool, self._pool = self._pool, None
+        for process in list(getattr(pool, '_processes', {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        for job in self._jobs.values():
+            if job.status in ('queued', 'running') and not job.local:
+                self._start(job)
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
@@ -0,0 +1,135 @@
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+
+from flask import current_app
+from sqlalchemy import delete, insert, select
+
+from src.extensions import db
+from src.models.email_digest_item import EmailDigestItem
+from src.models.email_outbox import EmailOutbox
+from src.models.user import User
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+DELETE_BATCH_SIZE = 500
+
+
+def queue_email(to_email, subject, body):
+    """
+    Route an email by the recipient's delivery preference: straight to the
+    outbox, or held as a digest item. Joins the caller's transaction.
+    """
+    recipient = db.session.execute(
+        select(User.id, User.email_delivery).where(User.email == to_email)
+    ).first()
+    if recipient is not None and recipient.email_delivery != 'immediate':
+        item = EmailDigestItem(user_id=recipient.id, subject=subject, body=body)
+        db.session.add(item)
+        return item
+    return EmailOutbox.enqueue(subject, [to_email], body)
+
+
+def window_start(frequency, now, daily_hour=5):
+    """Start of the current digest window; items created before it are due"""
+    if frequency == 'hourly':
+        return now.replace(minute=0, second=0, microsecond=0)
+    if frequency == 'daily':
+        start = now.replace(hour=daily_hour, minute=0, second=0, microsecond=0)
+        return start if start <= now else start - timedelta(days=1)
+    # Users who switched back to immediate get their held items right away
+    return now
+
+
+def render_digest(user, frequency, items):
+    """One message for all of a user's due items"""
+    if len(items) == 1:
+        return items[0].subject, items[0].body
+    subject = f"{len(items)} leave management updates"
+    period = {'hourly': 'the last hour', 'daily': 'the last day'}.get(frequency, 'recently')
+    sections = [
+        f"{item.subject}\n{'-' * len(item.subject)}\n{item.body}"
+        for item in items
+    ]
+    body = (
+        f"Hello {user.first_name},\n\n"
+        f"Here is what happened in {period}:\n\n"
+        + "\n\n".join(sections)
+        + "\n\nRegards,\nLeave Management System"
+    )
+    return subject, body
+
+
+def build_digests(now=None):
+    """
+    Turn every due digest item into one outbox message per recipient.
+
+    Runs in bulk: one query per delivery mode, one executemany INSERT into
+    the outbox, batched DELETEs of the consumed items, and a single commit.
+    Returns {'digests': messages written, 'items': items consumed}.
+    """
+    now = now or datetime.now(timezone.utc)
+    daily_hour = current_app.config.get('EMAIL_DIGEST_DAILY_HOUR', 5)
+
+    outbox_rows = []
+    consumed = []
+    for frequency in ('immediate', 'hourly', 'daily'):
+        cutoff = window_start(frequency, now, daily_hour)
+        rows = db.session.execute(
+            select(EmailDigestItem, User)
+            .join(User, User.id == EmailDigestItem.user_id)
+            .where(User.email_delivery == frequency, EmailDigestItem.created_at < cutoff)
+            .order_by(EmailDigestItem.user_id, EmailDigestItem.created_at)
+        ).all()
+        for _, group in groupby(rows, key=lambda row: row[0].user_id):
+            group = list(group)
+            user = group[0][1]
+            items = [item for item, _ in group]
+            subject, body = render_digest(user, frequency, items)
+            outbox_rows.append({
+                'recipients': json.dumps([user.email]),
+                'subject': subject[:255],
+                'body': body,
+                'status': EmailOutbox.STATUS_PENDING,
+                'attempts': 0,
+                'created_at': now,
+                'next_attempt_at': now
+            })
+            consumed.extend(item.id for item in items)
+
+    if not outbox_rows:
+        db.session.rollback()
+        return {'digests': 0, 'items': 0}
+
+    try:
+        deleted = 0
+        for i in range(0, len(consumed), DELETE_BATCH_SIZE):
+            deleted += db.session.execute(
+                delete(EmailDigestItem).where(EmailDigestItem.id.in_(consumed[i:i + DELETE_BATCH_SIZE]))
+            ).rowcount
+        if deleted != len(consumed):
+            # Another worker built these digests first
+            db.session.rollback()
+            return {'digests': 0, 'items': 0}
+        db.session.execute(insert(EmailOutbox), outbox_rows)
+        db.session.info['email_outbox_pending'] = True
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {'digests': len(outbox_rows), 'items': len(consumed)}
+
+
+_last_window = None
+_window_lock = threading.Lock()
+
+def build_digests_if_due():
+    """Called from the outbox worker loop; builds digests once per hour boundary"""
+    global _last_window
+    now = datetime.now(timezone.utc)
+    window = now.replace(minute=0, second=0, microsecond=0)
+    with _window_lock:
+        if window == _last_window:
+            return None
+        _last_window = window
+    return build_digests(now)
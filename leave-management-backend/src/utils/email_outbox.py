@@ -0,0 +1,379 @@
+import json
+import random
+import secrets
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import and_, bindparam, delete, func, or_, select, update
+from sqlalchemy import event as sa_event
+
+
+def _connection_lost(error):
+    """
+    Whether an error leaves the SMTP connection unusable for the rest of a batch.
+
+    SMTPException subclasses OSError, so a plain OSError check would also
+    catch per-message replies (SMTPRecipientsRefused, SMTPSenderRefused,
+    SMTPDataError); only disconnects, 421 "closing channel" replies and
+    socket errors end the batch.
+    """
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class EmailOutboxWorker:
+    """
+    Drains email_outbox in the background.
+
+    Messages are claimed in batches with a compare-and-set UPDATE, so several
+    workers (or processes) can drain the same table without sending twice.
+    Each batch is sent over one SMTP connection. Failed messages are retried
+    with exponential backoff and marked dead after EMAIL_OUTBOX_MAX_ATTEMPTS.
+    Claims older than EMAIL_OUTBOX_LEASE_SECONDS are taken over, so a crashed
+    worker's batch is eventually retried; a live worker renews its claim
+    while it sends, so a slow batch is not taken over and sent twice.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = True
+        self.batch_size = 50
+        self.poll_interval = 30
+        self.max_attempts = 6
+        self.backoff = 30
+        self.max_backoff = 3600
+        self.lease = 300
+        self.keep_sent_days = 7
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self._stats = {
+            'sent_total': 0,
+            'failed_total': 0,
+            'dead_total': 0,
+            'batches_total': 0,
+            'send_seconds_sum': 0.0,
+            'send_seconds_max': 0.0
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from src.extensions import db
+
+        self.app = app
+        self.enabled = app.config.get('EMAIL_OUTBOX_WORKER', True)
+        self.batch_size = app.config.get('EMAIL_OUTBOX_BATCH_SIZE', 50)
+        self.poll_interval = app.config.get('EMAIL_OUTBOX_POLL_SECONDS', 30)
+        self.max_attempts = app.config.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+        self.backoff = app.config.get('EMAIL_OUTBOX_BACKOFF_SECONDS', 30)
+        self.max_backoff = app.config.get('EMAIL_OUTBOX_MAX_BACKOFF_SECONDS', 3600)
+        self.lease = app.config.get('EMAIL_OUTBOX_LEASE_SECONDS', 300)
+        self.keep_sent_days = app.config.get('EMAIL_OUTBOX_KEEP_SENT_DAYS', 7)
+
+        if self.enabled:
+            # Started on first request rather than at import so CLI commands stay quiet
+            app.before_request(self.start)
+        if not sa_event.contains(db.session, 'after_commit', self._after_commit):
+            sa_event.listen(db.session, 'after_commit', self._after_commit)
+        app.extensions['email_outbox'] = self
+
+    def _after_commit(self, session):
+        if session.info.pop('email_outbox_pending', False):
+            self.wake()
+
+    def start(self):
+        if self._thread is not None or not self.enabled:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        """Ask the worker to drain now instead of at the next poll"""
+        if self.enabled:
+            self.start()
+            self._wake.set()
+
+    def _run(self):
+        from src.extensions import db
+
+        while True:
+            with self.app.app_context():
+                try:
+                    from src.utils.email_digest import build_digests_if_due
+                    build_digests_if_due()
+                    self.drain()
+                except Exception as e:
+                    current_app.logger.error(f"Email outbox drain failed: {str(e)}")
+                finally:
+                    db.session.remove()
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    # Draining
+
+    def _due(self, table, now):
+        return or_(
+            and_(table.c.status == 'pending', table.c.next_attempt_at <= now),
+            and_(table.c.status == 'sending', table.c.claimed_at < now - timedelta(seconds=self.lease))
+        )
+
+    def claim(self, batch_size=None):
+        """Claim up to batch_size due messages for this worker; returns their rows"""
+        from src.extensions import db
+        from src.models.email_outbox import EmailOutbox
+
+        table = EmailOutbox.__table__
+        now = datetime.now(timezone.utc)
+        ids = db.session.execute(
+            select(table.c.id).where(self._due(table, now))
+            .order_by(table.c.next_attempt_at)
+            .limit(batch_size or self.batch_size)
+        ).scalars().all()
+        if not ids:
+            db.session.rollback()
+            return []
+
+        token = secrets.token_hex(16)
+        # Re-checking the due condition makes the claim a compare-and-set
+        db.session.execute(
+            update(table)
+            .where(table.c.id.in_(ids), self._due(table, now))
+            .values(status='sending', claim_token=token, claimed_at=now)
+        )
+        db.session.commit()
+        return db.session.execute(
+            select(table).where(table.c.claim_token == token)
+        ).mappings().all()
+
+    def _renew(self, token):
+        """Extend this worker's claim; False if another worker has taken the batch over"""
+        from src.extensions import db
+        from src.models.email_outbox import EmailOutbox
+
+        table = EmailOutbox.__table__
+        renewed = db.session.execute(
+            update(table)
+            .where(table.c.claim_token == token, table.c.status == 'sending')
+            .values(claimed_at=datetime.now(timezone.utc))
+        ).rowcount
+        db.session.commit()
+        return renewed > 0
+
+    def _send_batch(self, rows):
+        """
+        Send rows over one SMTP connection; returns (sent_ids, {id: error}).
+
+        The claim is renewed every third of the lease. If it was taken over
+        meanwhile, the rest of the batch is left to the new owner.
+        """
+        from src.extensions import mail
+
+        sent, failed = [], {}
+        pending = list(rows)
+        renewed_at = time.monotonic()
+        try:
+            with mail.connect() as connection:
+                while pending:
+                    row = pending[0]
+                    if time.monotonic() - renewed_at > self.lease / 3:
+                        if not self._renew(row['claim_token']):
+                            current_app.logger.warning(
+                                f"Email outbox: claim taken over, leaving {len(pending)} messages to another worker"
+                            )
+                            return sent, failed
+                        renewed_at = time.monotonic()
+                    started = time.perf_counter()
+                    try:
+                        connection.send(Message(
+                            subject=row['subject'],
+                            recipients=json.loads(row['recipients']),
+                            body=row['body'],
+                            html=row['html']
+                        ))
+                    except Exception as e:
+                        if _connection_lost(e):
+                            raise
+                        # Refused recipient, sender or data: only this message failed
+                        failed[row['id']] = str(e)
+                    else:
+                        sent.append(row['id'])
+                        self._record_latency(time.perf_counter() - started)
+                    pending.pop(0)
+        except Exception as e:
+            # Connecting failed or the connection dropped; retry what was not sent
+            for row in pending:
+                failed.setdefault(row['id'], str(e))
+        return sent, failed
+
+    def _record_latency(self, seconds):
+        with self._lock:
+            self._stats['send_seconds_sum'] += seconds
+            self._stats['send_seconds_max'] = max(self._stats['send_seconds_max'], seconds)
+
+    def drain_once(self, batch_size=None):
+        """Claim and send one batch; returns the number of messages handled"""
+        from src.extensions import db
+        from src.models.email_outbox import EmailOutbox
+
+        rows = self.claim(batch_size)
+        if not rows:
+            return 0
+
+        sent, failed = self._send_batch(rows)
+        token = rows[0]['claim_token']
+        table = EmailOutbox.__table__
+        now = datetime.now(timezone.utc)
+        attempts = {row['id']: row['attempts'] + 1 for row in rows}
+
+        retries = []
+        dead = 0
+        for message_id, error in failed.items():
+            count = attempts[message_id]
+            if count >= self.max_attempts:
+                status, next_attempt_at = 'dead', None
+                dead += 1
+            else:
+                delay = min(self.backoff * 2 ** (count - 1), self.max_backoff)
+                status = 'pending'
+                next_attempt_at = now + timedelta(seconds=delay * random.uniform(1.0, 1.2))
+            retries.append({
+                'b_id': message_id,
+                'b_status': status,
+                'b_attempts': count,
+                'b_error': error[:1000],
+                'b_next': next_attempt_at
+            })
+
+        if sent:
+            db.session.execute(
+                update(table)
+                .where(table.c.id == bindparam('b_id'), table.c.claim_token == token)
+                .values(status='sent', attempts=bindparam('b_attempts'), sent_at=now, claim_token=None),
+                [{'b_id': message_id, 'b_attempts': attempts[message_id]} for message_id in sent]
+            )
+        if retries:
+            db.session.execute(
+                update(table)
+                .where(table.c.id == bindparam('b_id'), table.c.claim_token == token)
+                .values(
+                    status=bindparam('b_status'),
+                    attempts=bindparam('b_attempts'),
+                    last_error=bindparam('b_error'),
+                    next_attempt_at=bindparam('b_next'),
+                    claim_token=None
+                ),
+                retries
+            )
+        db.session.commit()
+
+        with self._lock:
+            self._stats['batches_total'] += 1
+            self._stats['sent_total'] += len(sent)
+            self._stats['failed_total'] += len(failed)
+            self._stats['dead_total'] += dead
+        if failed:
+            current_app.logger.warning(f"Email outbox: {len(failed)} of {len(rows)} messages failed, {dead} dead-lettered")
+        return len(rows)
+
+    def drain(self):
+        """Send everything that is due; returns the number of messages handled"""
+        handled = 0
+        while True:
+            count = self.drain_once()
+            handled += count
+            if count < self.batch_size:
+                break
+        self._purge_sent()
+        return handled
+
+    def _purge_sent(self):
+        from src.extensions import db
+        from src.models.email_outbox import EmailOutbox
+
+        if time.monotonic() - self._last_purge < 3600:
+            return
+        self._last_purge = time.monotonic()
+        table = EmailOutbox.__table__
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.keep_sent_days)
+        db.session.execute(delete(table).where(table.c.status == 'sent', table.c.sent_at < cutoff))
+        db.session.commit()
+
+    # Metrics
+
+    def stats(self):
+        """This worker's send counters"""
+        with self._lock:
+            return dict(self._stats)
+
+    def metrics(self):
+        """Outbox depth by status plus this worker's send counters and latency"""
+        from src.extensions import db
+        from src.models.email_outbox import EmailOutbox
+
+        depth = dict(db.session.execute(
+            select(EmailOutbox.status, func.count())
+            .where(EmailOutbox.status != 'sent')
+            .group_by(EmailOutbox.status)
+        ).all())
+        oldest = db.session.execute(
+            select(func.min(EmailOutbox.created_at)).where(EmailOutbox.status == 'pending')
+        ).scalar()
+        stats = self.stats()
+        return {
+            'depth': {status: depth.get(status, 0) for status in ('pending', 'sending', 'dead')},
+            'oldest_pending_at': oldest.isoformat() if oldest else None,
+            'send_seconds_avg': stats['send_seconds_sum'] / stats['sent_total'] if stats['sent_total'] else 0.0,
+            **stats
+        }
+
+
+@click.group('outbox')
+def outbox_cli():
+    """Email outbox maintenance."""
+
+
+@outbox_cli.command('drain')
+def drain_command():
+    """Send every due message now."""
+    worker = current_app.extensions['email_outbox']
+    click.echo(json.dumps({'handled': worker.drain()}))
+
+
+@outbox_cli.command('stats')
+def stats_command():
+    """Print outbox depth and send metrics."""
+    click.echo(json.dumps(current_app.extensions['email_outbox'].metrics()))
+
+
+@outbox_cli.command('digests')
+def digests_command():
+    """Build every due hourly/daily digest now."""
+    from src.utils.email_digest import build_digests
+    click.echo(json.dumps(build_digests()))
+
+
+@outbox_cli.command('retry-dead')
+def retry_dead_command():
+    """Requeue dead-lettered messages."""
+    from src.extensions import db
+    from src.models.email_outbox import EmailOutbox
+
+    requeued = db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.status == 'dead')
+        .values(status='pending', attempts=0, next_attempt_at=datetime.now(timezone.utc))
+    ).rowcount
+    db.session.commit()
+    click.echo(json.dumps({'requeued': requeued}))
@@ -0,0 +1,226 @@
+import re
+import threading
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+# Employee number length determines the role (see validate_employee_number)
+ROLE_NUMBER_LENGTHS = {
+    'staff': 4,
+    'hod': 5,
+    'principal_secretary': 6
+}
+
+_NOT_FULL_BYTE = re.compile(b'[^\xff]')
+
+
+class UsedNumberBitmap:
+    """One bit per possible employee number of a given length"""
+
+    def __init__(self, size):
+        self.size = size
+        self.bits = bytearray((size + 7) // 8)
+
+    def mark(self, number):
+        if 0 <= number < self.size:
+            self.bits[number >> 3] |= 1 << (number & 7)
+
+    def is_used(self, number):
+        return bool(self.bits[number >> 3] & (1 << (number & 7)))
+
+    def next_free(self, start):
+        """Lowest unused number >= start, or None when the range is exhausted"""
+        number = max(0, start)
+        while number < self.size:
+            byte = self.bits[number >> 3]
+            if byte == 0xFF:
+                # Jump over fully used bytes in C rather than bit by bit
+                match = _NOT_FULL_BYTE.search(self.bits, (number >> 3) + 1)
+                if not match:
+                    return None
+                number = match.start() << 3
+                continue
+            if not byte & (1 << (number & 7)):
+                return number
+            number += 1
+        return None
+
+
+class EmployeeNumberAllocator:
+    """
+    Hands out unused employee numbers per role without probing the users table.
+
+    Each worker loads a bitmap of used numbers once per role. The shared cursor
+    lives in employee_number_sequences and is advanced with a compare-and-set
+    UPDATE inside the caller's transaction, so concurrent signups in other
+    workers can never be given the same number. The common case is one UPDATE;
+    the cursor is only re-read when another worker moved it first.
+
+    The bitmap only knows this worker's allocations: numbers registered by
+    other workers below the cursor (or user supplied anywhere) are not in it.
+    Each candidate is therefore checked against users by its unique index
+    before it is claimed, and assign() retries with the next number when a
+    concurrent registration still wins the race at INSERT time.
+    """
+
+    FIRST_NUMBER = 1
+    # Numbers assign() tries before giving up
+    MAX_ATTEMPTS = 5
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._bitmaps = {}
+        self._cursors = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['employee_numbers'] = self
+
+    def reset(self):
+        with self._lock:
+            self._bitmaps.clear()
+            self._cursors.clear()
+
+    def _bitmap(self, role):
+        from src.extensions import db
+        from src.models.user import User
+
+        bitmap = self._bitmaps.get(role)
+        if bitmap is None:
+            length = ROLE_NUMBER_LENGTHS[role]
+            bitmap = UsedNumberBitmap(10 ** length)
+            numbers = db.session.execute(
+                select(User.employee_number).where(func.length(User.employee_number) == length)
+            ).scalars()
+            for number in numbers:
+                if number.isdigit():
+                    bitmap.mark(int(number))
+            self._bitmaps[role] = bitmap
+        return bitmap
+
+    def _read_cursor(self, role):
+        from src.extensions import db
+        from src.models.employee_number_sequence import EmployeeNumberSequence
+
+        cursor = db.session.execute(
+            select(EmployeeNumberSequence.next_value).where(EmployeeNumberSequence.role == role)
+        ).scalar()
+        if cursor is None:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(EmployeeNumberSequence(role=role, next_value=self.FIRST_NUMBER))
+                cursor = self.FIRST_NUMBER
+            except IntegrityError:
+                # Another worker created the row first
+                cursor = db.session.execute(
+                    select(EmployeeNumberSequence.next_value).where(EmployeeNumberSequence.role == role)
+                ).scalar()
+        return cursor
+
+    def _registered(self, employee_number):
+        from src.extensions import db
+        from src.models.user import User
+
+        return db.session.execute(
+            select(User.id).where(User.employee_number == employee_number)
+        ).first() is not None
+
+    @staticmethod
+    def _role_of(employee_number):
+        return next((r for r, length in ROLE_NUMBER_LENGTHS.items() if length == len(employee_number)), None)
+
+    def mark_used(self, employee_number):
+        """Record a number registered outside the allocator (e.g. user supplied)"""
+        role = self._role_of(employee_number)
+        with self._lock:
+            bitmap = self._bitmaps.get(role)
+            if bitmap is not None and employee_number.isdigit():
+                bitmap.mark(int(employee_number))
+
+    def reserve(self, employee_numbers):
+        """
+        Keep allocate() off numbers that are about to be registered explicitly.
+
+        Unlike mark_used() this loads the role's bitmap when needed, so a batch
+        mixing supplied and allocated numbers (a roster) cannot be handed one of
+        its own supplied numbers before they reach the users table.
+        """
+        with self._lock:
+            for employee_number in employee_numbers:
+                role = self._role_of(employee_number)
+                if role is not None and employee_number.isdigit():
+                    self._bitmap(role).mark(int(employee_number))
+
+    def allocate(self, role):
+        """Return a free zero-padded employee number for role, or None if the range is full"""
+        from src.extensions import db
+        from src.models.employee_number_sequence import EmployeeNumberSequence
+
+        if role not in ROLE_NUMBER_LENGTHS:
+            return None
+
+        with self._lock:
+            bitmap = self._bitmap(role)
+            cursor = self._cursors.get(role)
+            if cursor is None:
+                cursor = self._read_cursor(role)
+
+            while True:
+                candidate = bitmap.next_free(cursor)
+                if candidate is None:
+                    # Reuse gaps left below the cursor once the top of the range is used up
+                    candidate = bitmap.next_free(self.FIRST_NUMBER)
+                    if candidate is None:
+                        return None
+
+                number = str(candidate).zfill(ROLE_NUMBER_LENGTHS[role])
+                if self._registered(number):
+                    # Registered by another worker or by the user; never hand it out
+                    bitmap.mark(candidate)
+                    continue
+
+                claimed = db.session.execute(
+                    update(EmployeeNumberSequence)
+                    .where(
+                        EmployeeNumberSequence.role == role,
+                        EmployeeNumberSequence.next_value == cursor
+                    )
+                    .values(next_value=candidate + 1)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                if claimed:
+                    bitmap.mark(candidate)
+                    self._cursors[role] = candidate + 1
+                    return number
+
+                # Another worker advanced the cursor; treat what it skipped over as taken
+                previous, cursor = cursor, self._read_cursor(role)
+                for number in range(previous, cursor):
+                    bitmap.mark(number)
+                self._cursors[role] = cursor
+
+    def assign(self, role, create):
+        """
+        Allocate a number for role and call create(number) in a savepoint.
+
+        create adds and flushes the row that uses the number. When the INSERT
+        fails because the number was registered concurrently, it is marked
+        used and the next one tried. Returns the number, or None if the range
+        is full; other integrity errors propagate.
+        """
+        from src.extensions import db
+
+        for _ in range(self.MAX_ATTEMPTS):
+            number = self.allocate(role)
+            if number is None:
+                return None
+            try:
+                with db.session.begin_nested():
+                    create(number)
+                return number
+            except IntegrityError:
+                if not self._registered(number):
+                    raise
+                # allocate() has marked it used already; the cursor moved past it
+        raise RuntimeError(f'No unregistered {role} employee number found in {self.MAX_ATTEMPTS} attempts')
@@ -0,0 +1,281 @@
+import itertools
+import json
+import queue
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+
+from sqlalchemy import event as sa_event
+
+
+class MemoryTransport:
+    """Delivers published events to subscribers in this process only"""
+
+    def __init__(self, broker):
+        self._broker = broker
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+        # Ids restart with the process; the epoch tells clients their Last-Event-ID is stale
+        self.epoch = secrets.token_hex(4)
+
+    def publish(self, event_type, messages):
+        with self._lock:
+            first = next(self._sequence)
+            for _ in range(len(messages) - 1):
+                next(self._sequence)
+        self._broker.dispatch(first, event_type, messages)
+
+
+class RedisTransport:
+    """Fans events out to every worker through Redis pub/sub"""
+
+    CHANNEL = 'events:stream'
+    SEQUENCE_KEY = 'events:sequence'
+
+    def __init__(self, broker, url, logger):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError('EVENT_STREAM_URL points at Redis but the redis package is not installed') from e
+        self._broker = broker
+        self._client = redis.Redis.from_url(url)
+        self._logger = logger
+        self._listener = None
+        self._lock = threading.Lock()
+        # The sequence lives in Redis and survives restarts, so ids never go stale
+        self.epoch = 'r'
+
+    def publish(self, event_type, messages):
+        last = self._client.incrby(self.SEQUENCE_KEY, len(messages))
+        self._client.publish(self.CHANNEL, json.dumps({
+            'first': last - len(messages) + 1,
+            'event': event_type,
+            'messages': messages
+        }))
+
+    def start(self):
+        """Listen for events from every worker; started with the first subscriber"""
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(target=self._listen, name='event-stream-listener', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CHANNEL)
+                # Everything published up to now (before this worker listened, or
+                # while the connection was down) never reached this worker
+                self._broker.mark_missed(int(self._client.get(self.SEQUENCE_KEY) or 0))
+                for message in pubsub.listen():
+                    payload = json.loads(message['data'])
+                    self._broker.dispatch(payload['first'], payload['event'], payload['messages'])
+            except Exception as e:
+                # Reconnect after a pause; mark_missed above makes clients that
+                # resume across the gap resync
+                self._logger.warning(f"Event stream listener failed, reconnecting: {str(e)}")
+                time.sleep(1)
+
+
+class Subscription:
+    def __init__(self, user_id, maxsize):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+
+class UserBuffer:
+    """Recent events of one user and the highest sequence that may be missing from them"""
+
+    def __init__(self, size, missing_up_to):
+        self.events = deque(maxlen=size)
+        self.missing_up_to = missing_up_to
+
+    def append(self, item):
+        if len(self.events) == self.events.maxlen:
+            self.missing_up_to = self.events[0][0]
+        self.events.append(item)
+
+
+class EventBroker:
+    """
+    Per-user Server-Sent Events pub/sub.
+
+    Model changes queue events on the SQLAlchemy session; they are published
+    only once that session commits, so clients never see rolled-back state.
+
+    Each worker keeps the last EVENT_STREAM_BUFFER_SIZE events of users who
+    have subscribed to it, to replay after a reconnect with Last-Event-ID;
+    at most EVENT_STREAM_BUFFER_USERS such buffers are kept, least recently
+    used first out (never while the user is connected). Every buffer records
+    the highest sequence it may be missing: events from before it was
+    created, evicted from it, or published while this worker was not
+    listening. When the requested id is older than that, the stream starts
+    with a `resync` event instead, telling the client to refetch once.
+    """
+
+    def __init__(self, app=None):
+        self.transport = None
+        self.heartbeat = 15
+        self.buffer_size = 100
+        self.buffer_users = 10000
+        self.queue_size = 256
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        # user_id -> UserBuffer, least recently used first
+        self._buffers = OrderedDict()
+        # Highest sequence dispatched here, and highest that may never have
+        # reached this worker (None: unknown, until the listener is running)
+        self._last_sequence = 0
+        self._missed = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from src.extensions import db
+
+        url = app.config.get('EVENT_STREAM_URL') or 'memory://'
+        if url.startswith('memory://'):
+            self.transport = MemoryTransport(self)
+            self._missed = 0
+        elif url.startswith(('redis://', 'rediss://', 'unix://')):
+            self.transport = RedisTransport(self, url, app.logger)
+            self._missed = None
+        else:
+            raise ValueError(f'Unsupported EVENT_STREAM_URL: {url}')
+        self.heartbeat = app.config.get('EVENT_STREAM_HEARTBEAT_SECONDS', 15)
+        self.buffer_size = app.config.get('EVENT_STREAM_BUFFER_SIZE', 100)
+        self.buffer_users = app.config.get('EVENT_STREAM_BUFFER_USERS', 10000)
+        self.queue_size = app.config.get('EVENT_STREAM_QUEUE_SIZE', 256)
+
+        if not sa_event.contains(db.session, 'after_commit', self._after_commit):
+            sa_event.listen(db.session, 'after_commit', self._after_commit)
+            sa_event.listen(db.session, 'after_rollback', self._after_rollback)
+        app.extensions['event_broker'] = self
+
+    # Publishing
+
+    def queue(self, session, event_type, messages):
+        """Publish [(user_id, data), ...] when session commits"""
+        if messages:
+            session.info.setdefault('pending_events', []).append((event_type, messages))
+
+    def _after_commit(self, session):
+        pending = session.info.pop('pending_events', None)
+        for event_type, messages in pending or ():
+            self.publish(event_type, messages)
+
+    def _after_rollback(self, session):
+        session.info.pop('pending_events', None)
+
+    def publish(self, event_type, messages):
+        """Send [(user_id, data), ...] to subscribers immediately"""
+        if messages and self.transport is not None:
+            self.transport.publish(event_type, [[int(user_id), data] for user_id, data in messages])
+
+    def mark_missed(self, sequence):
+        """Events up to sequence may not have reached this worker; called by the transport"""
+        with self._lock:
+            self._missed = max(self._missed or 0, sequence)
+            self._last_sequence = max(self._last_sequence, sequence)
+
+    def dispatch(self, first_sequence, event_type, messages):
+        """Buffer events and hand them to local subscribers; called by the transport"""
+        with self._lock:
+            for sequence, (user_id, data) in enumerate(messages, start=first_sequence):
+                item = (sequence, event_type, data)
+                self._last_sequence = max(self._last_sequence, sequence)
+                buffer = self._buffers.get(user_id)
+                if buffer is not None:
+                    buffer.append(item)
+                for subscription in self._subscribers.get(user_id, ()):
+                    try:
+                        subscription.queue.put_nowait(item)
+                    except queue.Full:
+                        subscription.overflowed = True
+
+    # Subscribing
+
+    def _parse_event_id(self, last_event_id):
+        if not last_event_id:
+            return None
+        epoch, _, sequence = last_event_id.partition('-')
+        if epoch != self.transport.epoch or not sequence.isdigit():
+            return -1
+        return int(sequence)
+
+    def _buffer(self, user_id):
+        """The user's buffer, created (and the least recently used evicted) as needed; hold _lock"""
+        buffer = self._buffers.get(user_id)
+        if buffer is not None:
+            self._buffers.move_to_end(user_id)
+            return buffer
+        # Nothing up to the last dispatched event is in a new buffer
+        buffer = self._buffers[user_id] = UserBuffer(self.buffer_size, self._last_sequence)
+        for _ in range(len(self._buffers) - self.buffer_users):
+            oldest = next(iter(self._buffers))
+            if oldest in self._subscribers:
+                # Connected users keep their buffer
+                self._buffers.move_to_end(oldest)
+            else:
+                del self._buffers[oldest]
+        return buffer
+
+    def subscribe(self, user_id, last_event_id=None):
+        """Register a subscriber; returns (subscription, events to replay, needs_resync)"""
+        if isinstance(self.transport, RedisTransport):
+            self.transport.start()
+        since = self._parse_event_id(last_event_id)
+        subscription = Subscription(user_id, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            buffer = self._buffer(user_id)
+            if since is None:
+                return subscription, [], False
+            if since < 0 or self._missed is None or since < max(buffer.missing_up_to, self._missed):
+                return subscription, [], True
+            replay = [item for item in buffer.events if item[0] > since]
+        return subscription, replay, False
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def format_event(self, sequence, event_type, data):
+        return f'id: {self.transport.epoch}-{sequence}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n'
+
+    def stream(self, user_id, last_event_id=None, expires_at=None):
+        """
+        Yield SSE frames for user_id until the client disconnects or expires_at
+        (epoch seconds, normally the token's exp) passes, so the client reconnects
+        with a fresh token. A comment line is sent every `heartbeat` seconds of
+        silence to keep proxies from closing the connection.
+        """
+        subscription, replay, resync = self.subscribe(user_id, last_event_id)
+        try:
+            yield f'retry: {self.heartbeat * 1000}\n\n'
+            if resync:
+                yield 'event: resync\ndata: {}\n\n'
+            for item in replay:
+                yield self.format_event(*item)
+            while expires_at is None or time.time() < expires_at:
+                if subscription.overflowed:
+                    # Too slow to keep up; have the client refetch and reconnect
+                    yield 'event: resync\ndata: {}\n\n'
+                    return
+                timeout = self.heartbeat if expires_at is None else max(0, min(self.heartbeat, expires_at - time.time()))
+                try:
+                    item = subscription.queue.get(timeout=timeout)
+                except queue.Empty:
+                    yield ': heartbeat\n\n'
+                    continue
+                yield self.format_event(*item)
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,100 @@
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, CancelledError, wait
+from concurrent.futures.process import BrokenProcessPool
+
+
+class _ZipSink:
+    """Write-only file object for zipfile; the stream drains it after each entry"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries):
+    """
+    Yield a ZIP archive of (filename, bytes) entries chunk by chunk.
+
+    The sink is not seekable, so zipfile writes data descriptors after each
+    entry instead of patching headers; nothing but the current entry and the
+    central directory is held in memory.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for filename, data in entries:
+            archive.writestr(filename, data)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export_leave_forms(sources, window=None):
+    """
+    Yield (filename, pdf) for each (filename, cache_key, fields) source in
+    completion order.
+
+    Cached forms are passed straight through; the rest are rendered in the
+    document job pool with at most `window` renders in flight, so memory
+    stays bounded however many forms are exported. Renders lost to a pool
+    restart are retried once. Forms that still fail are listed in a final
+    errors.txt entry rather than aborting the archive half way.
+    """
+    from src.extensions import document_jobs, pdf_cache
+    from src.utils.pdf_generator import render_leave_form
+
+    window = window or document_jobs.workers * 2
+    sources = iter(sources)
+    in_flight = {}
+    failed = []
+    exhausted = False
+    while True:
+        while not exhausted and len(in_flight) < window:
+            try:
+                filename, key, fields = next(sources)
+            except StopIteration:
+                exhausted = True
+                break
+            data = pdf_cache.get(key)
+            if data is not None:
+                yield filename, data
+            else:
+                in_flight[document_jobs.run(render_leave_form, fields)] = (filename, key, fields, 1)
+        if not in_flight:
+            break
+
+        done, _ = wait(in_flight, timeout=document_jobs.timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            for future, (filename, _, _, _) in in_flight.items():
+                future.cancel()
+                failed.append(f'{filename}: Timed out')
+            in_flight.clear()
+            continue
+
+        for future in done:
+            filename, key, fields, attempt = in_flight.pop(future)
+            try:
+                data = future.result()
+            except (BrokenProcessPool, CancelledError) as e:
+                if attempt == 1:
+                    in_flight[document_jobs.run(render_leave_form, fields)] = (filename, key, fields, 2)
+                else:
+                    failed.append(f'{filename}: {str(e) or type(e).__name__}')
+                continue
+            except Exception as e:
+                failed.append(f'{filename}: {str(e) or type(e).__name__}')
+                continue
+            pdf_cache.put(key, data)
+            yield filename, data
+
+    if failed:
+        yield 'errors.txt', ('\n'.join(failed) + '\n').encode('utf-8')
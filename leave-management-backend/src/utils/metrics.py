@@ -0,0 +1,375 @@
+import atexit
+import glob
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, current_app, g, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name: (type, help)
+FAMILIES = {
+    'leave_http_request_duration_seconds': ('histogram', 'Request latency by blueprint, endpoint and status.'),
+    'leave_db_queries_total': ('counter', 'SQL statements executed.'),
+    'leave_db_query_seconds_total': ('counter', 'Time spent executing SQL statements.'),
+    'leave_db_nplusone_requests_total': ('counter', 'Requests that repeated one statement shape SQL_NPLUSONE_THRESHOLD or more times.'),
+    'leave_db_over_budget_requests_total': ('counter', 'Requests that exceeded their query budget.'),
+    'leave_db_pool_size': ('gauge', 'Configured connection pool size per worker.'),
+    'leave_db_pool_connections': ('gauge', 'Pooled connections per worker by state.'),
+    'leave_cache_hits_total': ('counter', 'Cache hits.'),
+    'leave_cache_misses_total': ('counter', 'Cache misses.'),
+    'leave_cache_hit_ratio': ('gauge', 'Cache hits over lookups, across all workers.'),
+    'leave_pdf_cache_bytes': ('gauge', 'Bytes held by the in-memory PDF cache per worker.'),
+    'leave_email_outbox_depth': ('gauge', 'Unsent email outbox messages by status.'),
+    'leave_email_outbox_oldest_pending_seconds': ('gauge', 'Age of the oldest pending outbox message.'),
+    'leave_email_sent_total': ('counter', 'Emails sent by the outbox workers.'),
+    'leave_email_failed_total': ('counter', 'Email send attempts that failed.'),
+    'leave_email_dead_total': ('counter', 'Emails dead-lettered after EMAIL_OUTBOX_MAX_ATTEMPTS.'),
+    'leave_document_jobs': ('gauge', 'Tracked document jobs per worker by status.'),
+    'leave_bcrypt_operations_total': ('counter', 'Completed bcrypt hashes and checks.'),
+    'leave_bcrypt_seconds_total': ('counter', 'Time spent in bcrypt.'),
+    'leave_bcrypt_in_progress': ('gauge', 'bcrypt operations running or waiting for a core, per worker.'),
+    'leave_metrics_workers': ('gauge', 'Worker processes that reported recently.'),
+}
+
+
+def _merge(total, counters):
+    for key, value in counters.items():
+        total[key] = total.get(key, 0) + value
+
+
+class ShardedCounters:
+    """
+    Counters with one shard per thread.
+
+    inc() only touches the calling thread's own dict, so recording on the
+    request path never takes a lock; snapshot() sums the shards. Shards of
+    finished threads are folded into a retired total, so servers that use a
+    thread per request do not accumulate them.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def inc(self, key, amount=1):
+        shard = self._shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def observe(self, name, labels, value, buckets):
+        """Record value in the cumulative histogram `name`"""
+        shard = self._shard()
+        for bound in buckets:
+            if value <= bound:
+                key = (f'{name}_bucket', labels + (('le', str(bound)),))
+                shard[key] = shard.get(key, 0) + 1
+        for key, amount in (((f'{name}_bucket', labels + (('le', '+Inf'),)), 1),
+                            ((f'{name}_sum', labels), value),
+                            ((f'{name}_count', labels), 1)):
+            shard[key] = shard.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    _merge(self._retired, shard)
+            self._shards = live
+            total = dict(self._retired)
+            for _, shard in live:
+                # dict() copies atomically under the GIL while the owner keeps writing
+                _merge(total, dict(shard))
+        return total
+
+
+class Metrics:
+    """
+    Prometheus metrics at /metrics.
+
+    Request latency histograms are recorded per thread without locks (see
+    ShardedCounters); component counters and gauges (query stats, pool
+    usage, caches, document jobs, bcrypt) are read when a snapshot is taken.
+
+    A single process serves its own numbers. Under several gunicorn workers
+    set METRICS_DIR to a directory shared by the workers: each worker writes
+    its snapshot there at most every METRICS_FLUSH_SECONDS (and on exit),
+    and whichever worker answers the scrape sums them. Counters of workers
+    that have exited keep counting towards the totals; their per-worker
+    gauges drop out once the file goes stale. Clear the directory when the
+    server (not a worker) starts.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.directory = None
+        self.flush_interval = 10
+        self.token = None
+        self.buckets = DEFAULT_BUCKETS
+        self.counters = ShardedCounters()
+        self._last_flush = 0.0
+        self._flush_lock = threading.Lock()
+        self._app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.directory = app.config.get('METRICS_DIR') or None
+        self.flush_interval = app.config.get('METRICS_FLUSH_SECONDS', self.flush_interval)
+        self.token = app.config.get('METRICS_TOKEN') or None
+        self.buckets = tuple(app.config.get('METRICS_LATENCY_BUCKETS') or DEFAULT_BUCKETS)
+        self._app = app
+        app.extensions['metrics'] = self
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule('/metrics', 'metrics', self.view)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            atexit.register(self._flush_at_exit)
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+
+    def _after_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            labels = (
+                ('blueprint', request.blueprint or ''),
+                ('endpoint', request.endpoint or 'unmatched'),
+                ('status', str(response.status_code)),
+            )
+            self.counters.observe('leave_http_request_duration_seconds', labels,
+                                  time.perf_counter() - started, self.buckets)
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        return response
+
+    # Snapshots
+
+    def _component_counters(self):
+        from src.extensions import email_outbox, pdf_cache, query_stats
+        from src.utils.principal import profile_cache
+
+        queries = query_stats.stats()
+        email = email_outbox.stats()
+        return [
+            ('leave_db_queries_total', (), queries['queries']),
+            ('leave_db_query_seconds_total', (), queries['db_seconds']),
+            ('leave_db_nplusone_requests_total', (), queries['nplusone_requests']),
+            ('leave_db_over_budget_requests_total', (), queries['over_budget_requests']),
+            ('leave_cache_hits_total', (('cache', 'pdf'),), pdf_cache.hits),
+            ('leave_cache_misses_total', (('cache', 'pdf'),), pdf_cache.misses),
+            ('leave_cache_hits_total', (('cache', 'user_profile'),), profile_cache.hits),
+            ('leave_cache_misses_total', (('cache', 'user_profile'),), profile_cache.misses),
+            ('leave_email_sent_total', (), email['sent_total']),
+            ('leave_email_failed_total', (), email['failed_total']),
+            ('leave_email_dead_total', (), email['dead_total']),
+        ]
+
+    def _worker_gauges(self):
+        from src.extensions import db, document_jobs, pdf_cache
+
+        pid = ('pid', str(os.getpid()))
+        gauges = []
+        with self._app.app_context():
+            engines = dict(db.engines)
+        for bind, engine in engines.items():
+            pool = engine.pool
+            if not hasattr(pool, 'checkedout'):
+                # Static/singleton pools used for in-memory SQLite
+                continue
+            labels = (('bind', bind or 'default'), pid)
+            checked_out = pool.checkedout()
+            gauges.append(('leave_db_pool_size', labels, pool.size()))
+            gauges.append(('leave_db_pool_connections', labels + (('state', 'checked_out'),), checked_out))
+            gauges.append(('leave_db_pool_connections', labels + (('state', 'idle'),), pool.checkedin()))
+            gauges.append(('leave_db_pool_connections', labels + (('state', 'overflow'),), max(pool.overflow(), 0)))
+        for status, count in document_jobs.stats().items():
+            gauges.append(('leave_document_jobs', (('status', status), pid), count))
+        gauges.append(('leave_pdf_cache_bytes', (pid,), pdf_cache.stats()['bytes']))
+
+        counters = self.counters.snapshot()
+        for (name, labels), started in counters.items():
+            if name == 'leave_bcrypt_started_total':
+                finished = counters.get(('leave_bcrypt_operations_total', labels), 0)
+                gauges.append(('leave_bcrypt_in_progress', labels + (pid,), started - finished))
+        return counters, gauges
+
+    def snapshot(self):
+        """This worker's counters ({(name, labels): value}) and gauges ([(name, labels, value)])"""
+        counters, gauges = self._worker_gauges()
+        counters = {key: value for key, value in counters.items() if key[0] != 'leave_bcrypt_started_total'}
+        for name, labels, value in self._component_counters():
+            counters[(name, labels)] = counters.get((name, labels), 0) + value
+        return counters, gauges
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f'metrics-{pid}.json')
+
+    def flush(self):
+        """Write this worker's snapshot to METRICS_DIR"""
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_flush = time.monotonic()
+            counters, gauges = self.snapshot()
+            payload = json.dumps({
+                'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+                'gauges': gauges,
+            })
+            # Write then rename so a scraping worker never reads a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path(os.getpid()))
+        except Exception as e:
+            current_app.logger.warning(f"Metrics flush failed: {str(e)}")
+        finally:
+            self._flush_lock.release()
+
+    def _flush_at_exit(self):
+        with self._app.app_context():
+            self.flush()
+
+    def collect(self):
+        """Counters summed over every worker and the gauges of live ones"""
+        counters, gauges = self.snapshot()
+        workers = 1
+        if self.directory:
+            stale_before = time.time() - max(3 * self.flush_interval, 30)
+            own = self._path(os.getpid())
+            for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+                if path == own:
+                    continue
+                try:
+                    with open(path) as f:
+                        data = json.load(f)
+                    fresh = os.path.getmtime(path) >= stale_before
+                except (OSError, ValueError):
+                    continue
+                for name, labels, value in data['counters']:
+                    key = (name, tuple(tuple(pair) for pair in labels))
+                    counters[key] = counters.get(key, 0) + value
+                if fresh:
+                    workers += 1
+                    gauges.extend((name, tuple(tuple(pair) for pair in labels), value)
+                                  for name, labels, value in data['gauges'])
+
+        for cache in ('pdf', 'user_profile'):
+            hits = counters.get(('leave_cache_hits_total', (('cache', cache),)), 0)
+            lookups = hits + counters.get(('leave_cache_misses_total', (('cache', cache),)), 0)
+            gauges.append(('leave_cache_hit_ratio', (('cache', cache),), hits / lookups if lookups else 0.0))
+        gauges.append(('leave_metrics_workers', (), workers))
+        gauges.extend(self._outbox_gauges())
+        return counters, gauges
+
+    def _outbox_gauges(self):
+        """Outbox depth is shared state, read once per scrape rather than per worker"""
+        from datetime import datetime, timezone
+
+        from src.extensions import email_outbox
+
+        try:
+            outbox = email_outbox.metrics()
+        except Exception as e:
+            current_app.logger.warning(f"Metrics: outbox depth unavailable: {str(e)}")
+            return []
+        gauges = [('leave_email_outbox_depth', (('status', status),), count)
+                  for status, count in outbox['depth'].items()]
+        age = 0.0
+        if outbox['oldest_pending_at']:
+            oldest = datetime.fromisoformat(outbox['oldest_pending_at'])
+            if oldest.tzinfo is None:
+                oldest = oldest.replace(tzinfo=timezone.utc)
+            age = max((datetime.now(timezone.utc) - oldest).total_seconds(), 0.0)
+        gauges.append(('leave_email_outbox_oldest_pending_seconds', (), age))
+        return gauges
+
+    # Exposition
+
+    def render(self):
+        counters, gauges = self.collect()
+        samples = {}
+        for (name, labels), value in counters.items():
+            samples.setdefault(_family(name), []).append((name, labels, value))
+        for name, labels, value in gauges:
+            samples.setdefault(_family(name), []).append((name, labels, value))
+
+        lines = []
+        for family in sorted(samples):
+            kind, help_text = FAMILIES.get(family, ('untyped', ''))
+            lines.append(f'# HELP {family} {help_text}')
+            lines.append(f'# TYPE {family} {kind}')
+            for name, labels, value in sorted(samples[family], key=_sample_order):
+                lines.append(f'{name}{_labels(labels)} {_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def view(self):
+        if self.token and request.headers.get('Authorization') != f'Bearer {self.token}':
+            return {'error': 'Authentication required'}, 401
+        return Response(self.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _family(name):
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and FAMILIES.get(name[:-len(suffix)], ('',))[0] == 'histogram':
+            return name[:-len(suffix)]
+    return name
+
+
+def _sample_order(sample):
+    name, labels, _ = sample
+    # Keep each series' buckets, count and sum together, buckets in numeric order of `le`
+    series = tuple(pair for pair in labels if pair[0] != 'le')
+    le = next((float(v) for k, v in labels if k == 'le'), 0.0)
+    return series, name, le
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+
+def _value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+    return str(value)
+
+
+@contextmanager
+def track_bcrypt(operation):
+    """Count a bcrypt hash or check; running ones are reported as leave_bcrypt_in_progress"""
+    from src.extensions import metrics
+
+    labels = (('operation', operation),)
+    metrics.counters.inc(('leave_bcrypt_started_total', labels))
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.counters.inc(('leave_bcrypt_seconds_total', labels), time.perf_counter() - started)
+        metrics.counters.inc(('leave_bcrypt_operations_total', labels))
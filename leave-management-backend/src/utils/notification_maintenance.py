@@ -0,0 +1,73 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from sqlalchemy import delete, insert, select
+
+from src.extensions import db
+from src.models.notification import Notification
+from src.models.notification_archive import NotificationArchive
+from src.models.notification_counter import NotificationCounter
+
+
+def archive_notifications(older_than_days=None, batch_size=None):
+    """
+    Move read notifications older than the retention window to notification_archive.
+
+    Works in batches of batch_size rows, each its own transaction: the rows
+    are copied with one executemany INSERT and removed with one DELETE by id,
+    so locks stay short and an interrupted run loses nothing. Unread
+    notifications are never archived, so the unread counters are unaffected.
+    Returns the number of notifications archived.
+    """
+    older_than_days = older_than_days or current_app.config.get('NOTIFICATION_RETENTION_DAYS', 90)
+    batch_size = batch_size or current_app.config.get('NOTIFICATION_ARCHIVE_BATCH_SIZE', 1000)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    table = Notification.__table__
+
+    archived = 0
+    while True:
+        rows = db.session.execute(
+            select(table)
+            .where(table.c.is_read.is_(True), table.c.created_at < cutoff)
+            .order_by(table.c.created_at)
+            .limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            break
+
+        now = datetime.now(timezone.utc)
+        try:
+            db.session.execute(insert(NotificationArchive), [{
+                'id': row['id'],
+                'user_id': row['user_id'],
+                'created_at': row['created_at'],
+                'archived_at': now,
+                'payload': NotificationArchive.pack(row)
+            } for row in rows])
+            db.session.execute(delete(table).where(table.c.id.in_([row['id'] for row in rows])))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        archived += len(rows)
+        if len(rows) < batch_size:
+            break
+    return archived
+
+
+@click.command('reconcile-notification-counters')
+def reconcile_notification_counters_command():
+    """Recompute unread-notification counters from the notifications table."""
+    corrected = NotificationCounter.reconcile()
+    click.echo(json.dumps({'corrected': corrected}))
+
+
+@click.command('archive-notifications')
+@click.option('--days', type=int, default=None, help='Archive read notifications older than this many days')
+@click.option('--batch-size', type=int, default=None, help='Notifications moved per transaction')
+def archive_notifications_command(days, batch_size):
+    """Move old read notifications into the compressed archive table."""
+    archived = archive_notifications(days, batch_size)
+    click.echo(json.dumps({'archived': archived}))
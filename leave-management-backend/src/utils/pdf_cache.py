@@ -0,0 +1,131 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class PdfCache:
+    """
+    Size-bounded LRU of rendered PDFs keyed by content hash.
+
+    Always keeps up to PDF_CACHE_MAX_BYTES in memory. With PDF_CACHE_DIR set,
+    entries are also written there (up to PDF_CACHE_DISK_MAX_BYTES, oldest
+    first out) so they survive restarts and are shared between workers on the
+    same host. Keys are content hashes, so entries never need invalidating.
+    """
+
+    def __init__(self, app=None):
+        self.max_bytes = 64 * 1024 * 1024
+        self.disk_dir = None
+        self.disk_max_bytes = 512 * 1024 * 1024
+        self._entries = OrderedDict()
+        self._size = 0
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_bytes = app.config.get('PDF_CACHE_MAX_BYTES', self.max_bytes)
+        self.disk_dir = app.config.get('PDF_CACHE_DIR') or None
+        self.disk_max_bytes = app.config.get('PDF_CACHE_DISK_MAX_BYTES', self.disk_max_bytes)
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_size = sum(size for _, _, size in self._disk_entries())
+        app.extensions['pdf_cache'] = self
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f'{key}.pdf')
+
+    def _disk_entries(self):
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith('.pdf'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+        if self.disk_dir:
+            try:
+                with open(self._path(key), 'rb') as f:
+                    data = f.read()
+                os.utime(self._path(key))
+            except OSError:
+                data = None
+            if data is not None:
+                self._remember(key, data)
+                with self._lock:
+                    self.hits += 1
+                return data
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, data):
+        self._remember(key, data)
+        if self.disk_dir:
+            self._write_disk(key, data)
+
+    def _remember(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _write_disk(self, key, data):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        try:
+            # Write then rename so readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            self._disk_size += len(data)
+            over = self._disk_size > self.disk_max_bytes
+        if over:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total <= self.disk_max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_size = total
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'disk_bytes': self._disk_size,
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -5,27 +5,24 @@ from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from datetime import datetime
-import os
-import tempfile
+from functools import lru_cache
+from flask import current_app
+import hashlib
+import io
+import json
 
-def generate_leave_application_pdf(application):
-    """
-    Generate PDF for a leave application
-    Returns the path to the generated PDF file
-    """
-    try:
-        # Create temporary file
-        temp_dir = tempfile.gettempdir()
-        pdf_filename = f"leave_application_{application.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        pdf_path = os.path.join(temp_dir, pdf_filename)
-        
-        # Create PDF document
-        doc = SimpleDocTemplate(pdf_path, pagesize=A4)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Custom styles
-        title_style = ParagraphStyle(
+from src.utils.pdf_merge import concatenate_pdfs
+
+# Bump whenever the leave form layout changes so cached PDFs are not reused
+LEAVE_FORM_TEMPLATE_VERSION = 2
+
+@lru_cache(maxsize=None)
+def get_styles():
+    """Paragraph styles, built once per process"""
+    styles = getSampleStyleSheet()
+    return {
+        'sample': styles,
+        'title': ParagraphStyle(
             'CustomTitle',
             parent=styles['Heading1'],
             fontSize=16,
@@ -33,9 +30,8 @@ def generate_leave_application_pdf(application):
             alignment=TA_CENTER,
             textColor=colors.black,
             fontName='Helvetica-Bold'
-        )
-        
-        header_style = ParagraphStyle(
+        ),
+        'header': ParagraphStyle(
             'CustomHeader',
             parent=styles['Heading2'],
             fontSize=14,
@@ -43,177 +39,23 @@ def generate_leave_application_pdf(application):
             alignment=TA_CENTER,
             textColor=colors.black,
             fontName='Helvetica-Bold'
-        )
-        
-        normal_style = ParagraphStyle(
+        ),
+        'normal': ParagraphStyle(
             'CustomNormal',
             parent=styles['Normal'],
             fontSize=11,
             spaceAfter=6,
             alignment=TA_LEFT,
             fontName='Helvetica'
-        )
-        
-        # Header
-        story.append(Paragraph("MINISTRY OF INFORMATION, COMMUNICATIONS AND THE DIGITAL ECONOMY", title_style))
-        story.append(Paragraph("STATE DEPARTMENT FOR ICT AND DIGITAL ECONOMY", header_style))
-        story.append(Spacer(1, 12))
-        
-        story.append(Paragraph("LEAVE APPLICATION FORM FOR MEMBERS OF STAFF UNDER H.O.DS", header_style))
-        story.append(Spacer(1, 20))
-        
-        # Address section
-        story.append(Paragraph("The Principal Secretary", normal_style))
-        story.append(Paragraph("State Department for ICT & Digital Economy", normal_style))
-        story.append(Paragraph("P.O.BOX 30025", normal_style))
-        story.append(Paragraph("NAIROBI,", normal_style))
-        story.append(Spacer(1, 20))
-        
-        # Application title
-        story.append(Paragraph("APPLICATION FOR ANNUAL LEAVE", header_style))
-        story.append(Paragraph("(To be submitted at least 30 days before the leave is due to begin)", normal_style))
-        story.append(Spacer(1, 20))
-        
-        # PART 1 - Applicant section
-        story.append(Paragraph("<b>PART 1</b>", header_style))
-        story.append(Paragraph("(To be completed by the applicant)", normal_style))
-        story.append(Spacer(1, 12))
-        
-        # Application details table
-        application_data = [
-            ['NAME:', application.applicant.full_name if application.applicant else 'N/A'],
-            ['EMPLOYEE NUMBER:', application.applicant.employee_number if application.applicant else 'N/A'],
-            ['', ''],
-            ['Leave Type:', application.leave_type.name if application.leave_type else 'N/A'],
-            ['Days Requested:', str(application.days_requested)],
-            ['Start Date:', application.start_date.strftime('%d/%m/%Y') if application.start_date else 'N/A'],
-            ['End Date:', application.end_date.strftime('%d/%m/%Y') if application.end_date else 'N/A'],
-            ['', ''],
-        ]
-        
-        if application.last_leave_from and application.last_leave_to:
-            application_data.append(['Last Leave Period:', 
-                                   f"{application.last_leave_from.strftime('%d/%m/%Y')} to {application.last_leave_to.strftime('%d/%m/%Y')}"])
-        
-        # Add contact information
-        if application.contact_info:
-            application_data.append(['Contact Info:', application.contact_info])
-        
-        # Add salary payment preference
-        salary_pref = "Continue to be paid into bank account"
-        if application.salary_payment_preference == "address" and application.salary_payment_address:
-            salary_pref = f"Pay to address: {application.salary_payment_address}"
-        application_data.append(['Salary Payment:', salary_pref])
-        
-        # Add person handling duties
-        if application.person_handling_duties:
-            application_data.append(['Person Handling Duties:', application.person_handling_duties.full_name])
-        
-        # Add permission note
-        if application.permission_note_country:
-            application_data.append(['Country Travel Note:', application.permission_note_country])
-        
-        application_data.extend([
-            ['', ''],
-            ['Application Date:', application.created_at.strftime('%d/%m/%Y') if application.created_at else 'N/A'],
-            ['Applicant Signature:', application.applicant.full_name if application.applicant else 'N/A']
-        ])
-        
-        # Create table
-        app_table = Table(application_data, colWidths=[2*inch, 4*inch])
-        app_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ]))
-        
-        story.append(app_table)
-        story.append(Spacer(1, 30))
-        
-        # PART 2 - Approval section
-        story.append(Paragraph("<b>PART 2</b>", header_style))
-        story.append(Paragraph("(To be completed by the Principal Secretary)", normal_style))
-        story.append(Spacer(1, 12))
-        
-        # Approval details
-        approval_status = "Approved" if application.status == "approved" else "Not Approved"
-        
-        approval_data = [
-            ['Status:', approval_status],
-            ['', ''],
-        ]
-        
-        # Add HOD approval details if available
-        if application.hod_approved:
-            approval_data.extend([
-                ['HOD Approval Date:', application.hod_approval_date.strftime('%d/%m/%Y') if application.hod_approval_date else 'N/A'],
-                ['HOD Comments:', application.hod_comments or 'None'],
-                ['', ''],
-            ])
-        
-        # Add Principal Secretary approval details if available
-        if application.principal_secretary_approved:
-            approval_data.extend([
-                ['PS Approval Date:', application.principal_secretary_approval_date.strftime('%d/%m/%Y') if application.principal_secretary_approval_date else 'N/A'],
-                ['PS Comments:', application.principal_secretary_comments or 'None'],
-                ['PS Signature:', 'PRINCIPAL SECRETARY'],
-            ])
-        
-        approval_table = Table(approval_data, colWidths=[2*inch, 4*inch])
-        approval_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ]))
-        
-        story.append(approval_table)
-        
-        # Footer
-        story.append(Spacer(1, 30))
-        footer_text = f"Generated on {datetime.now().strftime('%d/%m/%Y at %H:%M')}"
-        footer_style = ParagraphStyle(
+        ),
+        'footer': ParagraphStyle(
             'Footer',
             parent=styles['Normal'],
             fontSize=8,
             alignment=TA_CENTER,
             textColor=colors.grey
-        )
-        story.append(Paragraph(footer_text, footer_style))
-        
-        # Build PDF
-        doc.build(story)
-        
-        return pdf_path
-        
-    except Exception as e:
-        print(f"Error generating PDF: {e}")
-        return None
-
-def generate_leave_summary_report(applications, title="Leave Applications Report"):
-    """
-    Generate a summary report of multiple leave applications
-    """
-    try:
-        # Create temporary file
-        temp_dir = tempfile.gettempdir()
-        pdf_filename = f"leave_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        pdf_path = os.path.join(temp_dir, pdf_filename)
-        
-        # Create PDF document
-        doc = SimpleDocTemplate(pdf_path, pagesize=A4)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Title
-        title_style = ParagraphStyle(
+        ),
+        'report_title': ParagraphStyle(
             'ReportTitle',
             parent=styles['Heading1'],
             fontSize=16,
@@ -222,50 +64,365 @@ def generate_leave_summary_report(applications, title="Leave Applications Report
             textColor=colors.black,
             fontName='Helvetica-Bold'
         )
-        
-        story.append(Paragraph(title, title_style))
-        story.append(Paragraph(f"Generated on {datetime.now().strftime('%d/%m/%Y at %H:%M')}", styles['Normal']))
-        story.append(Spacer(1, 20))
-        
-        if not applications:
-            story.append(Paragraph("No applications found.", styles['Normal']))
-        else:
-            # Create summary table
-            table_data = [
-                ['Employee', 'Leave Type', 'Start Date', 'End Date', 'Days', 'Status']
-            ]
-            
-            for app in applications:
-                table_data.append([
-                    app.applicant.full_name if app.applicant else 'N/A',
-                    app.leave_type.name if app.leave_type else 'N/A',
-                    app.start_date.strftime('%d/%m/%Y') if app.start_date else 'N/A',
-                    app.end_date.strftime('%d/%m/%Y') if app.end_date else 'N/A',
-                    str(app.days_requested),
-                    app.status.title()
-                ])
-            
-            table = Table(table_data, colWidths=[1.2*inch, 1*inch, 0.8*inch, 0.8*inch, 0.5*inch, 0.7*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(table)
-        
-        # Build PDF
-        doc.build(story)
-        
-        return pdf_path
-        
+    }
+
+FORM_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+])
+
+def _format_date(value):
+    return value.strftime('%d/%m/%Y') if value else 'N/A'
+
+def leave_form_fields(application):
+    """
+    Everything the leave form shows, as plain data.
+
+    The PDF is rendered from this alone, so it doubles as the cache key input
+    and can be handed to another process for rendering. Nothing here reads
+    the clock: the same fields always render to the same bytes.
+    """
+    applicant = application.user
+    application_data = [
+        ['NAME:', applicant.full_name if applicant else 'N/A'],
+        ['EMPLOYEE NUMBER:', applicant.employee_number if applicant else 'N/A'],
+        ['', ''],
+        ['Leave Type:', application.leave_type.name if application.leave_type else 'N/A'],
+        ['Days Requested:', str(application.days_requested)],
+        ['Start Date:', _format_date(application.start_date)],
+        ['End Date:', _format_date(application.end_date)],
+        ['', ''],
+    ]
+    
+    # Optional form fields; not every deployment's schema has them
+    last_leave_from = getattr(application, 'last_leave_from', None)
+    last_leave_to = getattr(application, 'last_leave_to', None)
+    if last_leave_from and last_leave_to:
+        application_data.append(['Last Leave Period:', f"{_format_date(last_leave_from)} to {_format_date(last_leave_to)}"])
+    
+    contact_info = getattr(application, 'contact_info', None)
+    if contact_info:
+        application_data.append(['Contact Info:', contact_info])
+    
+    salary_pref = "Continue to be paid into bank account"
+    salary_address = getattr(application, 'salary_payment_address', None)
+    if getattr(application, 'salary_payment_preference', None) == "address" and salary_address:
+        salary_pref = f"Pay to address: {salary_address}"
+    application_data.append(['Salary Payment:', salary_pref])
+    
+    if application.person_handling or application.person_handling_duties:
+        application_data.append([
+            'Person Handling Duties:',
+            application.person_handling.full_name if application.person_handling else application.person_handling_duties
+        ])
+    
+    permission_note = getattr(application, 'permission_note_country', None)
+    if permission_note:
+        application_data.append(['Country Travel Note:', permission_note])
+    
+    application_data.extend([
+        ['', ''],
+        ['Application Date:', _format_date(application.created_at)],
+        ['Applicant Signature:', applicant.full_name if applicant else 'N/A']
+    ])
+    
+    approval_data = [
+        ['Status:', "Approved" if application.status == "approved" else "Not Approved"],
+        ['', ''],
+    ]
+    if getattr(application, 'hod_approved', None):
+        approval_data.extend([
+            ['HOD Approval Date:', _format_date(application.hod_approval_date)],
+            ['HOD Comments:', application.hod_comments or 'None'],
+            ['', ''],
+        ])
+    if getattr(application, 'principal_secretary_approved', None):
+        approval_data.extend([
+            ['PS Approval Date:', _format_date(application.principal_secretary_approval_date)],
+            ['PS Comments:', application.principal_secretary_comments or 'None'],
+            ['PS Signature:', 'PRINCIPAL SECRETARY'],
+        ])
+    elif application.approver and application.status in ('approved', 'rejected'):
+        approval_data.extend([
+            ['Decision Date:', _format_date(application.approved_at)],
+            ['Comments:', application.comments or 'None'],
+            ['Decided By:', application.approver.full_name],
+        ])
+    
+    last_change = application.updated_at or application.created_at
+    return {
+        'id': application.id,
+        'application': application_data,
+        'approval': approval_data,
+        'updated': last_change.strftime('%d/%m/%Y at %H:%M') if last_change else 'N/A'
+    }
+
+def leave_form_cache_key(fields):
+    """Content hash of the form fields and template version"""
+    payload = json.dumps([LEAVE_FORM_TEMPLATE_VERSION, fields], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def render_leave_form(fields):
+    """
+    Render leave form fields to PDF bytes in memory.
+
+    invariant=1 fixes ReportLab's /CreationDate and /ID, so the bytes depend
+    on the fields alone and a cache key is a valid strong ETag.
+    """
+    styles = get_styles()
+    title_style, header_style, normal_style = styles['title'], styles['header'], styles['normal']
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, invariant=1)
+    story = []
+    
+    # Header
+    story.append(Paragraph("MINISTRY OF INFORMATION, COMMUNICATIONS AND THE DIGITAL ECONOMY", title_style))
+    story.append(Paragraph("STATE DEPARTMENT FOR ICT AND DIGITAL ECONOMY", header_style))
+    story.append(Spacer(1, 12))
+    
+    story.append(Paragraph("LEAVE APPLICATION FORM FOR MEMBERS OF STAFF UNDER H.O.DS", header_style))
+    story.append(Spacer(1, 20))
+    
+    # Address section
+    story.append(Paragraph("The Principal Secretary", normal_style))
+    story.append(Paragraph("State Department for ICT & Digital Economy", normal_style))
+    story.append(Paragraph("P.O.BOX 30025", normal_style))
+    story.append(Paragraph("NAIROBI,", normal_style))
+    story.append(Spacer(1, 20))
+    
+    # Application title
+    story.append(Paragraph("APPLICATION FOR ANNUAL LEAVE", header_style))
+    story.append(Paragraph("(To be submitted at least 30 days before the leave is due to begin)", normal_style))
+    story.append(Spacer(1, 20))
+    
+    # PART 1 - Applicant section
+    story.append(Paragraph("<b>PART 1</b>", header_style))
+    story.append(Paragraph("(To be completed by the applicant)", normal_style))
+    story.append(Spacer(1, 12))
+    
+    app_table = Table(fields['application'], colWidths=[2*inch, 4*inch])
+    app_table.setStyle(FORM_TABLE_STYLE)
+    story.append(app_table)
+    story.append(Spacer(1, 30))
+    
+    # PART 2 - Approval section
+    story.append(Paragraph("<b>PART 2</b>", header_style))
+    story.append(Paragraph("(To be completed by the Principal Secretary)", normal_style))
+    story.append(Spacer(1, 12))
+    
+    approval_table = Table(fields['approval'], colWidths=[2*inch, 4*inch])
+    approval_table.setStyle(FORM_TABLE_STYLE)
+    story.append(approval_table)
+    
+    # Footer
+    story.append(Spacer(1, 30))
+    story.append(Paragraph(f"Application last updated on {fields['updated']}", styles['footer']))
+    
+    doc.build(story)
+    return buffer.getvalue()
+
+def cached_leave_form(fields, key):
+    """PDF bytes for form fields with cache key `key`, rendered only on a pdf_cache miss"""
+    from src.extensions import pdf_cache
+
+    data = pdf_cache.get(key)
+    if data is None:
+        data = render_leave_form(fields)
+        pdf_cache.put(key, data)
+    return data
+
+def generate_leave_application_pdf(application):
+    """
+    Return (cache_key, pdf_bytes) for a leave application.
+
+    Identical form content is rendered once and then served from pdf_cache.
+    """
+    fields = leave_form_fields(application)
+    key = leave_form_cache_key(fields)
+    return key, cached_leave_form(fields, key)
+
+SUMMARY_HEADER = ['Employee', 'Employee No.', 'Start Date', 'End Date', 'Days', 'Status']
+
+# Rows per Table flowable; each chunk repeats the header when split across pages
+SUMMARY_TABLE_CHUNK = 200
+
+# Pages laid out per part before it is saved and the next one started
+SUMMARY_PAGES_PER_PART = 100
+
+SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+SUMMARY_COL_WIDTHS = [1.8*inch, 1*inch, 0.9*inch, 0.9*inch, 0.6*inch, 0.9*inch]
+
+def summary_report_row(application):
+    """
+    Summary row for an ORM application:
+    (department, leave type, employee name, employee number, start, end, days, status)
+    """
+    user = application.user
+    return (
+        user.department.name if user and user.department else None,
+        application.leave_type.name if application.leave_type else None,
+        user.full_name if user else 'N/A',
+        user.employee_number if user else 'N/A',
+        application.start_date,
+        application.end_date,
+        application.days_requested,
+        application.status
+    )
+
+class _SummaryPart(SimpleDocTemplate):
+    """
+    One part of a summary report, laid out from a shared flowable iterator.
+
+    build() starts from a single flowable; handle_flowable(), the per-flowable
+    hook, tops the story up as it is consumed so only a few flowables are alive
+    at a time. Once the part has max_pages pages it stops pulling and leaves
+    the rest of the iterator to the next part.
+    """
+
+    # Flowables kept ahead of the one being laid out, for keepWithNext
+    LOOKAHEAD = 2
+
+    def __init__(self, buffer, flowables, max_pages, **kwargs):
+        super().__init__(buffer, **kwargs)
+        self._source = flowables
+        self.max_pages = max_pages
+
+    def _fill(self, flowables):
+        while len(flowables) < self.LOOKAHEAD and self.page <= self.max_pages:
+            flowable = next(self._source, None)
+            if flowable is None:
+                break
+            flowables.append(flowable)
+
+    def build(self, flowables, *args, **kwargs):
+        self._story = flowables
+        super().build(flowables, *args, **kwargs)
+
+    def handle_flowable(self, flowables):
+        # Also called for queued page actions; only the story is refilled
+        story = flowables is self._story
+        if story:
+            self._fill(flowables)
+        super().handle_flowable(flowables)
+        if story:
+            self._fill(flowables)
+
+def _subtotal(label, count, days):
+    return Paragraph(f"<b>{label}:</b> {count} application{'s' if count != 1 else ''}, {days:g} days",
+                     get_styles()['normal'])
+
+def _summary_flowables(rows, title):
+    """Generate the report's flowables from rows sorted by department and leave type"""
+    styles = get_styles()
+    sample = styles['sample']
+    yield Paragraph(title, styles['report_title'])
+    yield Paragraph(f"Generated on {datetime.now().strftime('%d/%m/%Y at %H:%M')}", sample['Normal'])
+    yield Spacer(1, 20)
+    
+    department = leave_type = None
+    chunk = []
+    dept_count = dept_days = type_count = type_days = 0
+    total_count = total_days = 0
+    started = False
+    
+    def table(rows_chunk):
+        t = Table([SUMMARY_HEADER] + rows_chunk, colWidths=SUMMARY_COL_WIDTHS, repeatRows=1)
+        t.setStyle(SUMMARY_TABLE_STYLE)
+        return t
+    
+    for dept_name, type_name, employee, number, start_date, end_date, days, status in rows:
+        dept_name = dept_name or 'No Department'
+        type_name = type_name or 'N/A'
+        days = float(days or 0)
+        if not started or dept_name != department or type_name != leave_type:
+            if chunk:
+                yield table(chunk)
+                chunk = []
+            if started:
+                yield _subtotal(f"Subtotal {leave_type}", type_count, type_days)
+                if dept_name != department:
+                    yield _subtotal(f"Total for {department}", dept_count, dept_days)
+            if not started or dept_name != department:
+                department, dept_count, dept_days = dept_name, 0, 0.0
+                yield Spacer(1, 12)
+                yield Paragraph(department, sample['Heading2'])
+            leave_type, type_count, type_days = type_name, 0, 0.0
+            yield Paragraph(leave_type, sample['Heading3'])
+            started = True
+        
+        chunk.append([employee, number, _format_date(start_date), _format_date(end_date),
+                      f"{days:g}", (status or '').title()])
+        type_count += 1
+        type_days += days
+        dept_count += 1
+        dept_days += days
+        total_count += 1
+        total_days += days
+        if len(chunk) >= SUMMARY_TABLE_CHUNK:
+            yield table(chunk)
+            chunk = []
+    
+    if not started:
+        yield Paragraph("No applications found.", sample['Normal'])
+        return
+    if chunk:
+        yield table(chunk)
+    yield _subtotal(f"Subtotal {leave_type}", type_count, type_days)
+    yield _subtotal(f"Total for {department}", dept_count, dept_days)
+    yield Spacer(1, 20)
+    yield _subtotal("Grand total", total_count, total_days)
+
+def render_summary_report(rows, title="Leave Applications Report"):
+    """
+    Render summary rows to PDF bytes.
+
+    rows is any iterable of summary_report_row() tuples sorted by department
+    then leave type (e.g. a streamed query result). They are consumed as the
+    document is laid out.
+
+    ReportLab keeps every finished page uncompressed until the document is
+    saved, so the report is written in parts of SUMMARY_PAGES_PER_PART pages
+    that are saved (compressed) one at a time and appended to the output.
+    Only the compressed output grows with the row count; each part starts on
+    a fresh page.
+    """
+    def parts(flowables):
+        first = next(flowables, None)
+        while first is not None:
+            buffer = io.BytesIO()
+            doc = _SummaryPart(buffer, flowables, SUMMARY_PAGES_PER_PART, pagesize=A4, pageCompression=1)
+            doc.build([first])
+            yield buffer.getvalue()
+            first = next(flowables, None)
+
+    return concatenate_pdfs(parts(_summary_flowables(rows, title)))
+
+def generate_leave_summary_report(applications, title="Leave Applications Report"):
+    """
+    Generate a summary report of multiple leave applications
+    Returns the PDF as bytes
+    """
+    try:
+        rows = sorted((summary_report_row(app) for app in applications),
+                      key=lambda row: (row[0] or '', row[1] or ''))
+        return render_summary_report(rows, title)
     except Exception as e:
-        print(f"Error generating summary report: {e}")
-        return None
+        current_app.logger.error(f"Error generating summary report: {str(e)}")
+        raise
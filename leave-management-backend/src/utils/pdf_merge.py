@@ -0,0 +1,84 @@
+import io
+import re
+
+_REFERENCE = re.compile(rb'(\d+) 0 R\b')
+_STREAM = b'\nstream\n'
+
+
+def _parse(pdf):
+    """
+    Return ({number: body}, root, info) for one PDF.
+
+    Objects are located through the xref table rather than by searching for
+    'endobj', which can occur inside ASCII85-encoded stream data.
+    """
+    xref = int(pdf[pdf.rindex(b'startxref') + len(b'startxref'):].split()[0])
+    trailer = pdf.index(b'trailer', xref)
+    tokens = pdf[xref:trailer].split()
+    first, entries = int(tokens[1]), tokens[3:]
+    offsets = sorted(
+        (int(entries[i]), first + i // 3) for i in range(0, len(entries), 3) if entries[i + 2] == b'n'
+    )
+    objects = {}
+    for (offset, number), (end, _) in zip(offsets, offsets[1:] + [(xref, None)]):
+        chunk = pdf[offset:end]
+        objects[number] = chunk[chunk.index(b'obj') + 3:chunk.rindex(b'endobj')]
+    root = int(re.search(rb'/Root (\d+) 0 R', pdf[trailer:]).group(1))
+    info = int(re.search(rb'/Info (\d+) 0 R', pdf[trailer:]).group(1))
+    return objects, root, info
+
+
+def _renumber(body, numbers):
+    """Rewrite object references in body's dictionary; stream data is left untouched"""
+    head, separator, data = body.partition(_STREAM)
+    return _REFERENCE.sub(lambda m: b'%d 0 R' % numbers[int(m.group(1))], head) + separator + data
+
+
+def concatenate_pdfs(parts):
+    """
+    Join PDFs page by page into one document.
+
+    Meant for PDFs written by ReportLab: a classic xref table, no object
+    streams and a catalog that carries nothing but the page tree. parts may
+    be a generator; each part's objects are renumbered and written out as
+    soon as it arrives, so only the joined output and the current part are
+    held. The first part's document info is kept.
+    """
+    output = io.BytesIO()
+    offsets = {}
+    kids = []
+    info = None
+    # Object 1 is the merged page tree and 2 the catalog, written last
+    next_number = 3
+    for index, pdf in enumerate(parts):
+        part, root, part_info = _parse(pdf)
+        if index == 0:
+            output.write(pdf[:pdf.index(b'1 0 obj')])
+        pages = int(re.search(rb'/Pages (\d+) 0 R', part[root]).group(1))
+        kept = [number for number in sorted(part) if number not in (root, pages)
+                and (number != part_info or index == 0)]
+        numbers = {pages: 1, root: 2}
+        for number in kept:
+            numbers[number] = next_number
+            next_number += 1
+        for number in kept:
+            offsets[numbers[number]] = output.tell()
+            output.write(b'%d 0 obj%sendobj\n' % (numbers[number], _renumber(part[number], numbers)))
+        kids.extend(numbers[int(kid)] for kid in
+                    re.findall(rb'(\d+) 0 R', re.search(rb'/Kids \[([^\]]*)\]', part[pages]).group(1)))
+        if index == 0:
+            info = numbers[part_info]
+
+    offsets[1] = output.tell()
+    output.write(b'1 0 obj\n<<\n/Count %d /Kids [ %s ] /Type /Pages\n>>\nendobj\n' % (
+        len(kids), b' '.join(b'%d 0 R' % kid for kid in kids)))
+    offsets[2] = output.tell()
+    output.write(b'2 0 obj\n<<\n/PageMode /UseNone /Pages 1 0 R /Type /Catalog\n>>\nendobj\n')
+
+    xref = output.tell()
+    output.write(b'xref\n0 %d\n0000000000 65535 f \n' % next_number)
+    for number in range(1, next_number):
+        output.write(b'%010d 00000 n \n' % offsets[number])
+    output.write(b'trailer\n<<\n/Info %d 0 R\n/Root 2 0 R\n/Size %d\n>>\nstartxref\n%d\n%%%%EOF\n'
+                 % (info, next_number, xref))
+    return output.getvalue()
@@ -0,0 +1,132 @@
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity
+
+from src.extensions import db
+
+
+class Principal:
+    """The authenticated caller as described by the JWT claims"""
+
+    __slots__ = ('id', 'role', 'employee_number')
+
+    def __init__(self, id, role, employee_number):
+        self.id = id
+        self.role = role
+        self.employee_number = employee_number
+
+    def has_role(self, *roles):
+        return self.role in roles
+
+    def __repr__(self):
+        return f'<Principal {self.id} - {self.role}>'
+
+
+def current_principal():
+    """Return the caller built from token claims; no database access unless claims are missing"""
+    principal = g.get('_principal')
+    if principal is None:
+        claims = get_jwt()
+        user_id = int(get_jwt_identity())
+        role = claims.get('role')
+        employee_number = claims.get('employee_number')
+        if role is None:
+            # Tokens issued without role claims fall back to the user row
+            user = current_user()
+            role = user.role if user else None
+            employee_number = user.employee_number if user else None
+        principal = g._principal = Principal(user_id, role, employee_number)
+    return principal
+
+
+def current_user():
+    """
+    Load the caller's User row at most once per request.
+
+    Returns None when the row has been deleted or deactivated since the token
+    was issued; the token itself stays valid until it expires.
+    """
+    if '_current_user' not in g:
+        from src.models.user import User
+        user = db.session.get(User, int(get_jwt_identity()))
+        g._current_user = user if user is not None and user.is_active else None
+    return g._current_user
+
+
+def role_required(*roles, message='Insufficient permissions'):
+    """
+    Reject callers whose role claim is not in roles, or whose account no longer
+    exists or is inactive; must be applied under @jwt_required()
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if current_user() is None:
+                return jsonify({'error': 'Account not found or inactive'}), 401
+            if not current_principal().has_role(*roles):
+                return jsonify({'error': message}), 403
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ProfileCache:
+    """Short-TTL per-process cache of serialized user profiles"""
+
+    def __init__(self, max_entries=1024):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(user_id, None)
+            self.misses += 1
+        return None
+
+    def set(self, user_id, profile, ttl):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.monotonic()
+                for key in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+                    del self._entries[key]
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[user_id] = (time.monotonic() + ttl, profile)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+profile_cache = ProfileCache()
+
+
+def current_user_profile():
+    """Return current_user().to_dict(), served from the profile cache when USER_PROFILE_CACHE_TTL > 0"""
+    user_id = current_principal().id
+    ttl = current_app.config.get('USER_PROFILE_CACHE_TTL', 0)
+    if ttl:
+        profile = profile_cache.get(user_id)
+        if profile is not None:
+            return profile
+    user = current_user()
+    if not user:
+        return None
+    profile = user.to_dict()
+    if ttl:
+        profile_cache.set(user_id, profile, ttl)
+    return profile
+
+
+def invalidate_user_profile(user_id):
+    profile_cache.invalidate(int(user_id))
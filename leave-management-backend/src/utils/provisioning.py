@@ -0,0 +1,254 @@
+import csv
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import bcrypt
+import click
+from flask import current_app
+from sqlalchemy import insert, select
+
+from src.extensions import db, employee_numbers
+from src.models.leave_balance import LeaveBalance
+from src.models.leave_type import LeaveType
+from src.models.user import User, DEFAULT_LEAVE_ALLOCATIONS
+from src.utils.metrics import track_bcrypt
+from src.utils.validators import validate_employee_number, validate_email, validate_phone
+
+REQUIRED_FIELDS = ['email', 'phone_number', 'password', 'first_name', 'last_name']
+VALID_ROLES = ['staff', 'hod', 'principal_secretary']
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+
+def parse_roster(stream, filename=''):
+    """Read roster rows from a CSV or JSON file object"""
+    raw = stream.read()
+    text = raw.decode('utf-8-sig') if isinstance(raw, bytes) else raw
+    if filename.lower().endswith('.json') or text.lstrip().startswith(('[', '{')):
+        data = json.loads(text)
+        return data.get('users', []) if isinstance(data, dict) else data
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def _existing_values(column, values):
+    """Return the subset of values already present in column, one query per batch"""
+    values = list(values)
+    found = set()
+    for i in range(0, len(values), LOOKUP_BATCH_SIZE):
+        batch = values[i:i + LOOKUP_BATCH_SIZE]
+        found.update(db.session.execute(select(column).where(column.in_(batch))).scalars())
+    return found
+
+
+def validate_roster(rows):
+    """
+    Validate every row up front.
+
+    Returns (valid_rows, results) where results holds one entry per input row
+    and valid_rows are normalized dicts that passed every check.
+    """
+    results = []
+    candidates = []
+    seen_emails, seen_phones, seen_numbers = set(), set(), set()
+
+    for index, raw in enumerate(rows, start=1):
+        if not isinstance(raw, dict):
+            results.append({'row': index, 'email': None, 'status': 'error', 'errors': ['Row must be an object']})
+            continue
+        # JSON rosters may carry numbers (e.g. an unquoted phone number); validate everything as text
+        row = {str(key).strip(): (str(value).strip() if value is not None else None)
+               for key, value in raw.items() if key}
+        errors = [f'{field} is required' for field in REQUIRED_FIELDS if not row.get(field)]
+
+        employee_number = row.get('employee_number') or None
+        role = row.get('role') or None
+        if employee_number:
+            is_valid, number_role = validate_employee_number(employee_number)
+            if not is_valid:
+                errors.append('Invalid employee number format')
+            elif role and role != number_role:
+                errors.append('Role does not match employee number')
+            else:
+                role = number_role
+        if role not in VALID_ROLES:
+            errors.append('Invalid role')
+
+        email = row.get('email')
+        phone = row.get('phone_number')
+        if email and not validate_email(email):
+            errors.append('Invalid email format')
+        if phone and not validate_phone(phone):
+            errors.append('Invalid phone number format')
+        if row.get('password') and len(row['password']) < 6:
+            errors.append('Password must be at least 6 characters long')
+        department_id = row.get('department_id') or None
+        if department_id is not None and not department_id.isdigit():
+            errors.append('Invalid department_id')
+
+        # Duplicates inside the roster itself
+        if email and email in seen_emails:
+            errors.append('Duplicate email in roster')
+        if phone and phone in seen_phones:
+            errors.append('Duplicate phone number in roster')
+        if employee_number and employee_number in seen_numbers:
+            errors.append('Duplicate employee number in roster')
+        seen_emails.add(email)
+        seen_phones.add(phone)
+        seen_numbers.add(employee_number)
+
+        result = {'row': index, 'email': email, 'status': 'error' if errors else 'valid', 'errors': errors}
+        results.append(result)
+        if not errors:
+            candidates.append((result, {
+                'employee_number': employee_number,
+                'email': email,
+                'phone_number': phone,
+                'password': row['password'],
+                'first_name': row['first_name'],
+                'last_name': row['last_name'],
+                'role': role,
+                'department_id': int(department_id) if department_id is not None else None
+            }))
+
+    # Set-based uniqueness checks against existing users
+    taken_emails = _existing_values(User.email, {r['email'] for _, r in candidates})
+    taken_phones = _existing_values(User.phone_number, {r['phone_number'] for _, r in candidates})
+    taken_numbers = _existing_values(
+        User.employee_number, {r['employee_number'] for _, r in candidates if r['employee_number']}
+    )
+
+    valid = []
+    for result, row in candidates:
+        if row['email'] in taken_emails:
+            result['errors'].append('Email already registered')
+        if row['phone_number'] in taken_phones:
+            result['errors'].append('Phone number already registered')
+        if row['employee_number'] and row['employee_number'] in taken_numbers:
+            result['errors'].append('Employee number already registered')
+        if result['errors']:
+            result['status'] = 'error'
+        else:
+            valid.append((result, row))
+    return valid, results
+
+
+def _hash_password(password):
+    with track_bcrypt('hash'):
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def hash_passwords(passwords, workers=None):
+    """bcrypt releases the GIL, so a thread pool hashes on all cores"""
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_hash_password, passwords))
+
+
+def provision_users(rows, chunk_size=None, hash_workers=None):
+    """
+    Create users and their leave balances in bulk.
+
+    Each chunk is one transaction: employee numbers are allocated, users are
+    inserted with a single executemany INSERT ... RETURNING and their leave
+    balances with a second executemany INSERT. A failing chunk is rolled back
+    and reported without affecting the others.
+    """
+    chunk_size = chunk_size or current_app.config.get('PROVISIONING_CHUNK_SIZE', 500)
+    hash_workers = hash_workers or current_app.config.get('PROVISIONING_HASH_WORKERS')
+
+    valid, results = validate_roster(rows)
+    if not valid:
+        return results
+
+    # Supplied numbers are not in users yet, so the allocator must be told to skip them
+    employee_numbers.reserve(row['employee_number'] for _, row in valid if row['employee_number'])
+
+    current_year = datetime.now().year
+    leave_type_ids = dict(db.session.execute(
+        select(LeaveType.name, LeaveType.id).where(LeaveType.name.in_(list(DEFAULT_LEAVE_ALLOCATIONS)))
+    ).all())
+
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        try:
+            hashes = hash_passwords([row['password'] for _, row in chunk], hash_workers)
+            now = datetime.now(timezone.utc)
+            user_rows = []
+            for (result, row), password_hash in zip(chunk, hashes):
+                employee_number = row['employee_number'] or employee_numbers.allocate(row['role'])
+                if not employee_number:
+                    raise ValueError(f"No free employee numbers left for role {row['role']}")
+                result['employee_number'] = employee_number
+                user_rows.append({
+                    'employee_number': employee_number,
+                    'email': row['email'],
+                    'phone_number': row['phone_number'],
+                    'password_hash': password_hash,
+                    'first_name': row['first_name'],
+                    'last_name': row['last_name'],
+                    'role': row['role'],
+                    'department_id': row['department_id'],
+                    'failed_login_attempts': 0,
+                    'is_locked': False,
+                    'is_active': False,
+                    'created_at': now,
+                    'updated_at': now
+                })
+
+            inserted = db.session.execute(
+                insert(User).returning(User.id, User.email, sort_by_parameter_order=True),
+                user_rows
+            ).all()
+
+            balance_rows = [
+                {
+                    'user_id': user_id,
+                    'leave_type_id': leave_type_ids[name],
+                    'balance': days,
+                    'used_days': 0,
+                    'year': current_year,
+                    'created_at': now,
+                    'updated_at': now
+                }
+                for user_id, _ in inserted
+                for name, days in DEFAULT_LEAVE_ALLOCATIONS.items()
+                if name in leave_type_ids
+            ]
+            if balance_rows:
+                db.session.execute(insert(LeaveBalance), balance_rows)
+            db.session.commit()
+
+            for (result, row), (user_id, _) in zip(chunk, inserted):
+                employee_numbers.mark_used(result['employee_number'])
+                result['status'] = 'created'
+                result['user_id'] = user_id
+        except Exception as e:
+            db.session.rollback()
+            for result, _ in chunk:
+                result['status'] = 'error'
+                result['errors'].append(f'Chunk failed: {str(e)}')
+                result.pop('employee_number', None)
+
+    return results
+
+
+def summarize(results):
+    created = sum(1 for r in results if r['status'] == 'created')
+    return {'total': len(results), 'created': created, 'failed': len(results) - created}
+
+
+@click.command('provision-users')
+@click.argument('roster', type=click.File('rb'))
+@click.option('--chunk-size', type=int, default=None, help='Users per transaction')
+@click.option('--workers', type=int, default=None, help='Parallel bcrypt workers')
+def provision_users_command(roster, chunk_size, workers):
+    """Bulk-create users from a CSV or JSON roster file."""
+    results = provision_users(parse_roster(roster, roster.name), chunk_size, workers)
+    for result in results:
+        if result['status'] != 'created':
+            click.echo(f"row {result['row']} ({result['email']}): {'; '.join(result['errors'])}")
+    click.echo(json.dumps(summarize(results)))
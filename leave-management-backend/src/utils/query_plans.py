@@ -0,0 +1,154 @@
+import json
+import re
+from datetime import date, datetime, timedelta, timezone
+
+import click
+from sqlalchemy import and_, extract, func, or_, select, text, update
+
+from src.extensions import db
+from src.models.email_outbox import EmailOutbox
+from src.models.leave_application import LeaveApplication
+from src.models.leave_balance import LeaveBalance
+from src.models.login_session import LoginSession
+from src.models.notification import Notification
+from src.models.password_reset_token import PasswordResetToken
+from src.models.token_blocklist import TokenBlocklist
+from src.models.user import User
+
+
+def hot_queries():
+    """
+    (name, statement) for each query on a request or worker hot path.
+
+    Statements mirror the route and model code with representative
+    parameters; add an entry here whenever a new hot query is introduced.
+    tests/test_query_plans.py also plans the SQL the routes actually emit,
+    so a route that drifts from its entry here still fails the check.
+    """
+    today = date.today()
+    now = datetime.now(timezone.utc)
+    return [
+        # Auth
+        ('login by employee number', select(User).where(User.employee_number == '000001')),
+        ('login by email', select(User).where(User.email == 'user@example.com')),
+        ('login by phone number', select(User).where(User.phone_number == '0700000000')),
+        ('reset tokens for user', select(PasswordResetToken).where(PasswordResetToken.user_id == 1)),
+        ('reset token lookup', select(PasswordResetToken).where(PasswordResetToken.token == 'x')),
+        ('token blocklist lookup', select(TokenBlocklist.id).where(TokenBlocklist.jti == 'x')),
+        ('active sessions for user', select(LoginSession).where(
+            LoginSession.user_id == 1, LoginSession.is_active.is_(True), LoginSession.expires_at > now
+        ).order_by(LoginSession.created_at.desc())),
+
+        # Leave
+        ('my applications', select(LeaveApplication).where(
+            LeaveApplication.user_id == 1, extract('year', LeaveApplication.start_date) == today.year
+        ).order_by(LeaveApplication.created_at.desc())),
+        ('current leave', select(LeaveApplication).where(
+            LeaveApplication.user_id == 1, LeaveApplication.status == 'approved',
+            LeaveApplication.start_date <= today, LeaveApplication.end_date >= today
+        ).limit(1)),
+        ('upcoming leave', select(LeaveApplication).where(
+            LeaveApplication.user_id == 1, LeaveApplication.status == 'approved', LeaveApplication.start_date > today
+        ).order_by(LeaveApplication.start_date).limit(5)),
+        ('pending applications', select(LeaveApplication).where(LeaveApplication.status == 'pending')),
+        ('staff on leave', select(func.count()).select_from(LeaveApplication).join(
+            User, User.id == LeaveApplication.user_id
+        ).where(
+            User.role.in_(['staff', 'hod']), LeaveApplication.status == 'approved',
+            LeaveApplication.start_date <= today, LeaveApplication.end_date >= today
+        )),
+        ('users on leave in period', select(LeaveApplication.user_id).where(
+            LeaveApplication.status == 'approved',
+            or_(
+                and_(LeaveApplication.start_date <= today, LeaveApplication.end_date >= today),
+                and_(LeaveApplication.start_date >= today, LeaveApplication.end_date <= today + timedelta(days=7))
+            )
+        )),
+        ('applications this month', select(func.count()).select_from(LeaveApplication).where(
+            LeaveApplication.created_at >= datetime.combine(today.replace(day=1), datetime.min.time())
+        )),
+        ('department report', select(LeaveApplication.id).join(
+            User, User.id == LeaveApplication.user_id
+        ).where(User.department_id == 1, LeaveApplication.status == 'approved')),
+        ('balances for year', select(LeaveBalance).where(LeaveBalance.user_id == 1, LeaveBalance.year == today.year)),
+        ('balance by type', select(LeaveBalance).where(
+            LeaveBalance.user_id == 1, LeaveBalance.leave_type_id == 1, LeaveBalance.year == today.year
+        )),
+
+        # Users and departments
+        ('users by role', select(func.count()).select_from(User).where(User.role == 'staff')),
+        ('department members', select(User).where(User.department_id == 1)),
+
+        # Notifications
+        ('inbox page', select(Notification).where(
+            Notification.user_id == 1,
+            or_(Notification.created_at < now, and_(Notification.created_at == now, Notification.id < 100))
+        ).order_by(Notification.created_at.desc(), Notification.id.desc()).limit(20)),
+        ('mark read', update(Notification).where(
+            Notification.user_id == 1, Notification.is_read.is_(False), Notification.created_at <= now
+        ).values(is_read=True)),
+        ('unread for user', select(func.count()).select_from(Notification).where(
+            Notification.user_id == 1, Notification.is_read.is_(False)
+        )),
+        ('archive candidates', select(Notification.id).where(
+            Notification.is_read.is_(True), Notification.created_at < now
+        ).order_by(Notification.created_at).limit(1000)),
+
+        # Email outbox
+        ('outbox claim', select(EmailOutbox.id).where(
+            EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now
+        ).order_by(EmailOutbox.next_attempt_at).limit(50)),
+    ]
+
+
+# SQLite: "SCAN leave_applications" is a full table scan; "SCAN ... USING INDEX" walks an index in order
+_SQLITE_FULL_SCAN = re.compile(r'^SCAN (\w+)\b(?! USING)')
+_POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def explain(connection, statement):
+    """Plan lines for statement on the connection's database"""
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    if connection.dialect.name == 'sqlite':
+        return [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')]
+    if connection.dialect.name == 'postgresql':
+        # Small tables are seq-scanned whatever the indexes; only report scans no index could avoid
+        connection.execute(text('SET LOCAL enable_seqscan = off'))
+        return [row[0] for row in connection.exec_driver_sql(f'EXPLAIN {sql}')]
+    raise RuntimeError(f'Query plan checks are not supported on {connection.dialect.name}')
+
+
+def full_scans(connection, plan):
+    """Tables the plan reads in full"""
+    pattern = _SQLITE_FULL_SCAN if connection.dialect.name == 'sqlite' else _POSTGRES_FULL_SCAN
+    scans = []
+    for line in plan:
+        match = pattern.search(line.strip())
+        if match:
+            scans.append(match.group(1))
+    return scans
+
+
+def check_query_plans():
+    """[{'query', 'plan', 'full_scans'}] for every hot query"""
+    results = []
+    with db.engine.connect() as connection:
+        for name, statement in hot_queries():
+            plan = explain(connection, statement)
+            connection.rollback()
+            results.append({'query': name, 'plan': plan, 'full_scans': full_scans(connection, plan)})
+    return results
+
+
+@click.command('check-query-plans')
+@click.option('--verbose', is_flag=True, help='Print every plan, not just failures.')
+def check_query_plans_command(verbose):
+    """Fail if any hot query plans a full table scan."""
+    results = check_query_plans()
+    failures = [result for result in results if result['full_scans']]
+    for result in results:
+        if verbose or result['full_scans']:
+            click.echo(json.dumps(result))
+    click.echo(f'{len(results) - len(failures)} of {len(results)} hot queries use an index')
+    if failures:
+        raise SystemExit(1)
@@ -0,0 +1,176 @@
+import json
+import re
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+# Bound parameter lists of an expanded IN (...) clause, in any DBAPI paramstyle
+_PARAM = r'(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)'
+_IN_LIST = re.compile(rf'\(\s*{_PARAM}(?:\s*,\s*{_PARAM})+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in development when an endpoint runs more queries than its budget"""
+
+
+def statement_shape(statement):
+    """Statement text with IN lists collapsed, so `IN (?, ?)` and `IN (?, ?, ?)` count as one shape"""
+    return _IN_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+
+def _preview(shape, limit=300):
+    """Head and tail of a long statement; the WHERE clause is usually the interesting part"""
+    if len(shape) <= limit:
+        return shape
+    return f'{shape[:limit // 3]} ... {shape[-(limit * 2 // 3):]}'
+
+
+def parse_budgets(value):
+    """'dashboard.get_dashboard_stats=25,department.get_department_stats=5' -> {endpoint: budget}"""
+    budgets = {}
+    for item in (value or '').split(','):
+        endpoint, sep, budget = item.partition('=')
+        if sep and endpoint.strip():
+            budgets[endpoint.strip()] = int(budget)
+    return budgets
+
+
+class RequestQueryStats:
+    """Queries run while handling one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.db_seconds = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.db_seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold):
+        """[(shape, count)] of statements run at least `threshold` times, most frequent first"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+class QueryInstrumentation:
+    """
+    Per-request SQL statistics from the engines' cursor events.
+
+    Counts the statements each request executes and the time spent in the
+    database, and flags statement shapes repeated SQL_NPLUSONE_THRESHOLD or
+    more times (the signature of a per-row query loop). Each request gets a
+    Server-Timing header and one JSON log line; requests over their query
+    budget (SQL_QUERY_BUDGET, or per endpoint in SQL_QUERY_BUDGETS) are
+    logged as warnings, or raise QueryBudgetExceeded when
+    SQL_QUERY_BUDGET_RAISE is set (development only).
+
+    Statements outside a request (CLI commands, background workers) are not
+    counted per request but still add to the process-wide totals.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.server_timing = True
+        self.nplusone_threshold = 5
+        self.default_budget = 0
+        self.budgets = {}
+        self.raise_on_budget = False
+        self._lock = threading.Lock()
+        self.totals = {'requests': 0, 'queries': 0, 'db_seconds': 0.0, 'nplusone_requests': 0, 'over_budget_requests': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from src.extensions import db
+
+        self.enabled = app.config.get('SQL_INSTRUMENTATION', True)
+        self.server_timing = app.config.get('SQL_SERVER_TIMING', True)
+        self.nplusone_threshold = app.config.get('SQL_NPLUSONE_THRESHOLD', 5)
+        self.default_budget = app.config.get('SQL_QUERY_BUDGET', 0)
+        self.budgets = dict(app.config.get('SQL_QUERY_BUDGETS') or {})
+        self.raise_on_budget = app.config.get('SQL_QUERY_BUDGET_RAISE', False)
+        app.extensions['query_stats'] = self
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_started'].pop()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.totals['queries'] += 1
+            self.totals['db_seconds'] += elapsed
+        if has_request_context():
+            stats = g.get('sql_stats')
+            if stats is not None:
+                stats.record(statement, elapsed)
+
+    def _before_request(self):
+        g.sql_stats = RequestQueryStats()
+
+    def budget_for(self, endpoint):
+        return self.budgets.get(endpoint, self.default_budget)
+
+    def _after_request(self, response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        db_ms = stats.db_seconds * 1000
+        repeated = stats.repeated(self.nplusone_threshold)
+        budget = self.budget_for(request.endpoint)
+        over_budget = bool(budget) and stats.count > budget
+        with self._lock:
+            self.totals['requests'] += 1
+            self.totals['nplusone_requests'] += bool(repeated)
+            self.totals['over_budget_requests'] += over_budget
+
+        if self.server_timing:
+            response.headers.add(
+                'Server-Timing', f'db;dur={db_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+            )
+
+        line = {
+            'event': 'sql_stats',
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': round(db_ms, 1),
+            'total_ms': round(total_ms, 1),
+        }
+        if repeated:
+            line['repeated'] = [{'statement': _preview(shape), 'count': n} for shape, n in repeated[:3]]
+        if budget:
+            line['budget'] = budget
+        if repeated or over_budget:
+            current_app.logger.warning(json.dumps(line))
+        else:
+            current_app.logger.info(json.dumps(line))
+
+        if over_budget and self.raise_on_budget:
+            raise QueryBudgetExceeded(
+                f"{request.endpoint} ran {stats.count} queries, budget {budget}"
+                + ''.join(f"\n  {n}x {_preview(shape)}" for shape, n in stats.shapes.most_common(3))
+            )
+        return response
+
+    def stats(self):
+        with self._lock:
+            return dict(self.totals)
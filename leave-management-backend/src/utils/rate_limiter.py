@@ -0,0 +1,173 @@
+import secrets
+import threading
+import time
+from collections import deque
+
+from flask import current_app, jsonify, request
+
+
+class MemoryBackend:
+    """
+    Sliding-window hit log kept in process memory.
+
+    Each worker process has its own log: limits apply per worker, and a
+    reset (such as an admin unlocking an account) only clears the worker
+    that handles it; login treats the database lock as the authority so
+    stale failure counts clear themselves. Use RedisBackend when running
+    several workers.
+    """
+
+    # Sweep idle keys every this many hits so the store cannot grow unbounded
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        self._hits = {}
+        self._windows = {}
+        self._lock = threading.Lock()
+        self._since_sweep = 0
+
+    def _prune(self, key, window, now):
+        hits = self._hits.get(key)
+        if hits is None:
+            return None
+        cutoff = now - window
+        while hits and hits[0] <= cutoff:
+            hits.popleft()
+        return hits
+
+    def _sweep(self, now):
+        for key in list(self._hits):
+            hits = self._prune(key, self._windows.get(key, 0), now)
+            if not hits:
+                self._hits.pop(key, None)
+                self._windows.pop(key, None)
+
+    def hit(self, key, window, now=None):
+        """Record a hit and return the number of hits inside the window"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._since_sweep += 1
+            if self._since_sweep >= self.SWEEP_EVERY:
+                self._since_sweep = 0
+                self._sweep(now)
+            hits = self._prune(key, window, now)
+            if hits is None:
+                hits = self._hits[key] = deque()
+            hits.append(now)
+            self._windows[key] = window
+            return len(hits)
+
+    def count(self, key, window, now=None):
+        """Return the number of hits inside the window without recording one"""
+        now = time.time() if now is None else now
+        with self._lock:
+            hits = self._prune(key, window, now)
+            return len(hits) if hits else 0
+
+    def oldest(self, key):
+        with self._lock:
+            hits = self._hits.get(key)
+            return hits[0] if hits else None
+
+    def reset(self, key):
+        with self._lock:
+            self._hits.pop(key, None)
+            self._windows.pop(key, None)
+
+
+class RedisBackend:
+    """Sliding-window hit log shared between workers through Redis sorted sets"""
+
+    def __init__(self, url, prefix='ratelimit:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError('RATELIMIT_STORAGE_URL points at Redis but the redis package is not installed') from e
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def hit(self, key, window, now=None):
+        now = time.time() if now is None else now
+        name = self._prefix + key
+        pipe = self._client.pipeline()
+        pipe.zremrangebyscore(name, 0, now - window)
+        pipe.zadd(name, {f'{now:.6f}:{secrets.token_hex(4)}': now})
+        pipe.zcard(name)
+        pipe.expire(name, int(window) + 1)
+        return pipe.execute()[2]
+
+    def count(self, key, window, now=None):
+        now = time.time() if now is None else now
+        name = self._prefix + key
+        pipe = self._client.pipeline()
+        pipe.zremrangebyscore(name, 0, now - window)
+        pipe.zcard(name)
+        return pipe.execute()[1]
+
+    def oldest(self, key):
+        oldest = self._client.zrange(self._prefix + key, 0, 0, withscores=True)
+        return oldest[0][1] if oldest else None
+
+    def reset(self, key):
+        self._client.delete(self._prefix + key)
+
+
+class RateLimiter:
+    """Sliding-window rate limiter checked before any database access"""
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        url = app.config.get('RATELIMIT_STORAGE_URL') or 'memory://'
+        if url.startswith('memory://'):
+            self.backend = MemoryBackend()
+        elif url.startswith(('redis://', 'rediss://', 'unix://')):
+            self.backend = RedisBackend(url)
+        else:
+            raise ValueError(f'Unsupported RATELIMIT_STORAGE_URL: {url}')
+        app.extensions['rate_limiter'] = self
+
+    def hit(self, key, limit, window):
+        """Record a hit; return (allowed, retry_after_seconds)"""
+        if not current_app.config.get('RATELIMIT_ENABLED', True):
+            return True, 0
+        count = self.backend.hit(key, window)
+        if count <= limit:
+            return True, 0
+        return False, self.retry_after(key, window)
+
+    def record(self, key, window):
+        """Record an event regardless of RATELIMIT_ENABLED and return the count in the window"""
+        return self.backend.hit(key, window)
+
+    def count(self, key, window):
+        return self.backend.count(key, window)
+
+    def oldest(self, key):
+        """Time of the oldest hit still recorded for key, or None"""
+        return self.backend.oldest(key)
+
+    def retry_after(self, key, window):
+        oldest = self.backend.oldest(key)
+        if oldest is None:
+            return 0
+        return max(1, int(oldest + window - time.time()) + 1)
+
+    def reset(self, key):
+        """Forget every hit for key; with the memory backend, in this worker only"""
+        self.backend.reset(key)
+
+
+def client_ip():
+    """Best-effort client address used as a rate-limit key"""
+    return request.remote_addr or 'unknown'
+
+
+def too_many_requests(retry_after):
+    response = jsonify({'error': 'Too many requests. Please try again later.'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
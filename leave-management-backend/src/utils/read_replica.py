@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import g, has_app_context, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# Bind key of the replica engine in SQLALCHEMY_BINDS
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the replica bind on read-only endpoints.
+
+    Reads go to the replica only while the current request opted in (see
+    read_replica) and the session has not written anything. The first
+    flush or bulk INSERT/UPDATE/DELETE pins the session to the primary for
+    the rest of the request, so a view always reads its own writes. Without
+    a replica bind everything uses the primary, as before.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica(clause):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause):
+        if self._flushing or self.info.get('wrote'):
+            return False
+        if clause is None or not getattr(clause, 'is_select', False):
+            return False
+        if not (has_request_context() and g.get('db_read_replica')):
+            return False
+        return REPLICA_BIND in self._db.engines
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _pin_on_flush(session, flush_context, instances):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _pin_on_dml(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info['wrote'] = True
+
+
+def use_read_replica():
+    """Route this request's reads to the replica; usable as a before_request hook"""
+    if has_app_context():
+        g.db_read_replica = True
+
+
+def read_replica(f):
+    """Serve a read-only view from the replica bind, if one is configured"""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        use_read_replica()
+        return f(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def primary_only():
+    """Read from the primary inside the block, e.g. for data that must not lag (revocations)"""
+    if not has_request_context():
+        yield
+        return
+    previous = g.get('db_read_replica', False)
+    g.db_read_replica = False
+    try:
+        yield
+    finally:
+        g.db_read_replica = previous
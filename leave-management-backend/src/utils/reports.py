@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, extract, select
+from sqlalchemy.pool import NullPool
+
+from src.models.department import Department
+from src.models.leave_application import LeaveApplication
+from src.models.leave_type import LeaveType
+from src.models.user import User
+
+REPORT_FILTERS = ('status', 'department_id', 'year', 'start_date', 'end_date')
+
+# Rows fetched from the cursor at a time while streaming a report
+SUMMARY_FETCH_CHUNK = 2000
+
+
+def report_filters(data):
+    """Pick and validate report filters; raises ValueError on bad values"""
+    filters = {key: data[key] for key in REPORT_FILTERS if data.get(key) not in (None, '')}
+    if 'department_id' in filters:
+        filters['department_id'] = int(filters['department_id'])
+    if 'year' in filters:
+        filters['year'] = int(filters['year'])
+    for key in ('start_date', 'end_date'):
+        if key in filters:
+            datetime.strptime(filters[key], '%Y-%m-%d')
+    return filters
+
+
+def summary_report_query(filters):
+    """
+    Summary rows as plain columns (no ORM objects, no lazy loads), sorted by
+    department and leave type for the report's subtotal sections.
+    """
+    query = (
+        select(
+            Department.name,
+            LeaveType.name,
+            (User.first_name + ' ' + User.last_name),
+            User.employee_number,
+            LeaveApplication.start_date,
+            LeaveApplication.end_date,
+            LeaveApplication.days_requested,
+            LeaveApplication.status
+        )
+        .select_from(LeaveApplication)
+        .join(User, User.id == LeaveApplication.user_id)
+        .outerjoin(Department, Department.id == User.department_id)
+        .outerjoin(LeaveType, LeaveType.id == LeaveApplication.leave_type_id)
+    )
+    if 'status' in filters:
+        query = query.where(LeaveApplication.status == filters['status'])
+    if 'department_id' in filters:
+        query = query.where(User.department_id == filters['department_id'])
+    if 'year' in filters:
+        query = query.where(extract('year', LeaveApplication.start_date) == filters['year'])
+    if 'start_date' in filters:
+        query = query.where(LeaveApplication.start_date >= datetime.strptime(filters['start_date'], '%Y-%m-%d').date())
+    if 'end_date' in filters:
+        query = query.where(LeaveApplication.start_date <= datetime.strptime(filters['end_date'], '%Y-%m-%d').date())
+    return query.order_by(Department.name, LeaveType.name, LeaveApplication.start_date, LeaveApplication.id)
+
+
+def stream_summary_rows(connection, filters, chunk_size=SUMMARY_FETCH_CHUNK):
+    """Yield summary rows from the cursor chunk_size at a time"""
+    result = connection.execution_options(yield_per=chunk_size).execute(summary_report_query(filters))
+    for partition in result.partitions():
+        yield from partition
+
+
+def render_summary_report_job(bind, filters, title):
+    """
+    Document job entry point: stream the report straight from the database.
+
+    Runs in a worker process, so it opens its own short-lived connection to
+    the given bind rather than using the web app's pool.
+    """
+    from src.utils.document_jobs import worker_database_url
+    from src.utils.pdf_generator import render_summary_report
+
+    engine = create_engine(worker_database_url(bind), poolclass=NullPool)
+    try:
+        with engine.connect() as connection:
+            return render_summary_report(stream_summary_rows(connection, filters), title)
+    finally:
+        engine.dispose()
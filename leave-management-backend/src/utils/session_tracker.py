@@ -0,0 +1,84 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import current_app
+from sqlalchemy import bindparam, delete, update
+
+
+class SessionActivityTracker:
+    """
+    Coalesces LoginSession.last_activity writes.
+
+    Authenticated requests only record "jti was seen at t" in memory; the
+    buffer is written with one executemany UPDATE at most every
+    SESSION_ACTIVITY_FLUSH_SECONDS, and expired sessions are purged through the
+    expires_at index every SESSION_PURGE_SECONDS.
+    """
+
+    def __init__(self, app=None):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._last_purge = 0.0
+        self.flush_interval = 30
+        self.purge_interval = 3600
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.flush_interval = app.config.get('SESSION_ACTIVITY_FLUSH_SECONDS', 30)
+        self.purge_interval = app.config.get('SESSION_PURGE_SECONDS', 3600)
+        app.after_request(self._after_request)
+        app.extensions['session_tracker'] = self
+
+    def touch(self, jti):
+        """Record activity for a session; no I/O"""
+        with self._lock:
+            self._pending[jti] = datetime.now(timezone.utc)
+
+    def _after_request(self, response):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        return response
+
+    def flush(self):
+        """Write buffered activity timestamps in a single batched UPDATE"""
+        from src.extensions import db
+        from src.models.login_session import LoginSession
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            purge_due = self._last_flush - self._last_purge >= self.purge_interval
+            if purge_due:
+                self._last_purge = self._last_flush
+        if not pending and not purge_due:
+            return 0
+
+        table = LoginSession.__table__
+        try:
+            with db.engine.begin() as connection:
+                if pending:
+                    connection.execute(
+                        update(table)
+                        .where(table.c.session_token == bindparam('b_jti'))
+                        .values(last_activity=bindparam('b_seen')),
+                        [{'b_jti': jti, 'b_seen': seen} for jti, seen in pending.items()]
+                    )
+                if purge_due:
+                    connection.execute(
+                        delete(table).where(table.c.expires_at < datetime.now(timezone.utc))
+                    )
+        except Exception as e:
+            # Keep the timestamps for the next flush rather than dropping them
+            with self._lock:
+                for jti, seen in pending.items():
+                    self._pending.setdefault(jti, seen)
+            current_app.logger.error(f"Session activity flush failed: {str(e)}")
+            return 0
+        return len(pending)
+
+    def discard(self, jti):
+        with self._lock:
+            self._pending.pop(jti, None)
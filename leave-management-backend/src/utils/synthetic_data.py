@@ -0,0 +1,593 @@
+import csv
+import io
+import json
+import random
+import sys
+import time as timer
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from itertools import accumulate
+
+import bcrypt
+import click
+from flask import current_app
+from sqlalchemy import bindparam, func, select, update
+
+from src.extensions import db
+
+# Dataset sizes; `large` is the organisation the benchmarks are meant to model
+PROFILES = {
+    'small': {'users': 2_000, 'departments': 30, 'applications': 40_000, 'notifications': 100_000},
+    'medium': {'users': 10_000, 'departments': 100, 'applications': 400_000, 'notifications': 1_000_000},
+    'large': {'users': 50_000, 'departments': 300, 'applications': 2_000_000, 'notifications': 5_000_000},
+}
+
+# Every synthetic user signs in with this password
+SYNTHETIC_PASSWORD = 'synthetic-password'
+# Synthetic employee numbers are S + 5 digits: they cannot collide with real
+# (all-digit) numbers, and the allocator ignores them
+SYNTHETIC_PREFIX = 'S'
+SYNTHETIC_EMAIL_DOMAIN = 'synthetic.example.com'
+
+# Relative frequency and (min, max) working days per leave type
+LEAVE_MIX = {
+    'Annual Leave': (55, 1, 15),
+    'Sick Leave': (30, 1, 5),
+    'Study Leave (Short Term)': (5, 1, 10),
+    'Bereavement Leave': (4, 1, 4),
+    'Paternity Leave': (3, 5, 14),
+    'Maternity Leave': (2, 40, 90),
+    'Study Leave (Long Term)': (1, 20, 60),
+}
+
+# How likely leave is to start in each month (Jan..Dec): peaks over Easter,
+# the August school holidays and Christmas
+MONTH_WEIGHTS = [0.7, 0.8, 0.9, 1.4, 0.9, 0.8, 1.0, 1.6, 0.9, 0.9, 0.9, 2.2]
+# Leave starting next to a public holiday (bridging) is this much more likely
+BRIDGE_WEIGHT = 2.5
+
+NOTIFICATION_FOR_STATUS = {
+    'pending': ('leave_application', 'Leave application submitted'),
+    'approved': ('leave_approval', 'Leave approved'),
+    'rejected': ('leave_rejection', 'Leave rejected'),
+    'cancelled': ('system', 'Leave cancelled'),
+}
+STATUSES = list(NOTIFICATION_FOR_STATUS)
+
+FIRST_NAMES = ['Achieng', 'Wanjiru', 'Kamau', 'Otieno', 'Njeri', 'Mwangi', 'Chebet', 'Kiprop', 'Akinyi', 'Mutua',
+               'Wambui', 'Omondi', 'Nyambura', 'Kariuki', 'Atieno', 'Muthoni', 'Kipchoge', 'Auma', 'Njoroge', 'Jeruto']
+LAST_NAMES = ['Odhiambo', 'Kimani', 'Wafula', 'Cheruiyot', 'Mugo', 'Onyango', 'Kilonzo', 'Rotich', 'Gitau', 'Ochieng',
+              'Maina', 'Koech', 'Wekesa', 'Nduta', 'Barasa', 'Kamau', 'Langat', 'Macharia', 'Ouma', 'Kosgei']
+
+# Applications span this many days before the reference date and HORIZON_DAYS after it
+HISTORY_DAYS = 730
+HORIZON_DAYS = 60
+# Calendar margin for application dates before the window and long leave after it
+LEAD_DAYS = 40
+TAIL_DAYS = 150
+
+
+def synthetic_employee_number(index):
+    return f'{SYNTHETIC_PREFIX}{index:05d}'
+
+
+class WorkingCalendar:
+    """
+    Day-indexed calendar over a fixed range.
+
+    Working days are counted the way calculate_working_days counts them
+    (public holidays always excluded, weekends unless the leave type counts
+    them), but in constant time from prefix sums. Also holds the seasonal
+    weights used to pick start dates.
+    """
+
+    def __init__(self, first, last):
+        from src.holidays import get_kenyan_public_holidays
+
+        holidays = set()
+        for year in range(first.year, last.year + 1):
+            holidays |= get_kenyan_public_holidays(year)
+        self.first = first
+        self.days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+        self._counted = {}
+        for exclude_weekends in (True, False):
+            counted = [day not in holidays and not (exclude_weekends and day.weekday() >= 5) for day in self.days]
+            # prefix[i] = counted days before index i; positions = indexes of counted days
+            prefix = [0, *accumulate(counted)]
+            positions = [i for i, c in enumerate(counted) if c]
+            self._counted[exclude_weekends] = (prefix, positions)
+
+        weights = []
+        for i, day in enumerate(self.days):
+            weight = MONTH_WEIGHTS[day.month - 1]
+            if (day - timedelta(days=1)) in holidays or (day + timedelta(days=1)) in holidays \
+                    or (day + timedelta(days=3)) in holidays and day.weekday() == 4:
+                weight *= BRIDGE_WEIGHT
+            weights.append(weight)
+        self._cumulative = list(accumulate(weights))
+
+    def index(self, day):
+        return (day - self.first).days
+
+    def count(self, start, end, exclude_weekends=True):
+        """Leave days from index start to end inclusive"""
+        prefix, _ = self._counted[exclude_weekends]
+        return prefix[end + 1] - prefix[start]
+
+    def span(self, start, days, exclude_weekends=True):
+        """(first, last) indexes of a leave of `days` leave days beginning on or after index start"""
+        prefix, positions = self._counted[exclude_weekends]
+        first = prefix[start]
+        last = min(first + days - 1, len(positions) - 1)
+        return positions[first], positions[last]
+
+    def pick(self, rng, low, high):
+        """Seasonally weighted index in [low, high)"""
+        cumulative = self._cumulative
+        base = cumulative[low - 1] if low else 0.0
+        target = base + rng.random() * (cumulative[high - 1] - base)
+        return min(max(bisect_left(cumulative, target, low, high), low), high - 1)
+
+
+class BulkWriter:
+    """
+    Fastest bulk insert the connection's dialect offers.
+
+    SQLite gets one executemany of plain tuples per batch, PostgreSQL gets
+    COPY FROM STDIN, anything else an executemany INSERT through SQLAlchemy.
+    Rows are tuples in `columns` order; with `native` false dates and
+    datetimes must already be ISO strings (see date_value/datetime_value).
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.dialect = connection.dialect.name
+        self.native = self.dialect not in ('sqlite', 'postgresql')
+        self._quote = connection.dialect.identifier_preparer
+        self._written = set()
+        self._day_strings = {}
+
+    def date_value(self, day):
+        return day if self.native else day.isoformat()
+
+    def datetime_value(self, day, seconds=0):
+        if self.native:
+            return datetime.combine(day, time()) + timedelta(seconds=seconds)
+        prefix = self._day_strings.get(day)
+        if prefix is None:
+            prefix = self._day_strings[day] = day.isoformat()
+        # SQLAlchemy's SQLite DATETIME storage format, which PostgreSQL also accepts
+        return f'{prefix} {seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}.000000'
+
+    def write(self, table, columns, rows):
+        if not rows:
+            return
+        self._written.add(table)
+        if self.dialect == 'sqlite':
+            names = ', '.join(self._quote.quote(c) for c in columns)
+            self.connection.exec_driver_sql(
+                f"INSERT INTO {self._quote.format_table(table)} ({names}) VALUES ({', '.join('?' * len(columns))})",
+                rows
+            )
+        elif self.dialect == 'postgresql':
+            self._copy(table, columns, rows)
+        else:
+            self.connection.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+    def _copy(self, table, columns, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        names = ', '.join(self._quote.quote(c) for c in columns)
+        statement = f"COPY {self._quote.format_table(table)} ({names}) FROM STDIN WITH (FORMAT csv)"
+        cursor = self.connection.connection.driver_connection.cursor()
+        try:
+            if hasattr(cursor, 'copy_expert'):
+                # psycopg2
+                buffer.seek(0)
+                cursor.copy_expert(statement, buffer)
+            else:
+                # psycopg 3
+                with cursor.copy(statement) as copy:
+                    copy.write(buffer.getvalue())
+        finally:
+            cursor.close()
+
+    def finish(self):
+        """Move PostgreSQL id sequences past the explicitly assigned ids"""
+        if self.dialect != 'postgresql':
+            return
+        for table in self._written:
+            if 'id' in table.c and table.c.id.autoincrement:
+                name = self._quote.format_table(table)
+                self.connection.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), (SELECT max(id) FROM {name}))"
+                )
+
+
+class SyntheticOrganization:
+    """
+    Deterministic synthetic organisation for benchmarks and load tests.
+
+    Rows are generated as tuples and written with BulkWriter in one
+    transaction per table group; primary keys are assigned here rather than
+    by the database, so rows reference each other without reading anything
+    back. Non-unique indexes of the bulk-loaded tables are dropped during the
+    load and rebuilt once at the end (defer_indexes). The same seed and
+    reference date always produce the same rows.
+    """
+
+    def __init__(self, users, departments, applications, notifications, seed=0, as_of=None,
+                 batch_size=50_000, defer_indexes=True):
+        if users > 99_999:
+            raise ValueError('At most 99,999 synthetic users are supported')
+        if users < departments + 1:
+            raise ValueError('Need at least one user per department plus the Principal Secretary')
+        self.counts = {'users': users, 'departments': departments,
+                       'applications': applications, 'notifications': notifications}
+        self.seed = seed
+        self.as_of = as_of or date.today()
+        self.batch_size = batch_size
+        self.defer_indexes = defer_indexes
+        self.random = random.Random(seed)
+        self.calendar = WorkingCalendar(self.as_of - timedelta(days=HISTORY_DAYS + LEAD_DAYS),
+                                        self.as_of + timedelta(days=HORIZON_DAYS + TAIL_DAYS))
+
+    def generate(self, progress=None):
+        """Write the dataset; returns the number of rows written per table"""
+        from src.models.department import Department
+        from src.models.leave_application import LeaveApplication
+        from src.models.leave_balance import LeaveBalance
+        from src.models.leave_type import LeaveType
+        from src.models.notification import Notification
+        from src.models.user import User
+        from src.utils.bootstrap import seed_initial_data
+
+        if db.session.execute(
+            select(func.count()).select_from(User).where(User.email.like(f'%@{SYNTHETIC_EMAIL_DOMAIN}'))
+        ).scalar():
+            raise ValueError('Synthetic data is already present in this database')
+
+        seed_initial_data()
+        self.leave_types = {name: (type_id, max_days, exclude_weekends is not False)
+                            for type_id, name, max_days, exclude_weekends in db.session.execute(
+                                select(LeaveType.id, LeaveType.name, LeaveType.max_days, LeaveType.exclude_weekends))}
+        self.first_ids = {model.__tablename__: (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+                          for model in (User, Department, LeaveApplication, LeaveBalance, Notification)}
+        self.first_user_id = self.first_ids['users']
+        self.first_department_id = self.first_ids['departments']
+        db.session.rollback()
+
+        deferred = []
+        if self.defer_indexes:
+            tables = [model.__table__ for model in (User, LeaveApplication, LeaveBalance, Notification)]
+            deferred = [index for table in tables for index in table.indexes if not index.unique]
+            with db.engine.begin() as connection:
+                for index in deferred:
+                    index.drop(connection, checkfirst=True)
+
+        written = {}
+        try:
+            with db.engine.begin() as connection:
+                writer = BulkWriter(connection)
+                written['departments'] = self._write_departments(writer)
+                written['users'] = self._write_users(writer)
+                self._assign_heads(connection)
+                writer.finish()
+            if progress:
+                progress('users', written['users'])
+            with db.engine.begin() as connection:
+                writer = BulkWriter(connection)
+                written['leave_applications'], used = self._write_applications(writer, progress)
+                written['leave_balances'] = self._write_balances(writer, used)
+                writer.finish()
+            with db.engine.begin() as connection:
+                writer = BulkWriter(connection)
+                written['notifications'] = self._write_notifications(writer, progress)
+                writer.finish()
+        finally:
+            if deferred:
+                if progress:
+                    progress('indexes', len(deferred))
+                with db.engine.begin() as connection:
+                    for index in deferred:
+                        index.create(connection, checkfirst=True)
+        return written
+
+    def _batched(self, writer, table, columns, rows):
+        """Write and clear rows once a batch is full; returns the (possibly new) list"""
+        if len(rows) >= self.batch_size:
+            writer.write(table, columns, rows)
+            return []
+        return rows
+
+    # Organisation
+
+    def _write_departments(self, writer):
+        from src.models.department import Department
+
+        created = writer.datetime_value(self.as_of - timedelta(days=HISTORY_DAYS), 8 * 3600)
+        writer.write(Department.__table__, ('id', 'name', 'description', 'head_id', 'created_at', 'updated_at', 'is_active'), [
+            (self.first_department_id + i, f'Synthetic Department {i + 1:03d}', 'Synthetic data', None, created, created, True)
+            for i in range(self.counts['departments'])
+        ])
+        return self.counts['departments']
+
+    def _write_users(self, writer):
+        from src.models.user import User
+
+        rng = self.random
+        departments = self.counts['departments']
+        # One hash for everyone: bcrypt at ~0.3 s a user would dominate the load
+        password_hash = bcrypt.hashpw(SYNTHETIC_PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        created = writer.datetime_value(self.as_of - timedelta(days=HISTORY_DAYS), 8 * 3600)
+
+        # User 0 is the Principal Secretary, users 1..departments head a department
+        # each, everyone else is staff spread unevenly across departments
+        weights = [rng.uniform(0.3, 3.0) for _ in range(departments)]
+        self.department_of = [None] + list(range(departments)) + rng.choices(
+            range(departments), weights=weights, k=self.counts['users'] - departments - 1)
+        self.members = [[] for _ in range(departments)]
+        for index, department in enumerate(self.department_of):
+            if department is not None:
+                self.members[department].append(index)
+
+        table = User.__table__
+        columns = ('id', 'employee_number', 'email', 'phone_number', 'password_hash', 'first_name', 'last_name',
+                   'role', 'failed_login_attempts', 'is_locked', 'is_active', 'created_at', 'updated_at',
+                   'department_id', 'email_delivery')
+        rows = []
+        for index, department in enumerate(self.department_of):
+            number = synthetic_employee_number(index)
+            role = 'principal_secretary' if index == 0 else 'hod' if index <= departments else 'staff'
+            rows.append((
+                self.first_user_id + index, number, f'{number.lower()}@{SYNTHETIC_EMAIL_DOMAIN}',
+                f'07{rng.randrange(10 ** 8):08d}', password_hash, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                role, 0, False, True, created, created,
+                None if department is None else self.first_department_id + department, 'immediate'
+            ))
+            rows = self._batched(writer, table, columns, rows)
+        writer.write(table, columns, rows)
+        return len(self.department_of)
+
+    def _assign_heads(self, connection):
+        from src.models.department import Department
+
+        table = Department.__table__
+        connection.execute(
+            update(table).where(table.c.id == bindparam('b_id')).values(head_id=bindparam('b_head')),
+            [{'b_id': self.first_department_id + d, 'b_head': self.first_user_id + d + 1}
+             for d in range(self.counts['departments'])]
+        )
+
+    def _approver(self, index):
+        """Department head for staff, the Principal Secretary for heads"""
+        department = self.department_of[index]
+        if department is None or index == department + 1:
+            return self.first_user_id
+        return self.first_user_id + department + 1
+
+    # Leave
+
+    def _write_applications(self, writer, progress):
+        """
+        Applications per user, one per slot of the window so a user's own
+        leave never overlaps. Start dates follow the seasonal weights, so
+        colleagues' leave clusters (and overlaps) the way it does in practice;
+        days_requested skips weekends and public holidays like the apply route.
+        """
+        from src.models.leave_application import LeaveApplication
+
+        rng = self.random
+        calendar = self.calendar
+        users = self.counts['users']
+        window_start = calendar.index(self.as_of - timedelta(days=HISTORY_DAYS))
+        window = HISTORY_DAYS + HORIZON_DAYS
+        today = calendar.index(self.as_of)
+        days = calendar.days
+        day_values = [writer.date_value(day) for day in days]
+        first_id = self.first_ids['leave_applications']
+        names = [name for name in LEAVE_MIX if name in self.leave_types]
+        weights = [LEAVE_MIX[name][0] for name in names]
+
+        # Kept for the notifications about each application
+        self.application_ranges = array('l', [0]) * (users + 1)
+        self.application_status = bytearray()
+        self.application_decided = array('l')
+
+        table = LeaveApplication.__table__
+        columns = ('id', 'user_id', 'leave_type_id', 'start_date', 'end_date', 'days_requested', 'reason', 'status',
+                   'comments', 'approved_by', 'approved_at', 'created_at', 'updated_at', 'person_handling_duties',
+                   'person_handling_duties_id', 'handover_notes', 'attachment_path')
+        per_user, remainder = divmod(self.counts['applications'], users)
+        used = {}
+        rows = []
+        written = 0
+        for index in range(users):
+            self.application_ranges[index] = written
+            count = per_user + (1 if index < remainder else 0)
+            if not count:
+                continue
+            slot = window / count
+            user_id = self.first_user_id + index
+            approver = self._approver(index)
+            department = self.department_of[index]
+            colleagues = self.members[department] if department is not None else []
+            previous_end = 0
+            for n, name in enumerate(rng.choices(names, weights=weights, k=count)):
+                type_id, _, exclude_weekends = self.leave_types[name]
+                _, low, high = LEAVE_MIX[name]
+                slot_start = window_start + int(n * slot)
+                slot_end = window_start + int((n + 1) * slot)
+                # Short enough to fit the slot with room for weekends and holidays
+                length = min(rng.randint(low, high), max(int((slot_end - slot_start) * 0.6), 1))
+                latest = max(slot_end - length * 7 // 5 - 2, slot_start + 1)
+                start, end = calendar.span(max(calendar.pick(rng, slot_start, latest), previous_end + 1),
+                                           length, exclude_weekends)
+                previous_end = end
+
+                if start <= today:
+                    status = rng.choices(('approved', 'rejected', 'cancelled'), (85, 10, 5))[0]
+                else:
+                    status = rng.choices(('pending', 'approved'), (70, 30))[0]
+                created = max(min(start - rng.randint(3, 30), today), 0)
+                decided = min(created + rng.randint(0, 3), today)
+                is_decided = status in ('approved', 'rejected')
+                handler = rng.choice(colleagues) if colleagues and rng.random() < 0.6 else None
+                requested = calendar.count(start, end, exclude_weekends)
+                created_at = writer.datetime_value(days[created], 9 * 3600 + int(rng.random() * 8 * 3600))
+                rows.append((
+                    first_id + written, user_id, type_id, day_values[start], day_values[end], float(requested),
+                    f'{name} (synthetic)', status, None,
+                    approver if is_decided else None,
+                    writer.datetime_value(days[decided], 10 * 3600) if is_decided else None,
+                    created_at, created_at, None,
+                    None if handler in (None, index) else self.first_user_id + handler, None, None
+                ))
+                self.application_status.append(STATUSES.index(status))
+                self.application_decided.append(decided if is_decided else created)
+                written += 1
+                if status == 'approved':
+                    key = (user_id, type_id, days[start].year)
+                    used[key] = used.get(key, 0) + requested
+                if len(rows) >= self.batch_size:
+                    writer.write(table, columns, rows)
+                    rows = []
+                    if progress:
+                        progress('leave_applications', written)
+        self.application_ranges[users] = written
+        writer.write(table, columns, rows)
+        if progress:
+            progress('leave_applications', written)
+        return written, used
+
+    def _write_balances(self, writer, used):
+        from src.models.leave_balance import LeaveBalance
+
+        table = LeaveBalance.__table__
+        columns = ('id', 'user_id', 'leave_type_id', 'balance', 'used_days', 'year', 'created_at', 'updated_at')
+        first_id = self.first_ids['leave_balances']
+        stamp = writer.datetime_value(self.as_of)
+        rows = []
+        written = 0
+        for year in range(self.as_of.year - HISTORY_DAYS // 365, self.as_of.year + 1):
+            for index in range(self.counts['users']):
+                user_id = self.first_user_id + index
+                for type_id, max_days, _ in self.leave_types.values():
+                    rows.append((first_id + written, user_id, type_id, float(max_days),
+                                 float(used.get((user_id, type_id, year), 0)), year, stamp, stamp))
+                    written += 1
+                    rows = self._batched(writer, table, columns, rows)
+        writer.write(table, columns, rows)
+        return written
+
+    # Notifications
+
+    def _write_notifications(self, writer, progress):
+        """
+        Mostly status notifications about the recipient's own applications,
+        stamped when the application was submitted or decided; the rest are
+        system notices. Anything older than two weeks is usually read.
+        """
+        from src.models.notification import Notification
+        from src.models.notification_counter import NotificationCounter
+
+        rng = self.random
+        calendar = self.calendar
+        days = calendar.days
+        today = calendar.index(self.as_of)
+        window_start = calendar.index(self.as_of - timedelta(days=HISTORY_DAYS))
+        first_application_id = self.first_ids['leave_applications']
+        first_id = self.first_ids['notifications']
+        first_user_id, users = self.first_user_id, self.counts['users']
+        ranges, statuses, decided = self.application_ranges, self.application_status, self.application_decided
+
+        table = Notification.__table__
+        columns = ('id', 'user_id', 'title', 'message', 'notification_type', 'is_read', 'created_at',
+                   'leave_application_id')
+        unread = {}
+        rows = []
+        # int(random() * n) rather than randrange(n): this loop runs millions of times
+        for n in range(self.counts['notifications']):
+            index = int(rng.random() * users)
+            low, high = ranges[index], ranges[index + 1]
+            if high > low and rng.random() < 0.8:
+                application = low + int(rng.random() * (high - low))
+                notification_type, title = NOTIFICATION_FOR_STATUS[STATUSES[statuses[application]]]
+                day = decided[application]
+                application_id = first_application_id + application
+            else:
+                notification_type, title = 'system', 'System notice'
+                day = window_start + int(rng.random() * (today + 1 - window_start))
+                application_id = None
+            is_read = rng.random() < (0.97 if today - day > 14 else 0.4)
+            rows.append((first_id + n, first_user_id + index, title, f'{title} (synthetic)', notification_type,
+                         is_read, writer.datetime_value(days[day], int(rng.random() * 86400)), application_id))
+            if not is_read:
+                unread[first_user_id + index] = unread.get(first_user_id + index, 0) + 1
+            if len(rows) >= self.batch_size:
+                writer.write(table, columns, rows)
+                rows = []
+                if progress:
+                    progress('notifications', n + 1)
+        writer.write(table, columns, rows)
+        if progress:
+            progress('notifications', self.counts['notifications'])
+
+        # Synthetic users are new, so their unread counters can be inserted outright
+        stamp = writer.datetime_value(self.as_of)
+        writer.write(NotificationCounter.__table__, ('user_id', 'unread_count', 'updated_at'),
+                     [(user_id, count, stamp) for user_id, count in unread.items()])
+        return self.counts['notifications']
+
+
+@click.command('seed-synthetic')
+@click.option('--profile', type=click.Choice(sorted(PROFILES)), default='small', show_default=True,
+              help='Base sizes; the options below override them.')
+@click.option('--users', type=int)
+@click.option('--departments', type=int)
+@click.option('--applications', type=int)
+@click.option('--notifications', type=int)
+@click.option('--seed', type=int, default=0, show_default=True, help='Same seed and --as-of, same rows.')
+@click.option('--as-of', type=click.DateTime(formats=['%Y-%m-%d']), help='Reference date (default: today).')
+@click.option('--batch-size', type=int, default=50_000, show_default=True)
+@click.option('--defer-indexes/--keep-indexes', default=True, show_default=True,
+              help='Drop non-unique indexes during the load and rebuild them after.')
+@click.option('--yes', is_flag=True, help='Do not ask for confirmation.')
+def seed_synthetic_command(profile, users, departments, applications, notifications, seed, as_of, batch_size,
+                           defer_indexes, yes):
+    """Write a synthetic organisation for benchmarks and load tests."""
+    counts = dict(PROFILES[profile])
+    for key, value in (('users', users), ('departments', departments),
+                       ('applications', applications), ('notifications', notifications)):
+        if value is not None:
+            counts[key] = value
+    if not yes:
+        click.confirm(
+            f"Write {counts['users']:,} synthetic users (password '{SYNTHETIC_PASSWORD}') and their data "
+            f"to {db.engine.url.render_as_string(hide_password=True)}?", abort=True, err=True
+        )
+
+    organization = SyntheticOrganization(**counts, seed=seed, as_of=as_of.date() if as_of else None,
+                                         batch_size=batch_size, defer_indexes=defer_indexes)
+    started = timer.perf_counter()
+
+    def progress(table, rows):
+        click.echo(f'\r{table}: {rows:,} ({timer.perf_counter() - started:.0f}s)\033[K', nl=False, err=True)
+
+    try:
+        written = organization.generate(progress=progress)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(err=True)
+    elapsed = timer.perf_counter() - started
+    total = sum(written.values())
+    current_app.logger.info(f"Synthetic data: {total} rows in {elapsed:.1f}s")
+    click.echo(json.dumps({
+        'rows': written,
+        'seconds': round(elapsed, 1),
+        'rows_per_minute': int(total / elapsed * 60) if elapsed else None,
+        'seed': seed,
+        'as_of': organization.as_of.isoformat(),
+        'first_employee_number': synthetic_employee_number(0),
+    }))
@@ -0,0 +1,161 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import current_app
+from sqlalchemy import delete
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.utils.read_replica import primary_only
+
+
+def to_epoch(value):
+    """Convert a stored (naive UTC or aware) datetime to a POSIX timestamp"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over string keys"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / self.capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class TokenRevocationStore:
+    """
+    Revoked JWT IDs mirrored in process memory.
+
+    The token_blocklist table is the source of truth. Each worker keeps a bloom
+    filter in front of an exact jti -> expiry map and pulls new rows
+    incrementally (id > high-water mark) at most every
+    TOKEN_BLOCKLIST_REFRESH_SECONDS, so checking a token that was never revoked
+    costs no I/O. Rows are pruned from the table and from memory once the token
+    they describe has expired anyway.
+    """
+
+    # Re-read this many ids below the high-water mark on every refresh so rows
+    # committed out of id order by concurrent writers are not skipped
+    REFRESH_OVERLAP = 50
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._revoked = {}
+        self._bloom = BloomFilter(10000)
+        self._high_water = 0
+        self._last_refresh = 0.0
+        self._last_prune = 0.0
+        self._loaded = False
+        self.refresh_interval = 5
+        self.prune_interval = 3600
+        self.capacity = 10000
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.refresh_interval = app.config.get('TOKEN_BLOCKLIST_REFRESH_SECONDS', 5)
+        self.prune_interval = app.config.get('TOKEN_BLOCKLIST_PRUNE_SECONDS', 3600)
+        self.capacity = app.config.get('TOKEN_BLOCKLIST_CAPACITY', 10000)
+        self._bloom = BloomFilter(self.capacity)
+        app.extensions['token_blocklist'] = self
+
+    def _remember(self, jti, expires):
+        if jti not in self._revoked:
+            self._revoked[jti] = expires
+            self._bloom.add(jti)
+            if self._bloom.count > self._bloom.capacity:
+                self._rebuild()
+
+    def _rebuild(self):
+        """Resize the bloom filter to the live entries (after pruning or growth)"""
+        self._bloom = BloomFilter(max(self.capacity, len(self._revoked) * 2))
+        for jti in self._revoked:
+            self._bloom.add(jti)
+
+    def refresh(self, force=False):
+        """Pull revocations written since the last refresh (by any worker)"""
+        from src.extensions import db
+        from src.models.token_blocklist import TokenBlocklist
+
+        now = time.time()
+        if not force and self._loaded and now - self._last_refresh < self.refresh_interval:
+            return
+        with self._lock:
+            if not force and self._loaded and now - self._last_refresh < self.refresh_interval:
+                return
+            self._last_refresh = now
+            # A lagging replica would let just-revoked tokens through
+            with primary_only():
+                rows = db.session.query(
+                    TokenBlocklist.id, TokenBlocklist.jti, TokenBlocklist.expires_at
+                ).filter(
+                    TokenBlocklist.id > self._high_water - self.REFRESH_OVERLAP
+                ).order_by(TokenBlocklist.id).all()
+            for row_id, jti, expires_at in rows:
+                self._remember(jti, to_epoch(expires_at))
+                self._high_water = max(self._high_water, row_id)
+            self._loaded = True
+
+            if now - self._last_prune >= self.prune_interval:
+                self._last_prune = now
+                self._prune(now)
+
+    def _prune(self, now):
+        from src.extensions import db
+        from src.models.token_blocklist import TokenBlocklist
+
+        # Runs inside a request's JWT check: delete on a connection of its own so
+        # the request's session is never committed (or rolled back) from here
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(
+                    delete(TokenBlocklist).where(TokenBlocklist.expires_at < datetime.now(timezone.utc))
+                )
+        except SQLAlchemyError as e:
+            current_app.logger.warning(f"Token blocklist prune failed: {str(e)}")
+        expired = [jti for jti, expires in self._revoked.items() if expires < now]
+        for jti in expired:
+            del self._revoked[jti]
+        if expired:
+            self._rebuild()
+
+    def is_revoked(self, jti):
+        self.refresh()
+        if jti not in self._bloom:
+            return False
+        return jti in self._revoked
+
+    def revoke(self, jti, expires_at, user_id=None, token_type='access'):
+        """Persist a revocation; the caller commits the session"""
+        from src.extensions import db
+        from src.models.token_blocklist import TokenBlocklist
+
+        db.session.add(TokenBlocklist(
+            jti=jti,
+            user_id=user_id,
+            token_type=token_type,
+            expires_at=expires_at
+        ))
+        with self._lock:
+            self._remember(jti, to_epoch(expires_at))
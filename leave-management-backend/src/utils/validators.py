@@ -0,0 +1,30 @@
+import re
+
+# Compiled once at import; these run for every signup and every roster row
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+# Accept Kenyan phone numbers
+PHONE_PATTERN = re.compile(r'^(\+254|254|0)[17]\d{8}$')
+
+EMPLOYEE_NUMBER_ROLES = {
+    4: 'staff',
+    5: 'hod',
+    6: 'principal_secretary'
+}
+
+def validate_employee_number(employee_number):
+    """Validate employee number format and determine role"""
+    if not employee_number or not employee_number.isdigit():
+        return False, None
+    
+    role = EMPLOYEE_NUMBER_ROLES.get(len(employee_number))
+    if role is None:
+        return False, None
+    return True, role
+
+def validate_email(email):
+    """Validate email format"""
+    return EMAIL_PATTERN.match(email) is not None
+
+def validate_phone(phone):
+    """Validate phone number format"""
+    return PHONE_PATTERN.match(phone) is not None
@@ -0,0 +1,18 @@
+import pytest
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('DATABASE_AUTO_INIT', 'false')
+    monkeypatch.setenv('EMAIL_OUTBOX_WORKER', 'false')
+    monkeypatch.delenv('DATABASE_REPLICA_URL', raising=False)
+
+    from src.main import create_app
+    from src.utils.bootstrap import init_schema, seed_initial_data
+
+    app = create_app()
+    with app.app_context():
+        init_schema()
+        seed_initial_data()
+        yield app
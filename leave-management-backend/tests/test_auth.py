@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+from src.extensions import db
+from src.models.user import User
+
+
+def _login(client, password):
+    return client.post('/api/auth/login', json={'employee_number': '000001', 'password': password})
+
+
+def _lock_out(client):
+    responses = [_login(client, 'wrong-password') for _ in range(3)]
+    assert responses[-1].status_code == 423
+
+
+def test_locked_account_stays_locked(app):
+    client = app.test_client()
+    _lock_out(client)
+
+    assert _login(client, 'admin123').status_code == 423
+
+
+def test_unlock_by_another_worker_clears_stale_failure_count(app):
+    client = app.test_client()
+    _lock_out(client)
+
+    # Another worker unlocked the account: the database row changes, this worker's limiter does not
+    user = db.session.execute(db.select(User).where(User.employee_number == '000001')).scalar_one()
+    user.is_locked = False
+    user.failed_login_attempts = 0
+    user.unlocked_at = datetime.now(timezone.utc)
+    db.session.commit()
+
+    assert _login(client, 'admin123').status_code == 200
+
+
+def _token(client):
+    response = _login(client, 'admin123')
+    assert response.status_code == 200
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def _set_admin(**values):
+    db.session.execute(db.update(User).where(User.employee_number == '000001').values(**values))
+    db.session.commit()
+
+
+def test_token_of_deactivated_user_is_refused(app):
+    client = app.test_client()
+    headers = _token(client)
+    _set_admin(is_active=False)
+
+    assert client.get('/api/users/all', headers=headers).status_code == 401
+    assert client.get('/api/dashboard/stats', headers=headers).status_code == 404
+    assert client.put('/api/users/profile', json={'first_name': 'X'}, headers=headers).status_code == 404
+
+
+def test_token_of_deleted_user_is_refused(app):
+    client = app.test_client()
+    headers = _token(client)
+    db.session.execute(db.text('PRAGMA foreign_keys = OFF'))
+    db.session.execute(db.delete(User).where(User.employee_number == '000001'))
+    db.session.commit()
+
+    assert client.get('/api/users/all', headers=headers).status_code == 401
+    assert client.get('/api/dashboard/stats', headers=headers).status_code == 404
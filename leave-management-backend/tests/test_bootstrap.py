@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy import text
+
+from src.extensions import db
+from src.utils.bootstrap import SchemaOutOfDate, check_schema, init_schema, read_schema_state
+
+
+@pytest.fixture
+def unmigrated(app):
+    """A database stamped at version 0 whose users table predates email_delivery"""
+    with db.engine.begin() as connection:
+        connection.execute(text('ALTER TABLE users DROP COLUMN email_delivery'))
+        connection.execute(text('UPDATE schema_state SET schema_version = 0'))
+    return app
+
+
+def test_init_schema_refuses_to_stamp_missing_columns(unmigrated):
+    with pytest.raises(SchemaOutOfDate, match='users.email_delivery'):
+        init_schema()
+    assert read_schema_state()[0] == 0
+
+
+def test_check_schema_refuses_to_boot_missing_columns(unmigrated):
+    with pytest.raises(SchemaOutOfDate, match='users.email_delivery'):
+        check_schema(unmigrated)
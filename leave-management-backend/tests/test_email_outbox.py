@@ -0,0 +1,145 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from benchmarks.smtp_stub import SMTPStub
+from src.extensions import db
+from src.models.email_outbox import EmailOutbox
+from src.utils.email_outbox import EmailOutboxWorker
+
+REJECTED = 'nobody@ict.go.ke'
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    stub = SMTPStub(reject=[REJECTED]).start()
+    monkeypatch.setenv('MAIL_SERVER', '127.0.0.1')
+    monkeypatch.setenv('MAIL_PORT', str(stub.port))
+    monkeypatch.setenv('MAIL_USE_TLS', 'false')
+    monkeypatch.setenv('MAIL_DEFAULT_SENDER', 'leave@ict.go.ke')
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def worker(smtp, app):
+    return app.extensions['email_outbox']
+
+
+def _enqueue(*recipients):
+    entries = [EmailOutbox.enqueue(f'Message {i}', [recipient], 'body') for i, recipient in enumerate(recipients)]
+    db.session.commit()
+    return [entry.id for entry in entries]
+
+
+def _row(message_id):
+    db.session.expire_all()
+    return db.session.get(EmailOutbox, message_id)
+
+
+def _make_due(message_id):
+    db.session.execute(update(EmailOutbox).where(EmailOutbox.id == message_id).values(
+        next_attempt_at=datetime.now(timezone.utc) - timedelta(seconds=1)
+    ))
+    db.session.commit()
+
+
+def test_refused_message_does_not_abort_batch(worker, smtp):
+    first, bad, last = _enqueue('a@ict.go.ke', REJECTED, 'b@ict.go.ke')
+
+    assert worker.drain_once() == 3
+
+    assert smtp.connections == 1
+    assert sorted(recipients for recipients, _ in smtp.messages) == [['a@ict.go.ke'], ['b@ict.go.ke']]
+    assert _row(first).status == _row(last).status == 'sent'
+    failed = _row(bad)
+    assert failed.status == 'pending'
+    assert failed.attempts == 1
+    assert REJECTED in failed.last_error
+
+
+def test_failed_message_backs_off_exponentially(worker):
+    message_id, = _enqueue(REJECTED)
+
+    for attempt in (1, 2):
+        before = datetime.now(timezone.utc).replace(tzinfo=None)
+        worker.drain_once()
+        row = _row(message_id)
+        delay = (row.next_attempt_at - before).total_seconds()
+        expected = worker.backoff * 2 ** (attempt - 1)
+        assert row.attempts == attempt
+        assert expected <= delay <= expected * 1.2 + 1
+        _make_due(message_id)
+
+
+def test_message_is_dead_lettered_after_max_attempts(worker):
+    worker.max_attempts = 2
+    message_id, = _enqueue(REJECTED)
+
+    worker.drain_once()
+    assert _row(message_id).status == 'pending'
+    _make_due(message_id)
+    worker.drain_once()
+
+    row = _row(message_id)
+    assert row.status == 'dead'
+    assert row.next_attempt_at is None
+    assert worker.drain_once() == 0
+
+
+def test_concurrent_workers_send_each_message_once(worker, smtp, app):
+    _enqueue(*[f'user{i}@ict.go.ke' for i in range(20)])
+    workers = [worker, EmailOutboxWorker()]
+    errors = []
+
+    def drain(outbox):
+        with app.app_context():
+            try:
+                while outbox.drain_once(batch_size=3):
+                    pass
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=drain, args=(outbox,)) for outbox in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    subjects = [data.split(b'Subject: ')[1].split(b'\r\n')[0] for _, data in smtp.messages]
+    assert len(subjects) == 20
+    assert len(set(subjects)) == 20
+
+
+def test_taken_over_claim_is_not_sent_twice(worker, smtp):
+    _enqueue('a@ict.go.ke', 'b@ict.go.ke')
+    rows = worker.claim()
+
+    # The claim outlived the lease and another worker took the batch over
+    db.session.execute(update(EmailOutbox).values(claimed_at=datetime.now(timezone.utc) - timedelta(hours=1)))
+    db.session.commit()
+    assert len(EmailOutboxWorker().claim()) == 2
+
+    worker.lease = 0  # renew before the first message
+    sent, failed = worker._send_batch(rows)
+
+    assert (sent, failed) == ([], {})
+    assert smtp.messages == []
+
+
+def test_live_claim_is_renewed_while_sending(worker, smtp):
+    _enqueue('a@ict.go.ke', 'b@ict.go.ke')
+    rows = worker.claim()
+    stale = datetime.now(timezone.utc) - timedelta(seconds=worker.lease - 1)
+    db.session.execute(update(EmailOutbox).values(claimed_at=stale))
+    db.session.commit()
+
+    worker.lease, lease = 0, worker.lease
+    sent, failed = worker._send_batch(rows)
+    worker.lease = lease
+
+    assert len(sent) == 2 and failed == {}
+    assert all(_row(row['id']).claimed_at > stale.replace(tzinfo=None) for row in rows)
@@ -0,0 +1,33 @@
+import re
+from datetime import date
+
+import pytest
+
+from src.utils import pdf_generator
+from src.utils.pdf_generator import generate_leave_summary_report, render_summary_report
+from src.utils.pdf_merge import _parse
+
+
+def _rows(count):
+    return [(f'Dept {i // 250}', 'Annual Leave', f'Employee {i}', str(1000 + i), date(2026, 1, 5),
+             date(2026, 1, 9), 5, 'approved') for i in range(count)]
+
+
+def test_summary_report_parts_share_one_page_tree(monkeypatch):
+    monkeypatch.setattr(pdf_generator, 'SUMMARY_PAGES_PER_PART', 2)
+
+    pdf = render_summary_report(_rows(600))
+
+    objects, root, _ = _parse(pdf)
+    pages = [number for number, body in objects.items() if re.search(rb'/Type /Page\b(?!s)', body)]
+    kids = [int(kid) for kid in re.findall(rb'(\d+) 0 R', re.search(rb'/Kids \[([^\]]*)\]', objects[1]).group(1))]
+    assert b'/Pages 1 0 R' in objects[root]
+    assert len(pages) > 6
+    assert sorted(kids) == sorted(pages)
+    assert b'/Count %d ' % len(pages) in objects[1]
+    assert all(b'/Parent 1 0 R' in objects[page] for page in pages)
+
+
+def test_summary_report_errors_are_raised(app):
+    with pytest.raises(AttributeError):
+        generate_leave_summary_report([object()])
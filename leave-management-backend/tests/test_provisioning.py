@@ -0,0 +1,51 @@
+from src.utils.provisioning import provision_users, validate_roster
+
+
+def test_numeric_json_values_are_validated_as_text(app):
+    rows = [{
+        'employee_number': 4321,
+        'email': 'numeric@ict.go.ke',
+        'phone_number': 254712345678,
+        'password': 123456,
+        'first_name': 'Numeric',
+        'last_name': 'Values',
+        'department_id': None,
+    }]
+
+    results = provision_users(rows)
+
+    assert results[0]['status'] == 'created', results[0]['errors']
+    assert results[0]['employee_number'] == '4321'
+
+
+def test_malformed_rows_are_row_errors(app):
+    rows = [
+        ['not', 'an', 'object'],
+        None,
+        {'employee_number': 12, 'email': 'short@ict.go.ke', 'phone_number': '+254712345670',
+         'password': 'secret1', 'first_name': 'Short', 'last_name': 'Number'},
+    ]
+
+    valid, results = validate_roster(rows)
+
+    assert valid == []
+    assert [r['status'] for r in results] == ['error', 'error', 'error']
+    assert results[0]['errors'] == ['Row must be an object']
+    assert 'Invalid employee number format' in results[2]['errors']
+
+
+def test_allocated_numbers_skip_numbers_supplied_in_roster(app):
+    def row(i, employee_number=None):
+        return {'employee_number': employee_number, 'role': 'staff', 'email': f'mixed{i}@ict.go.ke',
+                'phone_number': f'+25471234560{i}', 'password': 'secret1',
+                'first_name': 'Mixed', 'last_name': f'Roster{i}'}
+
+    # Allocated rows come first, so without reservation they would be given 0001 and 0002
+    rows = [row(1), row(2), row(3, '0001'), row(4, '0002')]
+
+    results = provision_users(rows)
+
+    assert [r['status'] for r in results] == ['created'] * 4, [r['errors'] for r in results]
+    numbers = [r['employee_number'] for r in results]
+    assert numbers[2:] == ['0001', '0002']
+    assert len(set(numbers)) == 4
@@ -0,0 +1,94 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from src.extensions import db
+from src.models.department import Department
+from src.models.leave_application import LeaveApplication
+from src.models.user import User
+from src.utils.query_plans import check_query_plans, full_scans
+
+# Hot request paths, exercised as the routes run them rather than as copies
+HOT_REQUESTS = [
+    ('GET', '/api/auth/profile', None),
+    ('GET', '/api/users/profile', None),
+    ('GET', '/api/leave/history', None),
+    ('GET', '/api/leave/balances', None),
+    ('GET', '/api/leave/pending', None),
+    ('GET', '/api/notifications', None),
+    ('POST', '/api/notifications/mark-read', {}),
+    ('GET', '/api/sessions/user/1', None),
+    ('GET', '/api/dashboard/stats', None),
+    ('GET', '/api/dashboard/calendar?view=team', None),
+    ('GET', '/api/dashboard/team-overview', None),
+    ('GET', '/api/users/available-for-handover?start_date=2026-01-05&end_date=2026-01-09', None),
+    ('GET', '/api/department/stats', None),
+]
+
+
+# Routes that list a whole table by design; any other full scan fails
+LISTING_SCANS = {
+    '/api/users/available-for-handover': {'users'},
+    '/api/department/stats': {'departments'},
+}
+
+
+def _seed_team():
+    """A department with a staff member on leave, so per-member and per-department queries run"""
+    today = date.today()
+    department = Department(name='ICT')
+    db.session.add(department)
+    db.session.flush()
+    member = User(employee_number='100001', email='staff@ict.go.ke', phone_number='+254700000001',
+                  first_name='Staff', last_name='Member', role='staff', department_id=department.id, is_active=True)
+    member.set_password('secret1')
+    db.session.add(member)
+    db.session.flush()
+    for start, status in ((today, 'approved'), (today + timedelta(days=14), 'approved'), (today, 'pending')):
+        db.session.add(LeaveApplication(user_id=member.id, leave_type_id=1, start_date=start,
+                                        end_date=start + timedelta(days=2), days_requested=3,
+                                        reason='Leave', status=status))
+    db.session.commit()
+
+
+@pytest.fixture
+def recorded(app):
+    """Log in, then collect (path, statement, parameters) for every SELECT/UPDATE/DELETE the app sends"""
+    _seed_team()
+    client = app.test_client()
+    statements = []
+    path = None
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            statements.append((path, statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    response = client.post('/api/auth/login', json={'employee_number': '000001', 'password': 'admin123'})
+    assert response.status_code == 200, response.get_json()
+    headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    for method, url, body in HOT_REQUESTS:
+        path = url.split('?')[0]
+        response = client.open(url, method=method, json=body, headers=headers)
+        # A failing route would never reach the queries worth planning
+        assert 200 <= response.status_code < 300, (url, response.get_json())
+    event.remove(db.engine, 'before_cursor_execute', record)
+    return statements
+
+
+def test_hot_queries_use_indexes(app):
+    failures = [result for result in check_query_plans() if result['full_scans']]
+    assert failures == []
+
+
+def test_route_queries_use_indexes(recorded):
+    assert recorded
+    failures = []
+    with db.engine.connect() as connection:
+        for path, statement, parameters in recorded:
+            plan = [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+            scans = set(full_scans(connection, plan)) - LISTING_SCANS.get(path, set())
+            if scans:
+                failures.append((statement, scans))
+    assert failures == []
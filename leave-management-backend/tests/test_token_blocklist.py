@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, select
+
+from src.extensions import db, token_blocklist
+from src.models.token_blocklist import TokenBlocklist
+
+
+def _revoke(jti, expires_at):
+    token_blocklist.revoke(jti, expires_at)
+    db.session.commit()
+
+
+def test_prune_does_not_commit_the_request_session(app):
+    now = datetime.now(timezone.utc)
+    _revoke('expired', now - timedelta(minutes=1))
+    _revoke('live', now + timedelta(hours=1))
+    commits = []
+    event.listen(db.session(), 'after_commit', commits.append)
+    token_blocklist._last_prune = 0
+
+    token_blocklist.refresh(force=True)
+
+    assert commits == []
+    assert db.session.execute(select(TokenBlocklist.jti)).scalars().all() == ['live']
+    assert token_blocklist.is_revoked('live')
+    assert not token_blocklist.is_revoked('expired')
@@ -1,3 +1,3 @@
-from src import create_app
+from src.main import create_app
 
 app = create_app()
\ No newline at end of file